@@ -33,8 +33,13 @@ from src.generate_data_timo import (
     populate_authentication_logs,
     Session
 )
+from src.bulk_writer import get_writer
+from src.parallel_generation import generate_customers_parallel, generate_transactions_parallel
 from src.data_quality_standards import DataQualityChecker
 from src.monitoring_audit import RiskMonitor
+from src.risk_alert_worker import RiskAlertWorker
+from src.partition_maintenance import PartitionMaintenance
+from src.summary_rollup import rollup_summary_deltas
 
 # Setup logging
 log_dir = os.path.join(project_root, 'logs')
@@ -66,11 +71,21 @@ class DataGenerationConfig(Config):
     num_customers: int = random.randint(0, 80)
     num_accounts_per_customer: int = 2
     num_devices_per_customer: int = 2
+    writer_backend: str = 'orm'  # 'orm', 'copy', 'copy_binary' or 'staged'
+    num_workers: int = 1  # > 1 generates in parallel worker processes
 
 
 class TransactionConfig(Config):
     """Configuration for transaction generation."""
     num_transactions: int = random.randint(150, 300)
+    writer_backend: str = 'orm'  # 'orm', 'copy', 'copy_binary' or 'staged'
+    num_workers: int = 1  # > 1 generates in parallel worker processes
+
+
+class CheckConfig(Config):
+    """Configuration for data quality and risk monitoring checks."""
+    incremental: bool = True  # only check rows added or changed since the last run (check_watermarks)
+    full_sweep: bool = False  # check the whole tables now; also done every CHECK_FULL_SWEEP_HOURS
 
 
 # ===== JOB 1: CUSTOMER, ACCOUNT, DEVICE GENERATION =====
@@ -86,14 +101,36 @@ def generate_customers_accounts_devices(context, config: DataGenerationConfig) -
 
     dagster_logger.info("Initiating customer, account, and device data generation process.")
     file_logger.info("Initiating customer, account, and device data generation process.")
+
+    if config.num_workers > 1:
+        dagster_logger.info(f"Generating {config.num_customers} customers with {config.num_workers} workers.")
+        file_logger.info(f"Generating {config.num_customers} customers with {config.num_workers} workers.")
+        result = generate_customers_parallel(
+            config.num_workers,
+            num_customers=config.num_customers,
+            accounts_per_customer=config.num_accounts_per_customer,
+            devices_per_customer=config.num_devices_per_customer,
+            writer_backend=config.writer_backend
+        )
+        totals = result['totals']
+        dagster_logger.info(f"Parallel generation completed (seed {result['seed']}): {totals}")
+        file_logger.info(f"Parallel generation completed (seed {result['seed']}): {totals}")
+        return {
+            'customers_count': totals.get('customers', 0),
+            'accounts_count': totals.get('accounts', 0),
+            'devices_count': totals.get('devices', 0),
+            'timestamp': datetime.now().isoformat()
+        }
+
     session = Session()
+    writer = get_writer(config.writer_backend)
 
     try:
         dagster_logger.info(f"Attempting to generate {config.num_customers} customers.")
         file_logger.info(f"Attempting to generate {config.num_customers} customers.")
         with session.begin():
             # Generate customers
-            customers = populate_customers(session, num_customers=config.num_customers)
+            customers = populate_customers(session, num_customers=config.num_customers, writer=writer)
             dagster_logger.info(f"Successfully generated {len(customers)} customers.")
             file_logger.info(f"Successfully generated {len(customers)} customers.")
 
@@ -104,7 +141,8 @@ def generate_customers_accounts_devices(context, config: DataGenerationConfig) -
                 f"Generating bank accounts for {len(customers)} customers, {config.num_accounts_per_customer} per customer.")
             accounts = populate_bank_accounts(
                 session, customers,
-                num_accounts_per_customer=config.num_accounts_per_customer
+                num_accounts_per_customer=config.num_accounts_per_customer,
+                writer=writer
             )
             dagster_logger.info(f"Generated {len(accounts)} bank accounts.")
             file_logger.info(f"Generated {len(accounts)} bank accounts.")
@@ -116,7 +154,8 @@ def generate_customers_accounts_devices(context, config: DataGenerationConfig) -
                 f"Generating devices for {len(customers)} customers, {config.num_devices_per_customer} per customer.")
             devices = populate_devices(
                 session, customers,
-                num_devices_per_customer=config.num_devices_per_customer
+                num_devices_per_customer=config.num_devices_per_customer,
+                writer=writer
             )
             dagster_logger.info(f"Generated {len(devices)} devices.")
             file_logger.info(f"Generated {len(devices)} devices.")
@@ -174,20 +213,36 @@ def generate_payment_transactions(context, config: TransactionConfig) -> Dict[st
 
     dagster_logger.info("Initiating payment transaction and authentication log generation.")
     file_logger.info("Initiating payment transaction and authentication log generation.")
+
+    if config.num_workers > 1:
+        dagster_logger.info(f"Generating {config.num_transactions} transactions with {config.num_workers} workers.")
+        file_logger.info(f"Generating {config.num_transactions} transactions with {config.num_workers} workers.")
+        result = generate_transactions_parallel(
+            config.num_workers,
+            num_transactions=config.num_transactions,
+            writer_backend=config.writer_backend
+        )
+        totals = result['totals']
+        dagster_logger.info(f"Parallel generation completed (seed {result['seed']}): {totals}")
+        file_logger.info(f"Parallel generation completed (seed {result['seed']}): {totals}")
+        return {
+            'transactions_count': totals.get('transactions', 0),
+            'auth_logs_count': totals.get('auth_logs', 0),
+            'timestamp': datetime.now().isoformat()
+        }
+
     session = Session()
+    writer = get_writer(config.writer_backend)
 
     try:
         with session.begin():
-            from src.models import BankAccount, Device
-            accounts = [acc for acc in session.query(BankAccount).all()]  # Fetch as SQLAlchemy objects
-            # devices = [dev for dev in session.query(Device).all()] # Not directly used here
-
             # Generate payment transactions
             dagster_logger.info(f"Attempting to generate {config.num_transactions} payment transactions.")
             file_logger.info(f"Attempting to generate {config.num_transactions} payment transactions.")
             transactions = populate_payment_transactions(
                 session,
-                num_transactions=config.num_transactions
+                num_transactions=config.num_transactions,
+                writer=writer
             )
             dagster_logger.info(f"Successfully generated {len(transactions)} payment transactions.")
             file_logger.info(f"Successfully generated {len(transactions)} payment transactions.")
@@ -195,7 +250,7 @@ def generate_payment_transactions(context, config: TransactionConfig) -> Dict[st
             # Generate authentication logs
             dagster_logger.info(f"Generating authentication logs for {len(transactions)} transactions.")
             file_logger.info(f"Generating authentication logs for {len(transactions)} transactions.")
-            auth_logs = populate_authentication_logs(session, transactions, accounts)
+            auth_logs = populate_authentication_logs(session, transactions, writer=writer)
             dagster_logger.info(f"Generated {len(auth_logs)} authentication logs.")
             file_logger.info(f"Generated {len(auth_logs)} authentication logs.")
 
@@ -241,7 +296,7 @@ def transaction_generation_job():
 # ===== JOB 3: DATA QUALITY CHECKS AND MONITORING =====
 
 @op
-def run_data_quality_checks(context) -> Dict[str, Any]:
+def run_data_quality_checks(context, config: CheckConfig) -> Dict[str, Any]:
     """
     Run data quality checks.
     Logs the start/end of checks and a summary of issues found.
@@ -253,9 +308,12 @@ def run_data_quality_checks(context) -> Dict[str, Any]:
     file_logger.info("Initiating data quality checks.")
 
     try:
-        checker = DataQualityChecker()
+        checker = DataQualityChecker(incremental=config.incremental, full_sweep=config.full_sweep)
         checker.run_checks()
         issue_count = len(checker.issues)
+        for check_name, seconds in checker.check_seconds.items():
+            dagster_logger.info(f"Data quality check {check_name} took {seconds:.2f}s.")
+            file_logger.info(f"Data quality check {check_name} took {seconds:.2f}s.")
 
         if issue_count > 0:
             dagster_logger.warning(f"Data quality checks completed with {issue_count} issues found.")
@@ -277,6 +335,7 @@ def run_data_quality_checks(context) -> Dict[str, Any]:
                 metadata={
                     "issues_found": issue_count,
                     "check_time": MetadataValue.timestamp(datetime.now().timestamp()),
+                    "check_seconds": MetadataValue.json(checker.check_seconds),
                     "status": "passed" if issue_count == 0 else "issues_found"
                 }
             )
@@ -284,6 +343,7 @@ def run_data_quality_checks(context) -> Dict[str, Any]:
 
         return {
             'issues_count': issue_count,
+            'check_seconds': checker.check_seconds,
             'status': 'passed' if issue_count == 0 else 'issues_found',
             'timestamp': datetime.now().isoformat()
         }
@@ -297,7 +357,7 @@ def run_data_quality_checks(context) -> Dict[str, Any]:
 
 
 @op
-def run_risk_monitoring(context) -> Dict[str, Any]:
+def run_risk_monitoring(context, config: CheckConfig) -> Dict[str, Any]:
     """
     Run risk monitoring checks.
     Logs the start/end of checks and a summary of issues found.
@@ -309,9 +369,12 @@ def run_risk_monitoring(context) -> Dict[str, Any]:
     file_logger.info("Initiating risk monitoring checks.")
 
     try:
-        monitor = RiskMonitor()
+        monitor = RiskMonitor(incremental=config.incremental, full_sweep=config.full_sweep)
         monitor.run_checks()
         issue_count = len(monitor.issues)
+        for check_name, seconds in monitor.check_seconds.items():
+            dagster_logger.info(f"Risk monitoring check {check_name} took {seconds:.2f}s.")
+            file_logger.info(f"Risk monitoring check {check_name} took {seconds:.2f}s.")
 
         if issue_count > 0:
             dagster_logger.warning(f"Risk monitoring checks completed with {issue_count} issues found.")
@@ -332,6 +395,7 @@ def run_risk_monitoring(context) -> Dict[str, Any]:
                 metadata={
                     "issues_found": issue_count,
                     "check_time": MetadataValue.timestamp(datetime.now().timestamp()),
+                    "check_seconds": MetadataValue.json(monitor.check_seconds),
                     "status": "passed" if issue_count == 0 else "issues_found"
                 }
             )
@@ -339,6 +403,7 @@ def run_risk_monitoring(context) -> Dict[str, Any]:
 
         return {
             'issues_count': issue_count,
+            'check_seconds': monitor.check_seconds,
             'status': 'passed' if issue_count == 0 else 'issues_found',
             'timestamp': datetime.now().isoformat()
         }
@@ -354,11 +419,148 @@ def run_risk_monitoring(context) -> Dict[str, Any]:
 
 @job
 def quality_and_monitoring_job():
-    """Job to run data quality checks and risk monitoring."""
+    """
+    Job to run data quality checks and risk monitoring. The two ops are independent, so the default
+    multiprocess executor runs them side by side; each runs its checks concurrently (CHECK_PARALLELISM).
+    """
     quality_result = run_data_quality_checks()
     risk_result = run_risk_monitoring()
 
 
+@op
+def process_risk_alert_queue(context) -> Dict[str, Any]:
+    """
+    Drain the risk alert event queue (filled when timo.alert_mode = 'async').
+    Logs the number of processed events and created alerts.
+    """
+    dagster_logger = get_dagster_logger()
+    file_logger = setup_logger('RiskAlertQueue')
+
+    dagster_logger.info("Draining risk alert queue.")
+    file_logger.info("Draining risk alert queue.")
+
+    try:
+        totals = RiskAlertWorker().drain()
+        dagster_logger.info(f"Processed {totals['events']} queued transactions, created {totals['alerts']} alerts.")
+        file_logger.info(f"Processed {totals['events']} queued transactions, created {totals['alerts']} alerts.")
+
+        context.log_event(
+            AssetMaterialization(
+                asset_key="risk_alerts",
+                metadata={
+                    "events_processed": totals['events'],
+                    "alerts_created": totals['alerts'],
+                    "batches": totals['batches'],
+                    "processed_time": MetadataValue.timestamp(datetime.now().timestamp())
+                }
+            )
+        )
+
+        return {**totals, 'timestamp': datetime.now().isoformat()}
+
+    except Exception as e:
+        dagster_logger.error(f"Risk alert queue processing failed: {str(e)}")
+        file_logger.error(f"Risk alert queue processing failed: {str(e)}")
+        raise
+    finally:
+        file_logger.info("Risk alert queue operation finished.")
+
+
+@job
+def risk_alert_queue_job():
+    """Job to evaluate risk alert rules for transactions queued in async alert mode."""
+    process_risk_alert_queue()
+
+
+@op
+def maintain_partitions(context) -> Dict[str, Any]:
+    """
+    Create upcoming monthly partitions of payment_transactions and authentication_logs
+    and drop partitions outside the retention period (if PARTITION_RETENTION_MONTHS is set).
+    """
+    dagster_logger = get_dagster_logger()
+    file_logger = setup_logger('PartitionMaintenance')
+
+    dagster_logger.info("Starting partition maintenance.")
+    file_logger.info("Starting partition maintenance.")
+
+    try:
+        result = PartitionMaintenance().run()
+        created = sum(result['created'].values())
+        dropped = sum(len(names) for names in result['dropped'].values())
+        dagster_logger.info(f"Partition maintenance created {created} and dropped {dropped} partitions.")
+        file_logger.info(f"Partition maintenance created {created} and dropped {dropped} partitions: {result}")
+
+        context.log_event(
+            AssetMaterialization(
+                asset_key="table_partitions",
+                metadata={
+                    "partitions_created": created,
+                    "partitions_dropped": dropped,
+                    "maintenance_time": MetadataValue.timestamp(datetime.now().timestamp())
+                }
+            )
+        )
+
+        return {**result, 'timestamp': datetime.now().isoformat()}
+
+    except Exception as e:
+        dagster_logger.error(f"Partition maintenance failed: {str(e)}")
+        file_logger.error(f"Partition maintenance failed: {str(e)}")
+        raise
+    finally:
+        file_logger.info("Partition maintenance operation finished.")
+
+
+@job
+def partition_maintenance_job():
+    """Job to keep monthly partitions created ahead of time and apply retention."""
+    maintain_partitions()
+
+
+@op
+def rollup_daily_summaries(context) -> Dict[str, Any]:
+    """
+    Compact pending daily summary deltas (timo.summary_mode = 'delta') into daily_transaction_summaries.
+    """
+    dagster_logger = get_dagster_logger()
+    file_logger = setup_logger('SummaryRollup')
+
+    dagster_logger.info("Starting daily summary rollup.")
+    file_logger.info("Starting daily summary rollup.")
+
+    try:
+        totals = rollup_summary_deltas()
+        dagster_logger.info(f"Rolled up {totals['deltas']} summary deltas in {totals['batches']} batches.")
+        file_logger.info(f"Rolled up {totals['deltas']} summary deltas in {totals['batches']} batches.")
+
+        context.log_event(
+            AssetMaterialization(
+                asset_key="daily_transaction_summaries",
+                metadata={
+                    "deltas_rolled_up": totals['deltas'],
+                    "batches": totals['batches'],
+                    "rollup_time": MetadataValue.timestamp(datetime.now().timestamp())
+                }
+            )
+        )
+
+        return {**totals, 'timestamp': datetime.now().isoformat()}
+
+    except Exception as e:
+        dagster_logger.error(f"Daily summary rollup failed: {str(e)}")
+        file_logger.error(f"Daily summary rollup failed: {str(e)}")
+        raise
+    finally:
+        file_logger.info("Daily summary rollup operation finished.")
+
+
+@job
+def summary_rollup_job():
+    """Job to compact pending daily summary deltas."""
+    rollup_daily_summaries()
+
+
 # ===== SCHEDULES =====
 
 # Job 1: Customer data generation at 2h, 10h, 16h, 22h
@@ -382,16 +584,43 @@ quality_monitoring_schedule = ScheduleDefinition(
     default_status=DefaultScheduleStatus.RUNNING
 )
 
+# Job 4: Risk alert queue every 5 minutes
+risk_alert_queue_schedule = ScheduleDefinition(
+    job=risk_alert_queue_job,
+    cron_schedule="*/5 * * * *",  # Every 5 minutes
+    default_status=DefaultScheduleStatus.RUNNING
+)
+
+# Job 5: Partition maintenance daily at 1h
+partition_maintenance_schedule = ScheduleDefinition(
+    job=partition_maintenance_job,
+    cron_schedule="0 1 * * *",  # Every day at 1:00
+    default_status=DefaultScheduleStatus.RUNNING
+)
+
+# Job 6: Daily summary rollup every 10 minutes
+summary_rollup_schedule = ScheduleDefinition(
+    job=summary_rollup_job,
+    cron_schedule="*/10 * * * *",  # Every 10 minutes
+    default_status=DefaultScheduleStatus.RUNNING
+)
+
 # Define all definitions for Dagster
 defs = Definitions(
     jobs=[
         customer_data_generation_job,
         transaction_generation_job,
-        quality_and_monitoring_job
+        quality_and_monitoring_job,
+        risk_alert_queue_job,
+        partition_maintenance_job,
+        summary_rollup_job
     ],
     schedules=[
         customer_data_schedule,
         transaction_data_schedule,
-        quality_monitoring_schedule
+        quality_monitoring_schedule,
+        risk_alert_queue_schedule,
+        partition_maintenance_schedule,
+        summary_rollup_schedule
     ]
 )
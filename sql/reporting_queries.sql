@@ -52,9 +52,10 @@ SELECT
     COUNT(pt.transaction_id) FILTER (WHERE pt.status = 'failed') AS failed_transactions
 FROM 
     customers c
-    JOIN daily_transaction_summaries dts ON c.customer_id = dts.customer_id
+    JOIN daily_transaction_summaries_current dts ON c.customer_id = dts.customer_id
     JOIN payment_transactions pt ON dts.account_id = pt.from_account_id 
-        AND dts.transaction_date = pt.transaction_date::DATE
+        AND pt.transaction_date >= dts.transaction_date
+        AND pt.transaction_date < dts.transaction_date + 1
 WHERE 
     dts.transaction_date BETWEEN CURRENT_DATE - INTERVAL '30 days' AND CURRENT_DATE
 GROUP BY 
@@ -214,7 +215,7 @@ SELECT
         ELSE 'Within Limit'
     END AS limit_status
 FROM 
-    daily_transaction_summaries dts
+    daily_transaction_summaries_current dts
     JOIN customers c ON dts.customer_id = c.customer_id
     JOIN bank_accounts ba ON dts.account_id = ba.account_id
 WHERE 
@@ -124,13 +124,55 @@ CREATE TABLE daily_transaction_summaries (
 CREATE INDEX daily_transaction_summaries_account_id_transaction_date_index ON daily_transaction_summaries (account_id, transaction_date);
 CREATE INDEX daily_transaction_summaries_total_amount_index ON daily_transaction_summaries (total_amount);
 
--- Payment transactions table
+-- Pending summary deltas (timo.summary_mode = 'delta'), compacted by rollup_daily_summary_deltas()
+CREATE TABLE daily_transaction_summary_deltas (
+    delta_id BIGSERIAL PRIMARY KEY,
+    account_id BIGINT NOT NULL,
+    customer_id BIGINT NOT NULL,
+    transaction_date DATE NOT NULL,
+    total_amount DECIMAL(15,2) NOT NULL DEFAULT 0.00,
+    category_a_amount DECIMAL(15,2) NOT NULL DEFAULT 0.00,
+    category_b_amount DECIMAL(15,2) NOT NULL DEFAULT 0.00,
+    category_c_amount DECIMAL(15,2) NOT NULL DEFAULT 0.00,
+    category_d_amount DECIMAL(15,2) NOT NULL DEFAULT 0.00,
+    strong_auth_used BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX daily_transaction_summary_deltas_customer_id_date_index ON daily_transaction_summary_deltas (customer_id, transaction_date);
+CREATE INDEX daily_transaction_summary_deltas_account_id_date_index ON daily_transaction_summary_deltas (account_id, transaction_date);
+
+-- Exact daily summaries: compacted rows plus pending deltas (summary_id is NULL until the first rollup)
+CREATE VIEW daily_transaction_summaries_current AS
+SELECT
+    MAX(summary_id) AS summary_id,
+    account_id, customer_id, transaction_date,
+    SUM(total_amount) AS total_amount,
+    SUM(category_a_amount) AS category_a_amount,
+    SUM(category_b_amount) AS category_b_amount,
+    SUM(category_c_amount) AS category_c_amount,
+    SUM(category_d_amount) AS category_d_amount,
+    BOOL_OR(strong_auth_used) AS strong_auth_used
+FROM (
+    SELECT summary_id, account_id, customer_id, transaction_date, total_amount, category_a_amount,
+           category_b_amount, category_c_amount, category_d_amount, strong_auth_used
+    FROM daily_transaction_summaries
+    UNION ALL
+    SELECT NULL, account_id, customer_id, transaction_date, total_amount, category_a_amount,
+           category_b_amount, category_c_amount, category_d_amount, strong_auth_used
+    FROM daily_transaction_summary_deltas
+) summaries
+GROUP BY account_id, customer_id, transaction_date;
+
+-- Payment transactions table, partitioned by month of transaction_date (see create_monthly_partitions)
 CREATE TABLE payment_transactions (
-    transaction_id BIGSERIAL PRIMARY KEY,
+    transaction_id BIGSERIAL NOT NULL,
     from_account_id BIGINT NOT NULL,
     to_account_internal_id BIGINT,
     to_account_external_id BIGINT,
     customer_id BIGINT NOT NULL,
+    -- Denormalized from customers by classify_transaction, so segment filters need no join
+    customer_type VARCHAR(20) NOT NULL CHECK (customer_type IN ('individual', 'organization')),
     transaction_type VARCHAR(50) NOT NULL CHECK (transaction_type IN (
         'transfer_same_bank_same_owner', 'transfer_same_bank_diff_owner',
         'transfer_interbank_domestic', 'transfer_interbank_international',
@@ -146,34 +188,93 @@ CREATE TABLE payment_transactions (
     is_suspicious BOOLEAN NOT NULL DEFAULT FALSE,
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
 
+    -- The partition key must be part of the primary key
+    PRIMARY KEY (transaction_id, transaction_date),
+
     -- FOREIGN KEYS
     FOREIGN KEY (from_account_id) REFERENCES bank_accounts(account_id),
     FOREIGN KEY (to_account_internal_id) REFERENCES bank_accounts(account_id),
     FOREIGN KEY (to_account_external_id) REFERENCES other_banks_accounts(account_id),
     FOREIGN KEY (customer_id) REFERENCES customers(customer_id),
     FOREIGN KEY (device_id) REFERENCES devices(device_id)
-);
+) PARTITION BY RANGE (transaction_date);
+
+CREATE TABLE payment_transactions_default PARTITION OF payment_transactions DEFAULT;
 
 CREATE INDEX payment_transactions_transaction_date_index ON payment_transactions (transaction_date);
 CREATE INDEX payment_transactions_amount_index ON payment_transactions (amount);
 CREATE INDEX payment_transactions_transaction_type_index ON payment_transactions (transaction_type);
 CREATE INDEX payment_transactions_status_index ON payment_transactions (status);
 CREATE INDEX payment_transactions_from_account_id_index ON payment_transactions (from_account_id, transaction_date);
+CREATE INDEX payment_transactions_customer_id_index ON payment_transactions (customer_id, transaction_date);
+CREATE INDEX payment_transactions_customer_type_index ON payment_transactions (customer_type, transaction_date);
+CREATE INDEX payment_transactions_customer_type_transaction_type_index ON payment_transactions (customer_type, transaction_type, transaction_date);
+
+-- One row per payment transaction ID, kept by trigger_payment_transaction_keys_* on every load path.
+-- The primary key of payment_transactions has to include its partition key, so this table keeps
+-- transaction_id unique across partitions and is what authentication_logs and risk_alerts reference.
+CREATE TABLE payment_transaction_keys (
+    transaction_id BIGINT PRIMARY KEY
+);
+
+-- Staging table for set-based bulk loads of payment transactions (see process_staged_transactions)
+CREATE UNLOGGED TABLE payment_transactions_staging (
+    batch_id BIGINT NOT NULL,
+    transaction_id BIGINT NOT NULL DEFAULT nextval('payment_transactions_transaction_id_seq'),
+    from_account_id BIGINT NOT NULL,
+    to_account_internal_id BIGINT,
+    to_account_external_id BIGINT,
+    customer_id BIGINT NOT NULL,
+    transaction_type VARCHAR(50) NOT NULL,
+    amount DECIMAL(15,2) NOT NULL,
+    security_level VARCHAR(1) NOT NULL DEFAULT 'A',
+    description VARCHAR(500) NOT NULL,
+    transaction_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    device_id BIGINT NOT NULL,
+    is_suspicious BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
 
--- Authentication logs table
+CREATE SEQUENCE payment_transactions_staging_batch_id_seq;
+CREATE INDEX payment_transactions_staging_batch_id_index ON payment_transactions_staging (batch_id);
+
+-- Per-customer-day running state used by classify_transaction and the daily alert rules
+CREATE TABLE customer_daily_state (
+    customer_id BIGINT NOT NULL,
+    day DATE NOT NULL,
+    daily_total DECIMAL(15,2) NOT NULL DEFAULT 0.00,
+    ab_total DECIMAL(15,2) NOT NULL DEFAULT 0.00,
+    has_strong_auth BOOLEAN NOT NULL DEFAULT FALSE,
+    high_value_count INTEGER NOT NULL DEFAULT 0,
+    intl_transfer_count INTEGER NOT NULL DEFAULT 0,
+    payment_count INTEGER NOT NULL DEFAULT 0,
+    auth_failure_count INTEGER NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (customer_id, day),
+    FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
+);
+
+-- Authentication logs table, partitioned by month of auth_timestamp
 CREATE TABLE authentication_logs (
-    log_id BIGSERIAL PRIMARY KEY,
+    log_id BIGSERIAL NOT NULL,
     transaction_id BIGINT NOT NULL,
     auth_method_id SMALLINT NOT NULL,
     auth_result VARCHAR(20) NOT NULL CHECK (auth_result IN ('success', 'failed', 'expired', 'cancelled')),
     auth_timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     failure_reason VARCHAR(200) NOT NULL,
 
-    FOREIGN KEY (transaction_id) REFERENCES payment_transactions(transaction_id) ON DELETE NO ACTION ON UPDATE NO ACTION,
+    PRIMARY KEY (log_id, auth_timestamp),
+
+    -- Deferred: submit_transactions writes the logs before their transactions
+    FOREIGN KEY (transaction_id) REFERENCES payment_transaction_keys(transaction_id) DEFERRABLE INITIALLY DEFERRED,
     FOREIGN KEY (auth_method_id) REFERENCES authentication_methods(auth_id) ON DELETE NO ACTION ON UPDATE NO ACTION
-);
+) PARTITION BY RANGE (auth_timestamp);
+
+CREATE TABLE authentication_logs_default PARTITION OF authentication_logs DEFAULT;
 
 CREATE INDEX authentication_logs_auth_result_index ON authentication_logs (auth_result);
+CREATE INDEX authentication_logs_transaction_id_index ON authentication_logs (transaction_id);
 
 -- Risk alerts table
 CREATE TABLE risk_alerts (
@@ -190,12 +291,207 @@ CREATE TABLE risk_alerts (
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     resolved_at TIMESTAMP,
 
-    FOREIGN KEY (transaction_id) REFERENCES payment_transactions(transaction_id) ON DELETE NO ACTION ON UPDATE NO ACTION
+    -- Deferred: the row triggers raise alerts before the statement-level trigger registers the key
+    FOREIGN KEY (transaction_id) REFERENCES payment_transaction_keys(transaction_id) DEFERRABLE INITIALLY DEFERRED
 );
 
 CREATE INDEX risk_alerts_transaction_id_index ON risk_alerts (transaction_id);
 CREATE INDEX risk_alerts_alert_type_index ON risk_alerts (alert_type);
 
+-- Risk alert event queue (timo.alert_mode = 'async'), drained by src/risk_alert_worker.py
+CREATE TABLE risk_alert_events (
+    event_id BIGSERIAL PRIMARY KEY,
+    transaction_id BIGINT NOT NULL,
+    -- What the alert rules read, as of the insert: the device trust, the transaction's own authentication
+    -- and its customer-day state from customer_daily_state
+    is_trusted BOOLEAN NOT NULL,
+    has_strong_auth BOOLEAN NOT NULL,
+    auth_failure_count INTEGER NOT NULL,
+    daily_total DECIMAL(15,2) NOT NULL,
+    day_strong_auth BOOLEAN NOT NULL,
+    day_failure_count INTEGER NOT NULL,
+    high_value_count INTEGER NOT NULL,
+    intl_transfer_count INTEGER NOT NULL,
+    payment_count INTEGER NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Generation checkpoints table (streaming generator progress, committed with each chunk)
+CREATE TABLE generation_checkpoints (
+    run_id VARCHAR(100) NOT NULL,
+    stage VARCHAR(50) NOT NULL CHECK (stage IN ('customers', 'transactions')),
+    rows_done BIGINT NOT NULL DEFAULT 0,
+    rows_written BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (run_id, stage)
+);
+
+-- High-water marks of the incremental data quality and risk checks (src/check_watermarks.py)
+CREATE TABLE check_watermarks (
+    check_name VARCHAR(100) NOT NULL,
+    table_name VARCHAR(100) NOT NULL,
+    high_water VARCHAR(64),
+    pending_ids JSONB NOT NULL DEFAULT '[]',
+    modification_count BIGINT NOT NULL DEFAULT 0,
+    full_sweep_at TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (check_name, table_name)
+);
+
+-- Stamp updated_at on every update, so the incremental checks watermarked on it see changed rows.
+-- clock_timestamp() is never earlier than the start of the writing transaction.
+CREATE OR REPLACE FUNCTION set_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at := clock_timestamp();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_set_updated_at
+BEFORE UPDATE ON customers
+FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+CREATE TRIGGER trigger_set_updated_at
+BEFORE UPDATE ON bank_accounts
+FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+CREATE TRIGGER trigger_set_updated_at
+BEFORE UPDATE ON other_banks_accounts
+FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+CREATE TRIGGER trigger_set_updated_at
+BEFORE UPDATE ON daily_transaction_summaries
+FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+-- Keep payment_transaction_keys in step with payment_transactions, one statement at a time. These run
+-- in timo.bulk_mode too; moving a row to another partition is an update and leaves its key alone.
+CREATE OR REPLACE FUNCTION insert_payment_transaction_keys()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO payment_transaction_keys (transaction_id)
+    SELECT n.transaction_id FROM new_rows n;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION delete_payment_transaction_keys()
+RETURNS TRIGGER AS $$
+BEGIN
+    DELETE FROM payment_transaction_keys k
+    USING old_rows o
+    WHERE k.transaction_id = o.transaction_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION update_payment_transaction_keys()
+RETURNS TRIGGER AS $$
+DECLARE
+    duplicate BIGINT;
+BEGIN
+    -- IDs the statement gave to several rows would collapse into one key below
+    SELECT n.transaction_id INTO duplicate
+    FROM new_rows n
+    GROUP BY n.transaction_id
+    HAVING COUNT(*) > 1
+    LIMIT 1;
+    IF FOUND THEN
+        RAISE EXCEPTION 'Duplicate transaction_id %', duplicate USING ERRCODE = 'unique_violation';
+    END IF;
+
+    DELETE FROM payment_transaction_keys k
+    USING old_rows o
+    WHERE k.transaction_id = o.transaction_id
+    AND NOT EXISTS (SELECT 1 FROM new_rows n WHERE n.transaction_id = o.transaction_id);
+
+    INSERT INTO payment_transaction_keys (transaction_id)
+    SELECT n.transaction_id
+    FROM new_rows n
+    WHERE NOT EXISTS (SELECT 1 FROM old_rows o WHERE o.transaction_id = n.transaction_id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_payment_transaction_keys_insert
+AFTER INSERT ON payment_transactions
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION insert_payment_transaction_keys();
+
+CREATE TRIGGER trigger_payment_transaction_keys_delete
+AFTER DELETE ON payment_transactions
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION delete_payment_transaction_keys();
+
+CREATE TRIGGER trigger_payment_transaction_keys_update
+AFTER UPDATE ON payment_transactions
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION update_payment_transaction_keys();
+
+-- Create monthly range partitions <parent>_pYYYYMM for p_months months from the month of p_start (existing ones are skipped).
+-- Rows of a new month already in the default partition (e.g. after maintenance fell behind) are moved into it:
+-- the default partition is detached, the month is filled as a plain table and attached, and the default re-attached.
+-- Rows are moved without firing the row triggers, they were applied when the rows were first inserted.
+CREATE OR REPLACE FUNCTION create_monthly_partitions(p_parent TEXT, p_start DATE, p_months INTEGER)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE;
+    month_end DATE;
+    partition_name TEXT;
+    default_partition TEXT;
+    partition_key TEXT;
+    has_rows BOOLEAN;
+    created_count INTEGER := 0;
+BEGIN
+    SELECT NULLIF(pt.partdefid, 0)::regclass::TEXT, a.attname
+    INTO default_partition, partition_key
+    FROM pg_partitioned_table pt
+    JOIN pg_attribute a ON a.attrelid = pt.partrelid AND a.attnum = pt.partattrs[0]
+    WHERE pt.partrelid = p_parent::regclass;
+
+    FOR i IN 0..p_months - 1 LOOP
+        month_start := (date_trunc('month', p_start) + make_interval(months => i))::DATE;
+        month_end := (month_start + INTERVAL '1 month')::DATE;
+        partition_name := format('%s_p%s', p_parent, to_char(month_start, 'YYYYMM'));
+        IF to_regclass(partition_name) IS NOT NULL THEN
+            CONTINUE;
+        END IF;
+
+        has_rows := FALSE;
+        IF default_partition IS NOT NULL THEN
+            EXECUTE format('SELECT EXISTS (SELECT 1 FROM %s WHERE %I >= %L AND %I < %L)',
+                           default_partition, partition_key, month_start, partition_key, month_end)
+            INTO has_rows;
+        END IF;
+
+        IF has_rows THEN
+            EXECUTE format('ALTER TABLE %I DETACH PARTITION %s', p_parent, default_partition);
+            EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', partition_name, p_parent);
+            EXECUTE format('INSERT INTO %I SELECT * FROM %s WHERE %I >= %L AND %I < %L',
+                           partition_name, default_partition, partition_key, month_start, partition_key, month_end);
+            EXECUTE format('DELETE FROM %s WHERE %I >= %L AND %I < %L',
+                           default_partition, partition_key, month_start, partition_key, month_end);
+            EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                           p_parent, partition_name, month_start, month_end);
+            EXECUTE format('ALTER TABLE %I ATTACH PARTITION %s DEFAULT', p_parent, default_partition);
+        ELSE
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                partition_name, p_parent, month_start, month_end
+            );
+        END IF;
+        created_count := created_count + 1;
+    END LOOP;
+    RETURN created_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Initial partitions: previous month to three months ahead (src/partition_maintenance.py keeps creating new ones)
+SELECT create_monthly_partitions('payment_transactions', (CURRENT_DATE - INTERVAL '1 month')::DATE, 5);
+SELECT create_monthly_partitions('authentication_logs', (CURRENT_DATE - INTERVAL '1 month')::DATE, 5);
+
 -- Insert sample banks (expanded Vietnamese banks + international)
 INSERT INTO banks (bank_code, bank_name, is_domestic) VALUES
 ('VCB', 'Vietcombank', TRUE),
@@ -226,128 +522,190 @@ INSERT INTO authentication_methods (auth_id, method_type, method_name, security_
 (13, 'pin_code', 'PIN Code', 'A', 'Personal Identification Number used for authentication');
 
 
--- Trigger to enforce transaction classification based on 2345/QĐ-NHNN
-CREATE OR REPLACE FUNCTION classify_transaction()
-RETURNS TRIGGER AS $$
+-- Security level rules of 2345/QĐ-NHNN, shared by the row-level trigger and the set-based batch path
+CREATE OR REPLACE FUNCTION classify_security_level(
+    p_customer_type VARCHAR,
+    p_transaction_type VARCHAR,
+    p_amount DECIMAL,
+    p_daily_total DECIMAL,
+    p_tksth DECIMAL,
+    p_current_level VARCHAR
+)
+RETURNS VARCHAR AS $$
 DECLARE
-    customer_type VARCHAR(20);
-    daily_total DECIMAL(15,2);
-    tksth DECIMAL(15,2);
-    has_strong_auth BOOLEAN;
+    result_level VARCHAR(1) := p_current_level;
 BEGIN
-    -- Get customer type
-    SELECT c.customer_type INTO customer_type
-    FROM customers c
-    WHERE c.customer_id = NEW.customer_id;
-
-    IF customer_type IS NULL THEN
-        RAISE EXCEPTION 'Cannot determine customer type for customer_id %', NEW.customer_id;
-    END IF;
-
-    -- Check for strong authentication (C or D) in the same day
-    SELECT EXISTS (
-        SELECT 1
-        FROM payment_transactions pt
-        JOIN authentication_logs al ON pt.transaction_id = al.transaction_id
-        JOIN authentication_methods am ON al.auth_method_id = am.auth_id
-        WHERE pt.customer_id = NEW.customer_id
-        AND pt.transaction_date::DATE = NEW.transaction_date::DATE
-        AND pt.transaction_id != NEW.transaction_id
-        AND am.security_level IN ('C', 'D')
-        AND al.auth_result = 'success'
-    ) INTO has_strong_auth;
-
-    -- Calculate daily total (G + T) and Tksth (A + B transactions)
-    SELECT COALESCE(SUM(t.amount), 0) INTO daily_total
-    FROM payment_transactions t
-    WHERE t.customer_id = NEW.customer_id
-    AND t.transaction_date::DATE = NEW.transaction_date::DATE
-    AND t.transaction_id != NEW.transaction_id;
-
-    SELECT COALESCE(SUM(t.amount), 0) INTO tksth
-    FROM payment_transactions t
-    WHERE t.customer_id = NEW.customer_id
-    AND t.transaction_date::DATE = NEW.transaction_date::DATE
-    AND t.transaction_id != NEW.transaction_id
-    AND t.security_level IN ('A', 'B');
-
-    IF has_strong_auth THEN
-        tksth := 0; -- Reset Tksth after C or D transaction
-    END IF;
-
     -- Individual customers
-    IF customer_type = 'individual' THEN
+    IF p_customer_type = 'individual' THEN
         -- Group I.1: Inquiry and same-bank same-owner transfers
-        IF NEW.transaction_type IN ('inquiry', 'transfer_same_bank_same_owner') THEN
-            NEW.security_level = 'A';
+        IF p_transaction_type IN ('inquiry', 'transfer_same_bank_same_owner') THEN
+            result_level := 'A';
 
         -- Group I.2: Payment for goods and services
-        ELSIF NEW.transaction_type = 'payment_goods_services' THEN
-            IF NEW.amount + daily_total <= 5000000 THEN
-                NEW.security_level = 'A';
-            ELSIF NEW.amount + daily_total <= 100000000 THEN
-                NEW.security_level = 'B';
-            ELSIF NEW.amount + daily_total <= 1500000000 THEN
-                NEW.security_level = 'C';
+        ELSIF p_transaction_type = 'payment_goods_services' THEN
+            IF p_amount + p_daily_total <= 5000000 THEN
+                result_level := 'A';
+            ELSIF p_amount + p_daily_total <= 100000000 THEN
+                result_level := 'B';
+            ELSIF p_amount + p_daily_total <= 1500000000 THEN
+                result_level := 'C';
             ELSE
-                NEW.security_level = 'D';
+                result_level := 'D';
             END IF;
 
         -- Group I.3: Other domestic transfers and e-wallet operations
-        ELSIF NEW.transaction_type IN ('transfer_same_bank_diff_owner', 'transfer_interbank_domestic',
+        ELSIF p_transaction_type IN ('transfer_same_bank_diff_owner', 'transfer_interbank_domestic',
                                       'ewallet_transfer', 'ewallet_topup', 'ewallet_withdrawal') THEN
-            IF NEW.amount <= 10000000 AND NEW.amount + tksth <= 20000000 THEN
-                NEW.security_level = 'B';
-            ELSIF (NEW.amount <= 10000000 AND NEW.amount + tksth > 20000000 AND NEW.amount + daily_total <= 1500000000) OR
-                  (NEW.amount > 10000000 AND NEW.amount <= 500000000 AND NEW.amount + daily_total <= 1500000000) THEN
-                NEW.security_level = 'C';
-            ELSIF (NEW.amount <= 10000000 AND NEW.amount + daily_total > 1500000000) OR
-                  (NEW.amount > 10000000 AND NEW.amount <= 500000000 AND NEW.amount + daily_total > 1500000000) OR
-                  (NEW.amount > 500000000) THEN
-                NEW.security_level = 'D';
+            IF p_amount <= 10000000 AND p_amount + p_tksth <= 20000000 THEN
+                result_level := 'B';
+            ELSIF (p_amount <= 10000000 AND p_amount + p_tksth > 20000000 AND p_amount + p_daily_total <= 1500000000) OR
+                  (p_amount > 10000000 AND p_amount <= 500000000 AND p_amount + p_daily_total <= 1500000000) THEN
+                result_level := 'C';
+            ELSIF (p_amount <= 10000000 AND p_amount + p_daily_total > 1500000000) OR
+                  (p_amount > 10000000 AND p_amount <= 500000000 AND p_amount + p_daily_total > 1500000000) OR
+                  (p_amount > 500000000) THEN
+                result_level := 'D';
             END IF;
 
         -- Group I.4: International transfers
-        ELSIF NEW.transaction_type = 'transfer_interbank_international' THEN
-            IF NEW.amount <= 200000000 AND NEW.amount + daily_total <= 1000000000 THEN
-                NEW.security_level = 'B';
+        ELSIF p_transaction_type = 'transfer_interbank_international' THEN
+            IF p_amount <= 200000000 AND p_amount + p_daily_total <= 1000000000 THEN
+                result_level := 'B';
             ELSE
-                NEW.security_level = 'C';
+                result_level := 'C';
             END IF;
 
         END IF;
 
     -- Organizational customers
-    ELSIF customer_type = 'organization' THEN
+    ELSIF p_customer_type = 'organization' THEN
         -- Group II.1: Inquiry
-        IF NEW.transaction_type = 'inquiry' THEN
-            NEW.security_level = 'A';
+        IF p_transaction_type = 'inquiry' THEN
+            result_level := 'A';
 
         -- Group II.2: Same-bank same-owner transfers
-        ELSIF NEW.transaction_type = 'transfer_same_bank_same_owner' THEN
-            NEW.security_level = 'A';
+        ELSIF p_transaction_type = 'transfer_same_bank_same_owner' THEN
+            result_level := 'A';
 
         -- Group II.3: Other domestic transfers, payments, and e-wallet operations
-        ELSIF NEW.transaction_type IN ('transfer_same_bank_diff_owner', 'transfer_interbank_domestic',
+        ELSIF p_transaction_type IN ('transfer_same_bank_diff_owner', 'transfer_interbank_domestic',
                                       'payment_goods_services', 'ewallet_transfer', 'ewallet_topup',
                                       'ewallet_withdrawal') THEN
-            IF NEW.amount <= 1000000000 AND NEW.amount + daily_total <= 10000000000 THEN
-                NEW.security_level = 'B';
+            IF p_amount <= 1000000000 AND p_amount + p_daily_total <= 10000000000 THEN
+                result_level := 'B';
             ELSE
-                NEW.security_level = 'C';
+                result_level := 'C';
             END IF;
 
         -- Group II.4: International transfers
-        ELSIF NEW.transaction_type = 'transfer_interbank_international' THEN
-            IF NEW.amount <= 500000000 AND NEW.amount + daily_total <= 5000000000 THEN
-                NEW.security_level = 'B';
+        ELSIF p_transaction_type = 'transfer_interbank_international' THEN
+            IF p_amount <= 500000000 AND p_amount + p_daily_total <= 5000000000 THEN
+                result_level := 'B';
             ELSE
-                NEW.security_level = 'C';
+                result_level := 'C';
             END IF;
 
         END IF;
     END IF;
 
+    RETURN result_level;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+-- Lookups of the row triggers, as SQL functions the planner inlines into the calling statement
+-- (tests/test_query_plans.py checks their plans).
+-- Strong authentication (successful C or D) and failed attempts among a transaction's authentication logs
+CREATE OR REPLACE FUNCTION transaction_auth_summary(p_transaction_id BIGINT)
+RETURNS TABLE (has_strong_auth BOOLEAN, failure_count INTEGER) AS $$
+    SELECT COALESCE(BOOL_OR(am.security_level IN ('C', 'D') AND al.auth_result = 'success'), FALSE),
+           CAST(COUNT(*) FILTER (WHERE al.auth_result = 'failed') AS INTEGER)
+    FROM authentication_logs al
+    JOIN authentication_methods am ON al.auth_method_id = am.auth_id
+    WHERE al.transaction_id = p_transaction_id;
+$$ LANGUAGE sql STABLE;
+
+-- Customer and day of a transaction
+CREATE OR REPLACE FUNCTION transaction_customer_day(p_transaction_id BIGINT)
+RETURNS TABLE (customer_id BIGINT, day DATE) AS $$
+    SELECT pt.customer_id, pt.transaction_date::DATE
+    FROM payment_transactions pt
+    WHERE pt.transaction_id = p_transaction_id;
+$$ LANGUAGE sql STABLE;
+
+-- State row of a customer-day
+CREATE OR REPLACE FUNCTION customer_day_state(p_customer_id BIGINT, p_day DATE)
+RETURNS SETOF customer_daily_state AS $$
+    SELECT *
+    FROM customer_daily_state s
+    WHERE s.customer_id = p_customer_id
+    AND s.day = p_day;
+$$ LANGUAGE sql STABLE;
+
+-- Trigger to enforce transaction classification based on 2345/QĐ-NHNN
+CREATE OR REPLACE FUNCTION classify_transaction()
+RETURNS TRIGGER AS $$
+DECLARE
+    customer_type VARCHAR(20);
+    daily_total DECIMAL(15,2);
+    tksth DECIMAL(15,2);
+    has_strong_auth BOOLEAN;
+    own_failure_count INTEGER;
+    own_strong_auth BOOLEAN;
+BEGIN
+    -- Rows inserted by process_staged_transactions are classified set-based
+    IF current_setting('timo.bulk_mode', true) = 'on' THEN
+        RETURN NEW;
+    END IF;
+
+    -- Get customer type
+    SELECT c.customer_type INTO customer_type
+    FROM customers c
+    WHERE c.customer_id = NEW.customer_id;
+
+    IF customer_type IS NULL THEN
+        RAISE EXCEPTION 'Cannot determine customer type for customer_id %', NEW.customer_id;
+    END IF;
+    NEW.customer_type := customer_type;
+
+    -- Daily total (G + T), Tksth (A + B transactions) and strong authentication (C or D) in the same day,
+    -- read from the maintained per-customer-day state row. The row lock serializes concurrent inserts
+    -- for the same customer and day, so each one sees the totals of those committed before it.
+    INSERT INTO customer_daily_state (customer_id, day)
+    VALUES (NEW.customer_id, NEW.transaction_date::DATE)
+    ON CONFLICT (customer_id, day) DO NOTHING;
+
+    SELECT s.daily_total, s.ab_total, s.has_strong_auth
+    INTO daily_total, tksth, has_strong_auth
+    FROM customer_daily_state s
+    WHERE s.customer_id = NEW.customer_id
+    AND s.day = NEW.transaction_date::DATE
+    FOR UPDATE;
+
+    IF has_strong_auth THEN
+        tksth := 0; -- Reset Tksth after C or D transaction
+    END IF;
+
+    NEW.security_level := classify_security_level(
+        customer_type, NEW.transaction_type, NEW.amount, daily_total, tksth, NEW.security_level
+    );
+
+    -- Authentication attempts written before the transaction (submit_transactions) were not counted by
+    -- mark_customer_daily_strong_auth; they apply from this transaction on, not to its own classification
+    SELECT a.failure_count, a.has_strong_auth
+    INTO own_failure_count, own_strong_auth
+    FROM transaction_auth_summary(NEW.transaction_id) a;
+
+    UPDATE customer_daily_state s
+    SET daily_total = s.daily_total + NEW.amount,
+        ab_total = s.ab_total + CASE WHEN NEW.security_level IN ('A', 'B') THEN NEW.amount ELSE 0 END,
+        has_strong_auth = s.has_strong_auth OR own_strong_auth,
+        high_value_count = s.high_value_count + CASE WHEN NEW.amount > 100000000 THEN 1 ELSE 0 END,
+        intl_transfer_count = s.intl_transfer_count + CASE WHEN NEW.transaction_type = 'transfer_interbank_international' THEN 1 ELSE 0 END,
+        payment_count = s.payment_count + CASE WHEN NEW.transaction_type = 'payment_goods_services' THEN 1 ELSE 0 END,
+        auth_failure_count = s.auth_failure_count + own_failure_count
+    WHERE s.customer_id = NEW.customer_id
+    AND s.day = NEW.transaction_date::DATE;
+
     RETURN NEW;
 END;
 $$ LANGUAGE plpgsql;
@@ -356,6 +714,273 @@ CREATE TRIGGER trigger_classify_transaction
 BEFORE INSERT ON payment_transactions
 FOR EACH ROW EXECUTE FUNCTION classify_transaction();
 
+-- Keep payment_transactions.customer_type in step with customers
+CREATE OR REPLACE FUNCTION sync_transaction_customer_type()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'customers' THEN
+        UPDATE payment_transactions
+        SET customer_type = NEW.customer_type
+        WHERE customer_id = NEW.customer_id;
+        RETURN NULL;
+    END IF;
+
+    SELECT c.customer_type INTO NEW.customer_type
+    FROM customers c
+    WHERE c.customer_id = NEW.customer_id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_sync_customer_type_on_customer
+AFTER UPDATE OF customer_type ON customers
+FOR EACH ROW WHEN (OLD.customer_type IS DISTINCT FROM NEW.customer_type)
+EXECUTE FUNCTION sync_transaction_customer_type();
+
+CREATE TRIGGER trigger_sync_customer_type_on_transaction
+BEFORE UPDATE OF customer_id ON payment_transactions
+FOR EACH ROW WHEN (OLD.customer_id IS DISTINCT FROM NEW.customer_id)
+EXECUTE FUNCTION sync_transaction_customer_type();
+
+-- Keep customer_daily_state in step when transactions are updated or deleted
+CREATE OR REPLACE FUNCTION adjust_customer_daily_state()
+RETURNS TRIGGER AS $$
+DECLARE
+    failure_count INTEGER;
+BEGIN
+    -- Authentication failures follow their transaction's customer-day
+    SELECT a.failure_count INTO failure_count
+    FROM transaction_auth_summary(OLD.transaction_id) a;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE customer_daily_state
+        SET daily_total = daily_total - OLD.amount,
+            ab_total = ab_total - CASE WHEN OLD.security_level IN ('A', 'B') THEN OLD.amount ELSE 0 END,
+            high_value_count = high_value_count - CASE WHEN OLD.amount > 100000000 THEN 1 ELSE 0 END,
+            intl_transfer_count = intl_transfer_count - CASE WHEN OLD.transaction_type = 'transfer_interbank_international' THEN 1 ELSE 0 END,
+            payment_count = payment_count - CASE WHEN OLD.transaction_type = 'payment_goods_services' THEN 1 ELSE 0 END,
+            auth_failure_count = auth_failure_count - failure_count
+        WHERE customer_id = OLD.customer_id
+        AND day = OLD.transaction_date::DATE;
+    END IF;
+
+    IF TG_OP = 'UPDATE' THEN
+        INSERT INTO customer_daily_state (customer_id, day)
+        VALUES (NEW.customer_id, NEW.transaction_date::DATE)
+        ON CONFLICT (customer_id, day) DO NOTHING;
+
+        UPDATE customer_daily_state
+        SET daily_total = daily_total + NEW.amount,
+            ab_total = ab_total + CASE WHEN NEW.security_level IN ('A', 'B') THEN NEW.amount ELSE 0 END,
+            high_value_count = high_value_count + CASE WHEN NEW.amount > 100000000 THEN 1 ELSE 0 END,
+            intl_transfer_count = intl_transfer_count + CASE WHEN NEW.transaction_type = 'transfer_interbank_international' THEN 1 ELSE 0 END,
+            payment_count = payment_count + CASE WHEN NEW.transaction_type = 'payment_goods_services' THEN 1 ELSE 0 END,
+            auth_failure_count = auth_failure_count + failure_count
+        WHERE customer_id = NEW.customer_id
+        AND day = NEW.transaction_date::DATE;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_adjust_customer_daily_state
+AFTER UPDATE OF amount, security_level, customer_id, transaction_date, transaction_type OR DELETE ON payment_transactions
+FOR EACH ROW EXECUTE FUNCTION adjust_customer_daily_state();
+
+-- Set the strong-authentication flag of the transaction's customer-day on successful C/D authentication
+-- and count failed authentications
+CREATE OR REPLACE FUNCTION mark_customer_daily_strong_auth()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.auth_result = 'failed' THEN
+        UPDATE customer_daily_state s
+        SET auth_failure_count = s.auth_failure_count + 1
+        FROM transaction_customer_day(NEW.transaction_id) t
+        WHERE s.customer_id = t.customer_id
+        AND s.day = t.day;
+    ELSIF NEW.auth_result = 'success' AND EXISTS (
+        SELECT 1 FROM authentication_methods am
+        WHERE am.auth_id = NEW.auth_method_id
+        AND am.security_level IN ('C', 'D')
+    ) THEN
+        UPDATE customer_daily_state s
+        SET has_strong_auth = TRUE
+        FROM transaction_customer_day(NEW.transaction_id) t
+        WHERE s.customer_id = t.customer_id
+        AND s.day = t.day
+        AND NOT s.has_strong_auth;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_mark_customer_daily_strong_auth
+AFTER INSERT ON authentication_logs
+FOR EACH ROW EXECUTE FUNCTION mark_customer_daily_strong_auth();
+
+-- Rebuild customer_daily_state from payment_transactions (initial load or after bulk changes with triggers disabled)
+CREATE OR REPLACE FUNCTION rebuild_customer_daily_state()
+RETURNS VOID AS $$
+BEGIN
+    DELETE FROM customer_daily_state;
+
+    INSERT INTO customer_daily_state (
+        customer_id, day, daily_total, ab_total, has_strong_auth,
+        high_value_count, intl_transfer_count, payment_count, auth_failure_count
+    )
+    SELECT
+        pt.customer_id,
+        pt.transaction_date::DATE,
+        SUM(pt.amount),
+        COALESCE(SUM(pt.amount) FILTER (WHERE pt.security_level IN ('A', 'B')), 0),
+        BOOL_OR(EXISTS (
+            SELECT 1
+            FROM authentication_logs al
+            JOIN authentication_methods am ON al.auth_method_id = am.auth_id
+            WHERE al.transaction_id = pt.transaction_id
+            AND am.security_level IN ('C', 'D')
+            AND al.auth_result = 'success'
+        )),
+        COUNT(*) FILTER (WHERE pt.amount > 100000000),
+        COUNT(*) FILTER (WHERE pt.transaction_type = 'transfer_interbank_international'),
+        COUNT(*) FILTER (WHERE pt.transaction_type = 'payment_goods_services'),
+        COALESCE(SUM((
+            SELECT COUNT(*)
+            FROM authentication_logs al
+            WHERE al.transaction_id = pt.transaction_id
+            AND al.auth_result = 'failed'
+        )), 0)
+    FROM payment_transactions pt
+    GROUP BY pt.customer_id, pt.transaction_date::DATE;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Transaction group (I.1-I.4 for individuals, II.1-II.4 for organizations)
+CREATE OR REPLACE FUNCTION transaction_group_of(p_customer_type VARCHAR, p_transaction_type VARCHAR)
+RETURNS VARCHAR AS $$
+    SELECT CASE p_transaction_type
+        WHEN 'inquiry' THEN
+            CASE WHEN p_customer_type = 'individual' THEN 'I.1' ELSE 'II.1' END
+        WHEN 'transfer_same_bank_same_owner' THEN
+            CASE WHEN p_customer_type = 'individual' THEN 'I.1' ELSE 'II.2' END
+        WHEN 'payment_goods_services' THEN
+            CASE WHEN p_customer_type = 'individual' THEN 'I.2' ELSE 'II.3' END
+        WHEN 'transfer_same_bank_diff_owner' THEN
+            CASE WHEN p_customer_type = 'individual' THEN 'I.3' ELSE 'II.3' END
+        WHEN 'transfer_interbank_domestic' THEN
+            CASE WHEN p_customer_type = 'individual' THEN 'I.3' ELSE 'II.3' END
+        WHEN 'ewallet_transfer' THEN
+            CASE WHEN p_customer_type = 'individual' THEN 'I.3' ELSE 'II.3' END
+        WHEN 'ewallet_topup' THEN
+            CASE WHEN p_customer_type = 'individual' THEN 'I.3' ELSE 'II.3' END
+        WHEN 'ewallet_withdrawal' THEN
+            CASE WHEN p_customer_type = 'individual' THEN 'I.3' ELSE 'II.3' END
+        WHEN 'transfer_interbank_international' THEN
+            CASE WHEN p_customer_type = 'individual' THEN 'I.4' ELSE 'II.4' END
+        ELSE 'unknown'
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Required authentication level for a transaction group and amount
+CREATE OR REPLACE FUNCTION required_security_level(p_customer_type VARCHAR, p_transaction_group VARCHAR, p_amount DECIMAL)
+RETURNS VARCHAR AS $$
+    SELECT CASE
+        WHEN p_customer_type = 'individual' THEN
+            CASE p_transaction_group
+                WHEN 'I.2' THEN
+                    CASE
+                        WHEN p_amount > 1500000000 THEN 'D'
+                        WHEN p_amount > 100000000 THEN 'C'
+                        WHEN p_amount > 5000000 THEN 'B'
+                        ELSE 'A'
+                    END
+                WHEN 'I.3' THEN
+                    CASE
+                        WHEN p_amount > 500000000 THEN 'D'
+                        WHEN p_amount > 10000000 THEN 'C'
+                        ELSE 'B'
+                    END
+                WHEN 'I.4' THEN
+                    CASE WHEN p_amount > 200000000 THEN 'D' ELSE 'C' END
+                ELSE 'A'
+            END
+        ELSE
+            CASE p_transaction_group
+                WHEN 'II.3' THEN
+                    CASE WHEN p_amount > 1000000000 THEN 'D' ELSE 'B' END
+                WHEN 'II.4' THEN
+                    CASE WHEN p_amount > 500000000 THEN 'D' ELSE 'B' END
+                ELSE 'A'
+            END
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- High-value transaction thresholds per transaction group
+CREATE OR REPLACE FUNCTION is_high_value_transaction(p_customer_type VARCHAR, p_transaction_group VARCHAR, p_amount DECIMAL)
+RETURNS BOOLEAN AS $$
+    SELECT COALESCE(
+        (p_customer_type = 'individual' AND
+            ((p_transaction_group = 'I.2' AND p_amount > 100000000) OR
+             (p_transaction_group = 'I.3' AND (p_amount > 500000000 OR p_amount > 10000000)) OR
+             (p_transaction_group = 'I.4' AND p_amount > 200000000))) OR
+        (p_customer_type = 'organization' AND
+            ((p_transaction_group = 'II.3' AND p_amount > 1000000000) OR
+             (p_transaction_group = 'II.4' AND p_amount > 500000000))),
+        FALSE
+    );
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Add one transaction to its account's daily summary (as a pending delta in timo.summary_mode = 'delta')
+CREATE OR REPLACE FUNCTION add_to_daily_summary(p_transaction payment_transactions, p_strong_auth BOOLEAN)
+RETURNS VOID AS $$
+BEGIN
+    IF current_setting('timo.summary_mode', true) = 'delta' THEN
+        INSERT INTO daily_transaction_summary_deltas (
+            account_id, customer_id, transaction_date,
+            total_amount, category_a_amount, category_b_amount,
+            category_c_amount, category_d_amount, strong_auth_used
+        )
+        VALUES (
+            p_transaction.from_account_id, p_transaction.customer_id, p_transaction.transaction_date::DATE,
+            p_transaction.amount,
+            CASE WHEN p_transaction.security_level = 'A' THEN p_transaction.amount ELSE 0 END,
+            CASE WHEN p_transaction.security_level = 'B' THEN p_transaction.amount ELSE 0 END,
+            CASE WHEN p_transaction.security_level = 'C' THEN p_transaction.amount ELSE 0 END,
+            CASE WHEN p_transaction.security_level = 'D' THEN p_transaction.amount ELSE 0 END,
+            p_strong_auth
+        );
+        RETURN;
+    END IF;
+
+    INSERT INTO daily_transaction_summaries (
+        summary_id, account_id, customer_id, transaction_date,
+        total_amount, category_a_amount, category_b_amount,
+        category_c_amount, category_d_amount, strong_auth_used
+    )
+    VALUES (
+        nextval('daily_transaction_summaries_summary_id_seq'),
+        p_transaction.from_account_id, p_transaction.customer_id, p_transaction.transaction_date::DATE,
+        p_transaction.amount,
+        CASE WHEN p_transaction.security_level = 'A' THEN p_transaction.amount ELSE 0 END,
+        CASE WHEN p_transaction.security_level = 'B' THEN p_transaction.amount ELSE 0 END,
+        CASE WHEN p_transaction.security_level = 'C' THEN p_transaction.amount ELSE 0 END,
+        CASE WHEN p_transaction.security_level = 'D' THEN p_transaction.amount ELSE 0 END,
+        p_strong_auth
+    )
+    ON CONFLICT (account_id, transaction_date)
+    DO UPDATE SET
+        total_amount = daily_transaction_summaries.total_amount + EXCLUDED.total_amount,
+        category_a_amount = daily_transaction_summaries.category_a_amount + EXCLUDED.category_a_amount,
+        category_b_amount = daily_transaction_summaries.category_b_amount + EXCLUDED.category_b_amount,
+        category_c_amount = daily_transaction_summaries.category_c_amount + EXCLUDED.category_c_amount,
+        category_d_amount = daily_transaction_summaries.category_d_amount + EXCLUDED.category_d_amount,
+        strong_auth_used = daily_transaction_summaries.strong_auth_used OR EXCLUDED.strong_auth_used,
+        updated_at = CURRENT_TIMESTAMP;
+END;
+$$ LANGUAGE plpgsql;
 
 -- Trigger to update daily transaction summaries and check limits
 CREATE OR REPLACE FUNCTION update_daily_summary()
@@ -364,28 +989,29 @@ DECLARE
     customer_type VARCHAR(20);
     has_strong_auth BOOLEAN;
     daily_total DECIMAL(15,2);
-    daily_ab_total DECIMAL(15,2);
+    day_strong_auth BOOLEAN;
     transaction_group VARCHAR(10);
     is_trusted BOOLEAN;
     account_status VARCHAR(20);
     auth_failure_count INTEGER;
+    day_failure_count INTEGER;
     required_level VARCHAR(1);
     high_value_count INTEGER;
     intl_transfer_count INTEGER;
     payment_count INTEGER;
 BEGIN
+    -- Rows inserted by process_staged_transactions are summarized set-based
+    IF current_setting('timo.bulk_mode', true) = 'on' THEN
+        RETURN NEW;
+    END IF;
+
     -- Error handling: Check for valid customer_id
     IF NEW.customer_id IS NULL THEN
         RAISE EXCEPTION 'Customer ID cannot be NULL for transaction %', NEW.transaction_id;
     END IF;
 
-    -- Get customer type
-    SELECT c.customer_type INTO customer_type
-    FROM customers c
-    WHERE c.customer_id = NEW.customer_id;
-    IF NOT FOUND THEN
-        RAISE EXCEPTION 'Customer % not found for transaction %', NEW.customer_id, NEW.transaction_id;
-    END IF;
+    -- Customer type, set on the row by classify_transaction
+    customer_type := NEW.customer_type;
 
     -- Get account status
     SELECT ba.status INTO account_status
@@ -424,73 +1050,37 @@ BEGIN
         RAISE EXCEPTION 'Device % not found for transaction %', NEW.device_id, NEW.transaction_id;
     END IF;
 
-    -- Determine transaction group
-    CASE NEW.transaction_type
-        WHEN 'inquiry' THEN
-            transaction_group := CASE WHEN customer_type = 'individual' THEN 'I.1' ELSE 'II.1' END;
-        WHEN 'transfer_same_bank_same_owner' THEN
-            transaction_group := CASE WHEN customer_type = 'individual' THEN 'I.1' ELSE 'II.2' END;
-        WHEN 'payment_goods_services' THEN
-            transaction_group := CASE WHEN customer_type = 'individual' THEN 'I.2' ELSE 'II.3' END;
-        WHEN 'transfer_same_bank_diff_owner', 'transfer_interbank_domestic', 'ewallet_transfer', 'ewallet_topup', 'ewallet_withdrawal' THEN
-            transaction_group := CASE WHEN customer_type = 'individual' THEN 'I.3' ELSE 'II.3' END;
-        WHEN 'transfer_interbank_international' THEN
-            transaction_group := CASE WHEN customer_type = 'individual' THEN 'I.4' ELSE 'II.4' END;
-        ELSE
-            transaction_group := 'unknown';
-    END CASE;
-
-    -- Determine required authentication level
-    required_level := 'A';
-    IF customer_type = 'individual' THEN
-        IF transaction_group = 'I.2' THEN
-            required_level := CASE
-                WHEN NEW.amount > 1500000000 THEN 'D'
-                WHEN NEW.amount > 100000000 THEN 'C'
-                WHEN NEW.amount > 5000000 THEN 'B'
-                ELSE 'A'
-            END;
-        ELSIF transaction_group = 'I.3' THEN
-            required_level := CASE
-                WHEN NEW.amount > 500000000 THEN 'D'
-                WHEN NEW.amount > 10000000 THEN 'C'
-                ELSE 'B'
-            END;
-        ELSIF transaction_group = 'I.4' THEN
-            required_level := CASE
-                WHEN NEW.amount > 200000000 THEN 'D'
-                ELSE 'C'
-            END;
-        END IF;
-    ELSE
-        IF transaction_group = 'II.3' THEN
-            required_level := CASE
-                WHEN NEW.amount > 1000000000 THEN 'D'
-                ELSE 'B'
-            END;
-        ELSIF transaction_group = 'II.4' THEN
-            required_level := CASE
-                WHEN NEW.amount > 500000000 THEN 'D'
-                ELSE 'B'
-            END;
-        END IF;
+    -- Determine transaction group and required authentication level
+    transaction_group := transaction_group_of(customer_type, NEW.transaction_type);
+    required_level := required_security_level(customer_type, transaction_group, NEW.amount);
+
+    -- Strong authentication (C or D) and authentication failures of this transaction
+    SELECT a.has_strong_auth, a.failure_count
+    INTO has_strong_auth, auth_failure_count
+    FROM transaction_auth_summary(NEW.transaction_id) a;
+
+    -- Daily total, strong-authentication flag and counters of the customer, maintained in
+    -- customer_daily_state (this transaction and the authentication logs written so far included)
+    SELECT s.daily_total, s.has_strong_auth, s.auth_failure_count, s.high_value_count, s.intl_transfer_count,
+           s.payment_count
+    INTO daily_total, day_strong_auth, day_failure_count, high_value_count, intl_transfer_count, payment_count
+    FROM customer_day_state(NEW.customer_id, NEW.transaction_date::DATE) s;
+
+    -- Asynchronous alert mode: queue the transaction with the values the rules read, as of now, for the
+    -- risk alert worker and only maintain the summary
+    IF current_setting('timo.alert_mode', true) = 'async' THEN
+        INSERT INTO risk_alert_events (
+            transaction_id, is_trusted, has_strong_auth, auth_failure_count, daily_total, day_strong_auth,
+            day_failure_count, high_value_count, intl_transfer_count, payment_count
+        ) VALUES (
+            NEW.transaction_id, is_trusted, has_strong_auth, auth_failure_count, daily_total, day_strong_auth,
+            day_failure_count, high_value_count, intl_transfer_count, payment_count
+        );
+        PERFORM add_to_daily_summary(NEW, has_strong_auth);
+        RETURN NEW;
     END IF;
 
-    -- Check for strong authentication (C or D) on this transaction
-    has_strong_auth := EXISTS (
-        SELECT 1
-        FROM authentication_logs al
-        JOIN authentication_methods am ON al.auth_method_id = am.auth_id
-        WHERE al.transaction_id = NEW.transaction_id
-        AND am.security_level IN ('C', 'D')
-        AND al.auth_result = 'success'
-    );
-
     -- Check for authentication failures
-    SELECT COUNT(*) INTO auth_failure_count
-    FROM authentication_logs al
-    WHERE al.transaction_id = NEW.transaction_id
-    AND al.auth_result = 'failed';
     IF auth_failure_count > 0 THEN
         INSERT INTO risk_alerts (
             alert_id, transaction_id, alert_type, alert_message, status, created_at, resolved_at
@@ -511,20 +1101,14 @@ BEGIN
     END IF;
 
     -- Check for high authentication failure rate in a day
-    SELECT COUNT(*) INTO auth_failure_count
-    FROM authentication_logs al
-    JOIN payment_transactions pt ON al.transaction_id = pt.transaction_id
-    WHERE pt.customer_id = NEW.customer_id
-    AND pt.transaction_date::DATE = NEW.transaction_date::DATE
-    AND al.auth_result = 'failed';
-    IF auth_failure_count > 3 THEN
+    IF day_failure_count > 3 THEN
         INSERT INTO risk_alerts (
             alert_id, transaction_id, alert_type, alert_message, status, created_at, resolved_at
         ) VALUES (
             nextval('risk_alerts_alert_id_seq'),
             NEW.transaction_id,
             'auth_failure_rate',
-            format('Customer %s has %s authentication failures on %s', NEW.customer_id, auth_failure_count, NEW.transaction_date::DATE),
+            format('Customer %s has %s authentication failures on %s', NEW.customer_id, day_failure_count, NEW.transaction_date::DATE),
             CASE
                 WHEN random() < 0.40 THEN 'open'
                 WHEN random() < 0.70 THEN 'investigating'
@@ -597,13 +1181,7 @@ BEGIN
     END IF;
 
     -- Check for high-value transaction
-    IF (customer_type = 'individual' AND
-        ((transaction_group = 'I.2' AND NEW.amount > 100000000) OR
-         (transaction_group = 'I.3' AND (NEW.amount > 500000000 OR NEW.amount > 10000000)) OR
-         (transaction_group = 'I.4' AND NEW.amount > 200000000))) OR
-       (customer_type = 'organization' AND
-        ((transaction_group = 'II.3' AND NEW.amount > 1000000000) OR
-         (transaction_group = 'II.4' AND NEW.amount > 500000000))) THEN
+    IF is_high_value_transaction(customer_type, transaction_group, NEW.amount) THEN
         INSERT INTO risk_alerts (
             alert_id, transaction_id, alert_type, alert_message, status, created_at, resolved_at
         ) VALUES (
@@ -622,30 +1200,6 @@ BEGIN
         );
     END IF;
 
-    -- Calculate daily totals and counts
-    SELECT COALESCE(SUM(dts.total_amount), 0),
-           COALESCE(SUM(dts.category_a_amount + dts.category_b_amount), 0),
-           COUNT(*) FILTER (WHERE pt.amount > 100000000),
-           COUNT(*) FILTER (WHERE pt.transaction_type = 'transfer_interbank_international'),
-           COUNT(*) FILTER (WHERE pt.transaction_type = 'payment_goods_services')
-    INTO daily_total, daily_ab_total, high_value_count, intl_transfer_count, payment_count
-    FROM daily_transaction_summaries dts
-    JOIN payment_transactions pt ON dts.account_id = pt.from_account_id
-    WHERE dts.customer_id = NEW.customer_id
-    AND dts.transaction_date = NEW.transaction_date::DATE
-    AND pt.transaction_date::DATE = NEW.transaction_date::DATE;
-
-    -- Adjust counts for the current transaction
-    IF NEW.amount > 100000000 THEN
-        high_value_count := high_value_count + 1;
-    END IF;
-    IF NEW.transaction_type = 'transfer_interbank_international' THEN
-        intl_transfer_count := intl_transfer_count + 1;
-    END IF;
-    IF NEW.transaction_type = 'payment_goods_services' THEN
-        payment_count := payment_count + 1;
-    END IF;
-
     -- Check for unusual pattern (>3 high-value transactions)
     IF high_value_count > 3 THEN
         INSERT INTO risk_alerts (
@@ -706,25 +1260,15 @@ BEGIN
         );
     END IF;
 
-    -- Check for daily total > 20M VND without strong authentication
-    IF daily_total + NEW.amount > 20000000 AND NOT has_strong_auth AND NOT EXISTS (
-        SELECT 1
-        FROM payment_transactions pt
-        JOIN authentication_logs al ON pt.transaction_id = al.transaction_id
-        JOIN authentication_methods am ON al.auth_method_id = am.auth_id
-        WHERE pt.customer_id = NEW.customer_id
-        AND pt.transaction_date::DATE = NEW.transaction_date::DATE
-        AND pt.transaction_id != NEW.transaction_id
-        AND am.security_level IN ('C', 'D')
-        AND al.auth_result = 'success'
-    ) THEN
+    -- Check for daily total > 20M VND without strong authentication in the day
+    IF daily_total > 20000000 AND NOT day_strong_auth THEN
         INSERT INTO risk_alerts (
             alert_id, transaction_id, alert_type, alert_message, status, created_at, resolved_at
         ) VALUES (
             nextval('risk_alerts_alert_id_seq'),
             NEW.transaction_id,
             'daily_limit_strong_auth',
-            format('Customer %s on %s has total amount %s VND without strong authentication', NEW.customer_id, NEW.transaction_date::DATE, daily_total + NEW.amount),
+            format('Customer %s on %s has total amount %s VND without strong authentication', NEW.customer_id, NEW.transaction_date::DATE, daily_total),
             CASE
                 WHEN random() < 0.40 THEN 'open'
                 WHEN random() < 0.70 THEN 'investigating'
@@ -736,27 +1280,327 @@ BEGIN
         );
     END IF;
 
-    -- Reset Tksth to 0 if strong authentication was used
-    IF has_strong_auth THEN
-        daily_ab_total := 0;
+    -- Update daily transaction summaries
+    PERFORM add_to_daily_summary(NEW, has_strong_auth);
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create the trigger
+CREATE TRIGGER trigger_update_daily_summary
+AFTER INSERT ON payment_transactions
+FOR EACH ROW EXECUTE FUNCTION update_daily_summary();
+
+
+-- The payment_transactions rows of a processed staged batch, found through their primary keys. Inlined into
+-- the statements of process_staged_transactions; tests/test_staged_transactions.py checks its plan.
+-- transaction_id alone: a batch sharing one transaction_date would otherwise be probed through the
+-- transaction_date index, once per row.
+CREATE OR REPLACE FUNCTION staged_batch_transactions(p_batch_id BIGINT)
+RETURNS SETOF payment_transactions AS $$
+    SELECT pt.*
+    FROM payment_transactions_staging s
+    JOIN payment_transactions pt ON pt.transaction_id = s.transaction_id
+    WHERE s.batch_id = p_batch_id;
+$$ LANGUAGE sql STABLE;
+
+-- Set-based processing of one staged batch: classification, risk alerts and daily summaries for the
+-- whole batch in a few statements instead of per-row triggers. Results match inserting the rows one
+-- at a time in transaction_id order through trigger_classify_transaction/trigger_update_daily_summary.
+CREATE OR REPLACE FUNCTION process_staged_transactions(p_batch_id BIGINT)
+RETURNS INTEGER AS $$
+DECLARE
+    bad RECORD;
+    inserted_count INTEGER;
+    summary_mode TEXT := COALESCE(current_setting('timo.summary_mode', true), '');
+    alert_mode TEXT := COALESCE(current_setting('timo.alert_mode', true), '');
+BEGIN
+    -- Same validation errors as the row-level triggers
+    SELECT s.customer_id INTO bad
+    FROM payment_transactions_staging s
+    LEFT JOIN customers c ON c.customer_id = s.customer_id
+    WHERE s.batch_id = p_batch_id
+    AND c.customer_id IS NULL
+    LIMIT 1;
+    IF FOUND THEN
+        RAISE EXCEPTION 'Cannot determine customer type for customer_id %', bad.customer_id;
     END IF;
 
-    -- Update daily transaction summaries
+    SELECT s.transaction_id, s.from_account_id, ba.status INTO bad
+    FROM payment_transactions_staging s
+    LEFT JOIN bank_accounts ba ON ba.account_id = s.from_account_id
+    WHERE s.batch_id = p_batch_id
+    AND (ba.account_id IS NULL OR ba.status IN ('inactive', 'frozen'))
+    ORDER BY s.transaction_id
+    LIMIT 1;
+    IF FOUND THEN
+        IF bad.status IS NULL THEN
+            RAISE EXCEPTION 'Account % not found for transaction %', bad.from_account_id, bad.transaction_id;
+        END IF;
+        RAISE EXCEPTION 'Transaction %s not allowed from account %s with status %s', bad.transaction_id, bad.from_account_id, bad.status;
+    END IF;
+
+    SELECT s.transaction_id, s.device_id INTO bad
+    FROM payment_transactions_staging s
+    LEFT JOIN devices d ON d.device_id = s.device_id
+    WHERE s.batch_id = p_batch_id
+    AND d.device_id IS NULL
+    ORDER BY s.transaction_id
+    LIMIT 1;
+    IF FOUND THEN
+        RAISE EXCEPTION 'Device % not found for transaction %', bad.device_id, bad.transaction_id;
+    END IF;
+
+    -- Skip the row-level triggers for the rows inserted below
+    PERFORM set_config('timo.bulk_mode', 'on', true);
+
+    -- Create and lock the customer-day state rows of the batch, in key order
+    INSERT INTO customer_daily_state (customer_id, day)
+    SELECT DISTINCT s.customer_id, s.transaction_date::DATE
+    FROM payment_transactions_staging s
+    WHERE s.batch_id = p_batch_id
+    ORDER BY 1, 2
+    ON CONFLICT (customer_id, day) DO NOTHING;
+
+    PERFORM 1
+    FROM customer_daily_state st
+    WHERE (st.customer_id, st.day) IN (
+        SELECT s.customer_id, s.transaction_date::DATE
+        FROM payment_transactions_staging s
+        WHERE s.batch_id = p_batch_id
+    )
+    ORDER BY st.customer_id, st.day
+    FOR UPDATE;
+
+    -- Classification: daily totals are running sums; Tksth depends on the levels of earlier rows of the
+    -- same customer-day, so rows are classified in transaction_id order by a recursive CTE (one step per rank)
+    WITH RECURSIVE batch AS (
+        SELECT
+            s.*,
+            c.customer_type,
+            st.daily_total + SUM(s.amount) OVER w - s.amount AS daily_total,
+            st.ab_total AS base_ab_total,
+            -- Strong authentication of earlier batch rows whose logs were written before them
+            st.has_strong_auth OR COALESCE(BOOL_OR(oa.has_strong_auth) OVER w_prior, FALSE) AS has_strong_auth,
+            ROW_NUMBER() OVER w AS rn
+        FROM payment_transactions_staging s
+        JOIN customers c ON c.customer_id = s.customer_id
+        JOIN customer_daily_state st ON st.customer_id = s.customer_id AND st.day = s.transaction_date::DATE
+        LEFT JOIN LATERAL (
+            SELECT TRUE AS has_strong_auth
+            FROM authentication_logs al
+            JOIN authentication_methods am ON al.auth_method_id = am.auth_id
+            WHERE al.transaction_id = s.transaction_id
+            AND am.security_level IN ('C', 'D')
+            AND al.auth_result = 'success'
+            LIMIT 1
+        ) oa ON TRUE
+        WHERE s.batch_id = p_batch_id
+        WINDOW w AS (PARTITION BY s.customer_id, s.transaction_date::DATE ORDER BY s.transaction_id),
+               w_prior AS (w ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING)
+    ),
+    classified AS (
+        SELECT b.customer_id, b.transaction_date::DATE AS day, b.rn, b.transaction_id, l.security_level,
+               b.base_ab_total + CASE WHEN l.security_level IN ('A', 'B') THEN b.amount ELSE 0 END AS ab_total
+        FROM batch b
+        CROSS JOIN LATERAL (
+            SELECT classify_security_level(
+                b.customer_type, b.transaction_type, b.amount, b.daily_total,
+                CASE WHEN b.has_strong_auth THEN 0 ELSE b.base_ab_total END, b.security_level
+            ) AS security_level
+        ) l
+        WHERE b.rn = 1
+
+        UNION ALL
+
+        SELECT b.customer_id, p.day, b.rn, b.transaction_id, l.security_level,
+               p.ab_total + CASE WHEN l.security_level IN ('A', 'B') THEN b.amount ELSE 0 END
+        FROM classified p
+        JOIN batch b ON b.customer_id = p.customer_id AND b.transaction_date::DATE = p.day AND b.rn = p.rn + 1
+        CROSS JOIN LATERAL (
+            SELECT classify_security_level(
+                b.customer_type, b.transaction_type, b.amount, b.daily_total,
+                CASE WHEN b.has_strong_auth THEN 0 ELSE p.ab_total END, b.security_level
+            ) AS security_level
+        ) l
+    )
+    INSERT INTO payment_transactions (
+        transaction_id, from_account_id, to_account_internal_id, to_account_external_id, customer_id,
+        customer_type, transaction_type, amount, security_level, description, transaction_date, status, device_id,
+        is_suspicious, created_at
+    )
+    SELECT
+        b.transaction_id, b.from_account_id, b.to_account_internal_id, b.to_account_external_id, b.customer_id,
+        b.customer_type, b.transaction_type, b.amount, cl.security_level, b.description, b.transaction_date, b.status, b.device_id,
+        b.is_suspicious, b.created_at
+    FROM batch b
+    JOIN classified cl ON cl.transaction_id = b.transaction_id
+    ORDER BY b.transaction_id;
+    GET DIAGNOSTICS inserted_count = ROW_COUNT;
+
+    -- Risk alerts, or in asynchronous alert mode the queued events for the risk alert worker with the values
+    -- the rules read. customer_daily_state still holds the values before the batch; each row sees them plus
+    -- the batch rows of its customer-day up to and including itself (in transaction_id order) and the
+    -- authentication logs written before them, as the row trigger reads them after classify_transaction.
+    WITH batch AS (
+        SELECT pt.transaction_id, pt.customer_id, pt.device_id, pt.transaction_type,
+               pt.amount, pt.security_level, pt.transaction_date::DATE AS day,
+               pt.customer_type, d.is_trusted,
+               transaction_group_of(pt.customer_type, pt.transaction_type) AS transaction_group,
+               CASE WHEN pt.amount > 100000000 THEN 1 ELSE 0 END AS is_high_value,
+               CASE WHEN pt.transaction_type = 'transfer_interbank_international' THEN 1 ELSE 0 END AS is_intl,
+               CASE WHEN pt.transaction_type = 'payment_goods_services' THEN 1 ELSE 0 END AS is_payment
+        FROM staged_batch_transactions(p_batch_id) pt
+        JOIN devices d ON d.device_id = pt.device_id
+    ),
+    own_auth AS (
+        SELECT al.transaction_id,
+               BOOL_OR(am.security_level IN ('C', 'D') AND al.auth_result = 'success') AS has_strong_auth,
+               COUNT(*) FILTER (WHERE al.auth_result = 'failed') AS failure_count
+        FROM authentication_logs al
+        JOIN authentication_methods am ON al.auth_method_id = am.auth_id
+        WHERE al.transaction_id IN (SELECT transaction_id FROM batch)
+        GROUP BY al.transaction_id
+    ),
+    daily AS (
+        SELECT r.*,
+               COALESCE(oa.has_strong_auth, FALSE) AS has_strong_auth,
+               COALESCE(oa.failure_count, 0) AS auth_failure_count,
+               required_security_level(r.customer_type, r.transaction_group, r.amount) AS required_level,
+               st.daily_total + SUM(r.amount) OVER day_upto AS daily_total,
+               st.has_strong_auth OR BOOL_OR(COALESCE(oa.has_strong_auth, FALSE)) OVER day_upto AS day_strong_auth,
+               st.auth_failure_count + SUM(COALESCE(oa.failure_count, 0)) OVER day_upto AS day_failure_count,
+               st.high_value_count + SUM(r.is_high_value) OVER day_upto AS high_value_count,
+               st.intl_transfer_count + SUM(r.is_intl) OVER day_upto AS intl_transfer_count,
+               st.payment_count + SUM(r.is_payment) OVER day_upto AS payment_count
+        FROM batch r
+        JOIN customer_daily_state st ON st.customer_id = r.customer_id AND st.day = r.day
+        LEFT JOIN own_auth oa ON oa.transaction_id = r.transaction_id
+        WINDOW day_upto AS (PARTITION BY r.customer_id, r.day ORDER BY r.transaction_id)
+    ),
+    events AS (
+        INSERT INTO risk_alert_events (
+            transaction_id, is_trusted, has_strong_auth, auth_failure_count, daily_total, day_strong_auth,
+            day_failure_count, high_value_count, intl_transfer_count, payment_count
+        )
+        SELECT r.transaction_id, r.is_trusted, r.has_strong_auth, r.auth_failure_count, r.daily_total,
+               r.day_strong_auth, r.day_failure_count, r.high_value_count, r.intl_transfer_count, r.payment_count
+        FROM daily r
+        WHERE alert_mode = 'async'
+        ORDER BY r.transaction_id
+    )
+    INSERT INTO risk_alerts (transaction_id, alert_type, alert_message, status, created_at, resolved_at)
+    SELECT
+        r.transaction_id,
+        a.alert_type,
+        a.alert_message,
+        CASE
+            WHEN random() < 0.40 THEN 'open'
+            WHEN random() < 0.70 THEN 'investigating'
+            WHEN random() < 0.90 THEN 'resolved'
+            ELSE 'false_positive'
+        END,
+        CURRENT_TIMESTAMP,
+        CASE WHEN random() < 0.90 THEN NULL ELSE CURRENT_TIMESTAMP END
+    FROM daily r
+    CROSS JOIN LATERAL (VALUES
+        (1, 'auth_failure', r.auth_failure_count > 0,
+            format('Authentication failure detected for transaction %s (%s failures)', r.transaction_id, r.auth_failure_count)),
+        (2, 'auth_failure_rate', r.day_failure_count > 3,
+            format('Customer %s has %s authentication failures on %s', r.customer_id, r.day_failure_count, r.day)),
+        (3, 'strong_auth_required', r.amount > 10000000 AND NOT r.has_strong_auth,
+            format('Transaction %s with amount %s VND used weak authentication (Level %s)', r.transaction_id, r.amount, r.security_level)),
+        (4, 'untrusted_device', NOT r.is_trusted AND NOT r.has_strong_auth,
+            format('Transaction %s on untrusted device %s lacks strong authentication (C/D)', r.transaction_id, r.device_id)),
+        (5, 'weak_authentication', r.security_level < r.required_level,
+            format('Weak authentication (Level %s) used for transaction %s requiring Level %s', r.security_level, r.transaction_id, r.required_level)),
+        (6, 'high_value_transaction', is_high_value_transaction(r.customer_type, r.transaction_group, r.amount),
+            format('High-value transaction detected: %s VND for %s', r.amount, r.transaction_group)),
+        (7, 'unusual_pattern', r.high_value_count > 3,
+            format('Unusual pattern: %s high-value transactions on %s', r.high_value_count, r.day)),
+        (8, 'unusual_cross_border_frequency', r.customer_type = 'organization' AND r.intl_transfer_count > 3,
+            format('Unusual frequency: %s international transfers on %s', r.intl_transfer_count, r.day)),
+        (9, 'high_payment_volume', r.customer_type = 'organization' AND r.payment_count > 10,
+            format('High volume: %s payment transactions on %s', r.payment_count, r.day)),
+        (10, 'daily_limit_strong_auth', r.daily_total > 20000000 AND NOT r.day_strong_auth,
+            format('Customer %s on %s has total amount %s VND without strong authentication', r.customer_id, r.day, r.daily_total))
+    ) AS a(rule_order, alert_type, triggered, alert_message)
+    WHERE a.triggered
+    AND alert_mode <> 'async'
+    ORDER BY r.transaction_id, a.rule_order;
+
+    -- Customer-day state after the batch
+    UPDATE customer_daily_state st
+    SET daily_total = st.daily_total + d.total_amount,
+        ab_total = st.ab_total + d.ab_amount,
+        high_value_count = st.high_value_count + d.high_value_count,
+        intl_transfer_count = st.intl_transfer_count + d.intl_transfer_count,
+        payment_count = st.payment_count + d.payment_count,
+        has_strong_auth = st.has_strong_auth OR d.has_strong_auth,
+        auth_failure_count = st.auth_failure_count + d.auth_failure_count
+    FROM (
+        SELECT pt.customer_id, pt.transaction_date::DATE AS day,
+               SUM(pt.amount) AS total_amount,
+               COALESCE(SUM(pt.amount) FILTER (WHERE pt.security_level IN ('A', 'B')), 0) AS ab_amount,
+               COUNT(*) FILTER (WHERE pt.amount > 100000000) AS high_value_count,
+               COUNT(*) FILTER (WHERE pt.transaction_type = 'transfer_interbank_international') AS intl_transfer_count,
+               COUNT(*) FILTER (WHERE pt.transaction_type = 'payment_goods_services') AS payment_count,
+               -- Authentication logs written before their batch rows (see classify_transaction)
+               COALESCE(BOOL_OR(oa.has_strong_auth), FALSE) AS has_strong_auth,
+               COALESCE(SUM(oa.failure_count), 0) AS auth_failure_count
+        FROM staged_batch_transactions(p_batch_id) pt
+        LEFT JOIN LATERAL (
+            SELECT BOOL_OR(am.security_level IN ('C', 'D') AND al.auth_result = 'success') AS has_strong_auth,
+                   COUNT(*) FILTER (WHERE al.auth_result = 'failed') AS failure_count
+            FROM authentication_logs al
+            JOIN authentication_methods am ON al.auth_method_id = am.auth_id
+            WHERE al.transaction_id = pt.transaction_id
+        ) oa ON TRUE
+        GROUP BY pt.customer_id, pt.transaction_date::DATE
+    ) d
+    WHERE st.customer_id = d.customer_id
+    AND st.day = d.day;
+
+    -- Daily transaction summaries, one upsert (or one pending delta in delta mode) per account-day of the batch
+    WITH batch_summaries AS (
+        SELECT
+            pt.from_account_id AS account_id,
+            (ARRAY_AGG(pt.customer_id ORDER BY pt.transaction_id))[1] AS customer_id,
+            pt.transaction_date::DATE AS transaction_date,
+            SUM(pt.amount) AS total_amount,
+            COALESCE(SUM(pt.amount) FILTER (WHERE pt.security_level = 'A'), 0) AS category_a_amount,
+            COALESCE(SUM(pt.amount) FILTER (WHERE pt.security_level = 'B'), 0) AS category_b_amount,
+            COALESCE(SUM(pt.amount) FILTER (WHERE pt.security_level = 'C'), 0) AS category_c_amount,
+            COALESCE(SUM(pt.amount) FILTER (WHERE pt.security_level = 'D'), 0) AS category_d_amount,
+            BOOL_OR(EXISTS (
+                SELECT 1
+                FROM authentication_logs al
+                JOIN authentication_methods am ON al.auth_method_id = am.auth_id
+                WHERE al.transaction_id = pt.transaction_id
+                AND am.security_level IN ('C', 'D')
+                AND al.auth_result = 'success'
+            )) AS strong_auth_used
+        FROM staged_batch_transactions(p_batch_id) pt
+        GROUP BY pt.from_account_id, pt.transaction_date::DATE
+    ),
+    deltas AS (
+        INSERT INTO daily_transaction_summary_deltas (
+            account_id, customer_id, transaction_date,
+            total_amount, category_a_amount, category_b_amount,
+            category_c_amount, category_d_amount, strong_auth_used
+        )
+        SELECT * FROM batch_summaries
+        WHERE summary_mode = 'delta'
+    )
     INSERT INTO daily_transaction_summaries (
-        summary_id, account_id, customer_id, transaction_date,
+        account_id, customer_id, transaction_date,
         total_amount, category_a_amount, category_b_amount,
         category_c_amount, category_d_amount, strong_auth_used
     )
-    VALUES (
-        nextval('daily_transaction_summaries_summary_id_seq'),
-        NEW.from_account_id, NEW.customer_id, NEW.transaction_date::DATE,
-        NEW.amount,
-        CASE WHEN NEW.security_level = 'A' THEN NEW.amount ELSE 0 END,
-        CASE WHEN NEW.security_level = 'B' THEN NEW.amount ELSE 0 END,
-        CASE WHEN NEW.security_level = 'C' THEN NEW.amount ELSE 0 END,
-        CASE WHEN NEW.security_level = 'D' THEN NEW.amount ELSE 0 END,
-        has_strong_auth
-    )
+    SELECT * FROM batch_summaries
+    WHERE summary_mode <> 'delta'
+    ORDER BY account_id, transaction_date
     ON CONFLICT (account_id, transaction_date)
     DO UPDATE SET
         total_amount = daily_transaction_summaries.total_amount + EXCLUDED.total_amount,
@@ -767,11 +1611,103 @@ BEGIN
         strong_auth_used = daily_transaction_summaries.strong_auth_used OR EXCLUDED.strong_auth_used,
         updated_at = CURRENT_TIMESTAMP;
 
-    RETURN NEW;
+    PERFORM set_config('timo.bulk_mode', 'off', true);
+    DELETE FROM payment_transactions_staging WHERE batch_id = p_batch_id;
+
+    RETURN inserted_count;
 END;
 $$ LANGUAGE plpgsql;
 
--- Create the trigger
-CREATE TRIGGER trigger_update_daily_summary
-AFTER INSERT ON payment_transactions
-FOR EACH ROW EXECUTE FUNCTION update_daily_summary();
+-- Submit a batch of transactions and their authentication attempts in one call and one transaction.
+-- The logs are written first, so the row triggers of each transaction see its own authentication results
+-- (strong authentication and failures). Both arguments are JSON arrays of row objects keyed by column name;
+-- columns left out take their defaults. Returns the number of transactions inserted.
+CREATE OR REPLACE FUNCTION submit_transactions(p_transactions JSONB, p_auth_logs JSONB DEFAULT '[]')
+RETURNS INTEGER AS $$
+DECLARE
+    t payment_transactions;
+    inserted_count INTEGER := 0;
+BEGIN
+    INSERT INTO authentication_logs (log_id, transaction_id, auth_method_id, auth_result, auth_timestamp, failure_reason)
+    SELECT
+        COALESCE(l.log_id, nextval('authentication_logs_log_id_seq')), l.transaction_id, l.auth_method_id,
+        l.auth_result, COALESCE(l.auth_timestamp, CURRENT_TIMESTAMP), COALESCE(l.failure_reason, '')
+    FROM jsonb_populate_recordset(NULL::authentication_logs, p_auth_logs) l
+    ORDER BY l.transaction_id, l.auth_timestamp;
+
+    -- One INSERT per row, so each row's AFTER trigger runs before the next row is inserted,
+    -- exactly as for separate INSERT statements
+    FOR t IN
+        SELECT * FROM jsonb_populate_recordset(NULL::payment_transactions, p_transactions) r
+        ORDER BY r.transaction_id
+    LOOP
+        INSERT INTO payment_transactions (
+            transaction_id, from_account_id, to_account_internal_id, to_account_external_id, customer_id,
+            transaction_type, amount, security_level, description, transaction_date, status, device_id,
+            is_suspicious, created_at
+        ) VALUES (
+            COALESCE(t.transaction_id, nextval('payment_transactions_transaction_id_seq')), t.from_account_id,
+            t.to_account_internal_id, t.to_account_external_id, t.customer_id,
+            t.transaction_type, t.amount, COALESCE(t.security_level, 'A'), t.description,
+            COALESCE(t.transaction_date, CURRENT_TIMESTAMP), COALESCE(t.status, 'pending'), t.device_id,
+            COALESCE(t.is_suspicious, FALSE), COALESCE(t.created_at, CURRENT_TIMESTAMP)
+        );
+        inserted_count := inserted_count + 1;
+    END LOOP;
+
+    RETURN inserted_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Compact up to p_limit pending summary deltas into daily_transaction_summaries; returns the number compacted.
+-- Deltas are claimed with SKIP LOCKED, so concurrent rollups work on disjoint deltas.
+CREATE OR REPLACE FUNCTION rollup_daily_summary_deltas(p_limit INTEGER DEFAULT 100000)
+RETURNS INTEGER AS $$
+DECLARE
+    rolled_up_count INTEGER;
+BEGIN
+    WITH claimed AS (
+        DELETE FROM daily_transaction_summary_deltas
+        WHERE delta_id IN (
+            SELECT delta_id
+            FROM daily_transaction_summary_deltas
+            ORDER BY delta_id
+            LIMIT p_limit
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING *
+    ),
+    merged AS (
+        INSERT INTO daily_transaction_summaries (
+            account_id, customer_id, transaction_date,
+            total_amount, category_a_amount, category_b_amount,
+            category_c_amount, category_d_amount, strong_auth_used
+        )
+        SELECT
+            account_id,
+            (ARRAY_AGG(customer_id ORDER BY delta_id))[1],
+            transaction_date,
+            SUM(total_amount),
+            SUM(category_a_amount),
+            SUM(category_b_amount),
+            SUM(category_c_amount),
+            SUM(category_d_amount),
+            BOOL_OR(strong_auth_used)
+        FROM claimed
+        GROUP BY account_id, transaction_date
+        ORDER BY account_id, transaction_date
+        ON CONFLICT (account_id, transaction_date)
+        DO UPDATE SET
+            total_amount = daily_transaction_summaries.total_amount + EXCLUDED.total_amount,
+            category_a_amount = daily_transaction_summaries.category_a_amount + EXCLUDED.category_a_amount,
+            category_b_amount = daily_transaction_summaries.category_b_amount + EXCLUDED.category_b_amount,
+            category_c_amount = daily_transaction_summaries.category_c_amount + EXCLUDED.category_c_amount,
+            category_d_amount = daily_transaction_summaries.category_d_amount + EXCLUDED.category_d_amount,
+            strong_auth_used = daily_transaction_summaries.strong_auth_used OR EXCLUDED.strong_auth_used,
+            updated_at = CURRENT_TIMESTAMP
+    )
+    SELECT COUNT(*) INTO rolled_up_count FROM claimed;
+
+    RETURN rolled_up_count;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,56 @@
+from collections import defaultdict
+from decimal import Decimal
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+class BalanceDeltaLedger:
+    """
+    Accumulates net balance changes (in cents) per account in memory and applies them
+    with one set-based UPDATE per table at flush time, instead of one UPDATE per transaction.
+    """
+
+    def __init__(self):
+        self.deltas = defaultdict(lambda: defaultdict(int))
+
+    def add(self, model, account_id: int, delta_cents: int):
+        self.deltas[model.__tablename__][account_id] += int(delta_cents)
+
+    def __len__(self) -> int:
+        return sum(len(accounts) for accounts in self.deltas.values())
+
+    def flush(self, session: Session) -> int:
+        """Apply all pending deltas; returns the number of account rows updated."""
+        updated = 0
+        for table, accounts in self.deltas.items():
+            changes = sorted((account_id, delta) for account_id, delta in accounts.items() if delta != 0)
+            if not changes:
+                continue
+            # Lock rows in account_id order so concurrent generator workers cannot deadlock. FOR NO KEY UPDATE
+            # (the UPDATE below leaves the key alone) does not block the FOR KEY SHARE locks other workers'
+            # foreign key checks take on these accounts
+            session.execute(
+                text(f"""
+                    SELECT account_id FROM {table}
+                    WHERE account_id = ANY(CAST(:account_ids AS BIGINT[]))
+                    ORDER BY account_id
+                    FOR NO KEY UPDATE
+                """),
+                {'account_ids': [account_id for account_id, _ in changes]}
+            )
+            result = session.execute(
+                text(f"""
+                    UPDATE {table} AS acc
+                    SET balance = acc.balance + v.delta,
+                        updated_at = CURRENT_TIMESTAMP
+                    FROM unnest(CAST(:account_ids AS BIGINT[]), CAST(:deltas AS NUMERIC[])) AS v(account_id, delta)
+                    WHERE acc.account_id = v.account_id
+                """),
+                {
+                    'account_ids': [account_id for account_id, _ in changes],
+                    'deltas': [Decimal(delta).scaleb(-2) for _, delta in changes]
+                }
+            )
+            updated += result.rowcount
+        self.deltas.clear()
+        return updated
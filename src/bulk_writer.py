@@ -0,0 +1,216 @@
+import io
+import os
+import struct
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+# Rows sent per COPY statement; keeps client memory bounded for very large batches
+DEFAULT_CHUNK_SIZE = int(os.getenv("COPY_CHUNK_SIZE", "50000"))
+WRITER_BACKENDS = ('orm', 'copy', 'copy_binary', 'staged')
+
+PG_EPOCH_DATETIME = datetime(2000, 1, 1)
+PG_EPOCH_DATE = date(2000, 1, 1)
+COPY_BINARY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0)
+COPY_BINARY_TRAILER = struct.pack('>h', -1)
+
+
+def _to_decimal(value) -> Decimal:
+    return Decimal(str(value)) if isinstance(value, float) else Decimal(value)
+
+
+def _encode_numeric(value) -> bytes:
+    """Encode a value in PostgreSQL's binary NUMERIC format (base-10000 digit groups)."""
+    sign, digits, exponent = _to_decimal(value).as_tuple()
+    coefficient = ''.join(map(str, digits))
+    dscale = max(-exponent, 0)
+    if exponent < 0:
+        coefficient = coefficient.rjust(-exponent + 1, '0')
+        int_part, frac_part = coefficient[:exponent], coefficient[exponent:]
+    else:
+        int_part, frac_part = coefficient + '0' * exponent, ''
+
+    int_part = int_part.lstrip('0')
+    int_part = int_part.rjust((len(int_part) + 3) // 4 * 4, '0')
+    frac_part = frac_part.ljust((len(frac_part) + 3) // 4 * 4, '0')
+    groups = [int(int_part[i:i + 4]) for i in range(0, len(int_part), 4)]
+    groups += [int(frac_part[i:i + 4]) for i in range(0, len(frac_part), 4)]
+    weight = len(int_part) // 4 - 1
+
+    while groups and groups[0] == 0:
+        groups.pop(0)
+        weight -= 1
+    while groups and groups[-1] == 0:
+        groups.pop()
+    if not groups:
+        weight = 0
+
+    header = struct.pack('>hhhh', len(groups), weight, 0x4000 if sign else 0x0000, dscale)
+    return header + struct.pack(f'>{len(groups)}h', *groups)
+
+
+def _encode_timestamp(value: datetime) -> bytes:
+    return struct.pack('>q', (value - PG_EPOCH_DATETIME) // timedelta(microseconds=1))
+
+
+def _encode_date(value) -> bytes:
+    if isinstance(value, datetime):
+        value = value.date()
+    return struct.pack('>i', (value - PG_EPOCH_DATE).days)
+
+
+BINARY_ENCODERS = {
+    'int8': lambda v: struct.pack('>q', v),
+    'int4': lambda v: struct.pack('>i', v),
+    'int2': lambda v: struct.pack('>h', v),
+    'bool': lambda v: b'\x01' if v else b'\x00',
+    'varchar': lambda v: str(v).encode(),
+    'text': lambda v: str(v).encode(),
+    'bpchar': lambda v: str(v).encode(),
+    'numeric': _encode_numeric,
+    'timestamp': _encode_timestamp,
+    'date': _encode_date,
+}
+
+
+def _text_value(value) -> str:
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime):
+        return value.isoformat(' ')
+    if isinstance(value, float):
+        value = _to_decimal(value)
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+class OrmWriter:
+    """Writes rows with session.bulk_insert_mappings (executemany-style INSERTs)."""
+    name = 'orm'
+
+    def write(self, session: Session, model, rows: List[Dict]):
+        if rows:
+            session.bulk_insert_mappings(model, rows)
+
+
+class CopyWriter:
+    """
+    Streams rows through COPY ... FROM STDIN in bounded chunks, in text or binary format.
+    COPY fires row-level triggers, so classify_transaction/update_daily_summary still run
+    for every payment transaction exactly as they do for INSERTs.
+    """
+
+    def __init__(self, copy_format: str = 'text', chunk_size: int = DEFAULT_CHUNK_SIZE):
+        if copy_format not in ('text', 'binary'):
+            raise ValueError(f"Unsupported COPY format: {copy_format}")
+        self.copy_format = copy_format
+        self.chunk_size = chunk_size
+        self.name = 'copy' if copy_format == 'text' else 'copy_binary'
+        self._column_types = {}
+
+    def _get_column_types(self, session: Session, table: str) -> Dict[str, str]:
+        if table not in self._column_types:
+            rows = session.execute(
+                text("""
+                    SELECT a.attname, t.typname
+                    FROM pg_attribute a
+                    JOIN pg_type t ON a.atttypid = t.oid
+                    WHERE a.attrelid = CAST(:table AS regclass)
+                    AND a.attnum > 0
+                    AND NOT a.attisdropped
+                """),
+                {'table': table}
+            ).all()
+            self._column_types[table] = {name: type_name for name, type_name in rows}
+        return self._column_types[table]
+
+    def _encode_text(self, rows: List[Dict], columns: List[str]) -> io.BytesIO:
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write('\t'.join(_text_value(row.get(col)) for col in columns))
+            buffer.write('\n')
+        return io.BytesIO(buffer.getvalue().encode())
+
+    def _encode_binary(self, rows: List[Dict], columns: List[str], column_types: Dict[str, str]) -> io.BytesIO:
+        encoders = [BINARY_ENCODERS[column_types[col]] for col in columns]
+        field_count = struct.pack('>h', len(columns))
+        buffer = io.BytesIO()
+        buffer.write(COPY_BINARY_HEADER)
+        for row in rows:
+            buffer.write(field_count)
+            for col, encode in zip(columns, encoders):
+                value = row.get(col)
+                if value is None:
+                    buffer.write(struct.pack('>i', -1))
+                else:
+                    data = encode(value)
+                    buffer.write(struct.pack('>i', len(data)))
+                    buffer.write(data)
+        buffer.write(COPY_BINARY_TRAILER)
+        buffer.seek(0)
+        return buffer
+
+    def write(self, session: Session, model, rows: List[Dict]):
+        self.write_table(session, model.__tablename__, rows)
+
+    def write_table(self, session: Session, table: str, rows: List[Dict]):
+        if not rows:
+            return
+        columns = list(rows[0].keys())
+        column_types = self._get_column_types(session, table) if self.copy_format == 'binary' else None
+        statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT {self.copy_format})"
+
+        cursor = session.connection().connection.cursor()
+        try:
+            for start in range(0, len(rows), self.chunk_size):
+                chunk = rows[start:start + self.chunk_size]
+                if self.copy_format == 'binary':
+                    buffer = self._encode_binary(chunk, columns, column_types)
+                else:
+                    buffer = self._encode_text(chunk, columns)
+                cursor.copy_expert(statement, buffer)
+        finally:
+            cursor.close()
+
+
+class StagedTransactionWriter:
+    """
+    Loads payment transactions through payment_transactions_staging and process_staged_transactions(),
+    which classifies, alerts and summarizes the whole batch set-based instead of firing the row triggers.
+    Rows of other tables are written with COPY.
+    """
+    name = 'staged'
+    STAGING_TABLES = {'payment_transactions': 'payment_transactions_staging'}
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.copy_writer = CopyWriter('text', chunk_size)
+
+    def write(self, session: Session, model, rows: List[Dict]):
+        staging_table = self.STAGING_TABLES.get(model.__tablename__)
+        if staging_table is None:
+            self.copy_writer.write(session, model, rows)
+            return
+        if not rows:
+            return
+        batch_id = session.execute(text("SELECT nextval('payment_transactions_staging_batch_id_seq')")).scalar_one()
+        self.copy_writer.write_table(session, staging_table, [{'batch_id': batch_id, **row} for row in rows])
+        session.execute(text("SELECT process_staged_transactions(:batch_id)"), {'batch_id': batch_id})
+
+
+def get_writer(backend: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Return the row writer for a generator run; defaults to the GENERATOR_WRITER env var, then 'orm'."""
+    backend = backend or os.getenv("GENERATOR_WRITER", "orm")
+    if backend == 'orm':
+        return OrmWriter()
+    if backend == 'copy':
+        return CopyWriter('text', chunk_size)
+    if backend == 'copy_binary':
+        return CopyWriter('binary', chunk_size)
+    if backend == 'staged':
+        return StagedTransactionWriter(chunk_size)
+    raise ValueError(f"Unknown writer backend '{backend}', expected one of {WRITER_BACKENDS}")
@@ -0,0 +1,44 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional
+from sqlalchemy.orm import Session
+
+
+# Checks run at the same time, each on its own pooled connection
+CHECK_PARALLELISM = int(os.getenv("CHECK_PARALLELISM", "4"))
+
+
+class CheckResult(NamedTuple):
+    """Outcome of one check: wall time in seconds and the exception it raised, if any."""
+    name: str
+    seconds: float
+    error: Optional[Exception]
+
+
+def run_check(name: str, check: Callable[[Session], None], session_factory: Callable[[], Session]) -> CheckResult:
+    """Run one check on a session of its own, closed (and its connection returned to the pool) afterwards."""
+    started = time.perf_counter()
+    session = session_factory()
+    error = None
+    try:
+        check(session)
+    except Exception as e:
+        error = e
+    finally:
+        session.close()
+    return CheckResult(name, time.perf_counter() - started, error)
+
+
+def run_checks_concurrently(checks: Dict[str, Callable[[Session], None]], session_factory: Callable[[], Session],
+                            max_workers: int = CHECK_PARALLELISM) -> List[CheckResult]:
+    """
+    Run independent checks on a thread pool of max_workers threads, one session per check, so that
+    their queries run side by side in PostgreSQL. Every check runs even if another fails; results are
+    returned in the order of checks.
+    """
+    if max_workers <= 1:
+        return [run_check(name, check, session_factory) for name, check in checks.items()]
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='check') as pool:
+        futures = [pool.submit(run_check, name, check, session_factory) for name, check in checks.items()]
+        return [future.result() for future in futures]
@@ -0,0 +1,206 @@
+import os
+from datetime import datetime, timedelta
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy import Column, Integer, String, Table, and_, cast, false, func, or_, select, text, true
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from models import CheckWatermark
+
+
+# Incremental mode: checks only look at rows past their last high-water mark
+CHECK_INCREMENTAL = os.getenv("CHECK_INCREMENTAL", "false").lower() == "true"
+# A check whose last full sweep is older than this runs over the whole table again (0 = never)
+CHECK_FULL_SWEEP_HOURS = float(os.getenv("CHECK_FULL_SWEEP_HOURS", "24"))
+# Key ranges below a primary key watermark re-checked by later runs; the lowest are dropped beyond this count
+CHECK_PENDING_RANGES = int(os.getenv("CHECK_PENDING_RANGES", "1000"))
+
+# Watermark column per table: updated_at where rows record their changes, otherwise the primary key (new rows only)
+WATERMARK_COLUMNS = {
+    'customers': 'updated_at',
+    'bank_accounts': 'updated_at',
+    'devices': 'device_id',
+    'other_banks_customers': 'customer_id',
+    'other_banks_accounts': 'updated_at',
+    'payment_transactions': 'transaction_id',
+    'authentication_logs': 'log_id',
+    'risk_alerts': 'alert_id',
+    'daily_transaction_summaries': 'updated_at',
+}
+
+
+class CheckWindow(NamedTuple):
+    """
+    The rows of one table a check run has to look at: (low, high] of the watermark column plus the
+    pending [first, last] key ranges below low, every row on a full sweep (low is None), or none when
+    the table has not been modified since the last run. missing are the key ranges up to high without
+    a committed row yet, pending for the next run.
+    """
+    check_name: str
+    table: Table
+    column: Column
+    low: Optional[str]
+    high: Optional[str]
+    modification_count: int
+    full_sweep: bool
+    skip: bool
+    pending: Tuple[Tuple[int, int], ...] = ()
+    missing: Tuple[Tuple[int, int], ...] = ()
+
+    @property
+    def condition(self):
+        """WHERE clause selecting the window's rows of the table."""
+        if self.skip:
+            return false()
+        if self.low is None:
+            return true()
+        condition = and_(self.column > cast(self.low, self.column.type),
+                         self.column <= cast(self.high, self.column.type))
+        return or_(condition, *(self.column.between(first, last) for first, last in self.pending))
+
+    def touches(self, column: Column):
+        """WHERE clause selecting all rows sharing a value of column with the window's rows (for uniqueness checks)."""
+        if self.skip or self.low is None:
+            return self.condition
+        return column.in_(select(column).where(self.condition))
+
+
+def table_modification_count(session: Session, table_name: str) -> int:
+    """Rows inserted, updated and deleted in a table (and its partitions) according to pg_stat_user_tables."""
+    return session.execute(
+        text("""
+            SELECT COALESCE(SUM(s.n_tup_ins + s.n_tup_upd + s.n_tup_del), 0)
+            FROM pg_stat_user_tables s
+            WHERE s.relid = CAST(:table AS regclass)
+            OR s.relid IN (SELECT i.inhrelid FROM pg_inherits i WHERE i.inhparent = CAST(:table AS regclass))
+        """),
+        {'table': table_name}
+    ).scalar_one()
+
+
+def oldest_open_transaction(session: Session) -> Optional[datetime]:
+    """
+    Start of the oldest transaction still open in another session of the database. Rows it writes get an
+    updated_at (CURRENT_TIMESTAMP or set_updated_at) no earlier than this once they commit.
+    """
+    session.execute(text("SELECT pg_stat_clear_snapshot()"))  # pg_stat_activity is cached per transaction
+    return session.execute(text("""
+        SELECT CAST(MIN(a.xact_start) AS TIMESTAMP)
+        FROM pg_stat_activity a
+        WHERE a.datname = current_database()
+        AND a.backend_type = 'client backend'
+        AND a.pid <> pg_backend_pid()
+    """)).scalar_one()
+
+
+def missing_ranges(session: Session, column: Column, ranges: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    The sub-ranges of the [first, last] ranges of an integer key without a visible row: IDs still being
+    written under blocks reserved by IdBlockAllocator or another session, or never used at all.
+    """
+    ranges = list(ranges)
+    if not ranges:
+        return []
+    rows = session.execute(
+        text(f"""
+            SELECT b.id + 1, b.next_id - 1
+            FROM (
+                SELECT x.id, LEAD(x.id) OVER (PARTITION BY r.range_first ORDER BY x.id) AS next_id
+                FROM unnest(CAST(:firsts AS BIGINT[]), CAST(:lasts AS BIGINT[])) AS r(range_first, range_last)
+                CROSS JOIN LATERAL (
+                    SELECT r.range_first - 1 AS id
+                    UNION ALL
+                    SELECT t.{column.name} FROM {column.table.name} t
+                    WHERE t.{column.name} BETWEEN r.range_first AND r.range_last
+                    UNION ALL
+                    SELECT r.range_last + 1
+                ) x
+            ) b
+            WHERE b.next_id > b.id + 1
+            ORDER BY 1
+        """),
+        {'firsts': [first for first, _ in ranges], 'lasts': [last for _, last in ranges]}
+    )
+    return [(first, last) for first, last in rows]
+
+
+class WatermarkStore:
+    """Reads and advances the high-water marks of check_watermarks, one row per check and table."""
+
+    def __init__(self, incremental: bool = CHECK_INCREMENTAL, full_sweep_hours: float = CHECK_FULL_SWEEP_HOURS,
+                 full_sweep: bool = False):
+        self.incremental = incremental
+        self.full_sweep_hours = full_sweep_hours
+        self.full_sweep = full_sweep  # sweep every table now, and restart the watermarks from there
+
+    def window(self, session: Session, check_name: str, model) -> CheckWindow:
+        """
+        Window of a check over a model's table (or a Table). Without incremental mode this is always a full
+        sweep and check_watermarks is not used. A table whose pg_stat_user_tables counters have not moved
+        since the last run is skipped without scanning it; its watermark is kept, so rows whose statistics
+        were not yet flushed are picked up by the next run.
+
+        Rows may commit out of watermark order, so high never passes a row that can still appear below it:
+        an updated_at mark stays below the start of the oldest open transaction, and the primary key
+        ranges up to a key mark without a row yet are kept as pending and checked again by later runs.
+        """
+        table = getattr(model, '__table__', model)
+        column = table.c[WATERMARK_COLUMNS[table.name]]
+        if not self.incremental:
+            return CheckWindow(check_name, table, column, None, None, 0, True, False)
+
+        modification_count = table_modification_count(session, table.name)
+        mark = session.get(CheckWatermark, (check_name, table.name))
+        full_sweep = self.full_sweep or mark is None or (
+            self.full_sweep_hours > 0
+            and (mark.full_sweep_at is None
+                 or mark.full_sweep_at < datetime.now() - timedelta(hours=self.full_sweep_hours))
+        )
+        if not full_sweep and mark.modification_count == modification_count:
+            return CheckWindow(check_name, table, column, mark.high_water, mark.high_water, modification_count,
+                               False, True)
+
+        low = None if full_sweep else mark.high_water
+        pending = () if full_sweep else tuple((first, last) for first, last in mark.pending_ids)
+        if not isinstance(column.type, Integer):
+            settled = oldest_open_transaction(session)
+            statement = select(cast(func.max(column), String))
+            if low is not None:
+                statement = statement.where(column > cast(low, column.type))
+            if settled is not None:
+                statement = statement.where(column < settled)
+            high = session.execute(statement).scalar_one()
+            return CheckWindow(check_name, table, column, low, high or low, modification_count, full_sweep, False)
+
+        first, high = session.execute(select(func.min(column), func.max(column))).one()
+        if low is not None:
+            first, high = int(low) + 1, max(high or 0, int(low))
+        ranges = list(pending) + ([(first, high)] if high is not None and first <= high else [])
+        missing = missing_ranges(session, column, ranges)[-CHECK_PENDING_RANGES:] if CHECK_PENDING_RANGES else []
+        high = str(high) if high is not None else low
+        return CheckWindow(check_name, table, column, low, high, modification_count, full_sweep, False,
+                           pending, tuple(missing))
+
+    def advance(self, session: Session, windows: Iterable[CheckWindow]):
+        """Record the windows a check has finished, and commit."""
+        if not self.incremental:
+            return
+        now = datetime.now()
+        for window in windows:
+            if window.skip:
+                continue
+            values = {
+                'check_name': window.check_name,
+                'table_name': window.table.name,
+                'high_water': window.high,
+                'pending_ids': [list(ids) for ids in window.missing],
+                'modification_count': window.modification_count,
+                'updated_at': now,
+            }
+            if window.full_sweep:
+                values['full_sweep_at'] = now
+            statement = insert(CheckWatermark).values(**values)
+            session.execute(statement.on_conflict_do_update(
+                index_elements=['check_name', 'table_name'],
+                set_={key: statement.excluded[key] for key in values if key not in ('check_name', 'table_name')}
+            ))
+        session.commit()
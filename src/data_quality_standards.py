@@ -1,12 +1,14 @@
 import logging
 import os
+from functools import partial
 from logging.handlers import TimedRotatingFileHandler
-from sqlalchemy import create_engine, func, select
+from sqlalchemy import create_engine, select, true
 from sqlalchemy.orm import sessionmaker
-from models import (
-    Customer, BankAccount, Device, PaymentTransaction
-)
-import re
+from models import Base, Customer, PaymentTransaction
+from dq_rules import evaluate_table_rules, rules_by_table
+from fk_checks import ForeignKeyRule, find_foreign_key_violations, foreign_key_rules
+from check_scheduler import CHECK_PARALLELISM, run_checks_concurrently
+from check_watermarks import CHECK_INCREMENTAL, WATERMARK_COLUMNS, WatermarkStore
 from datetime import datetime
 from rich.console import Console
 from rich.table import Table
@@ -46,14 +48,16 @@ db_params = {
     'port': '5432'
 }
 connection_string = f"postgresql://{db_params['user']}:{db_params['password']}@{db_params['host']}:{db_params['port']}/{db_params['dbname']}"
-engine = create_engine(connection_string)
+engine = create_engine(connection_string, pool_size=max(5, CHECK_PARALLELISM))
 Session = sessionmaker(bind=engine)
 console = Console()
 
 
 class DataQualityChecker:
-    def __init__(self):
+    def __init__(self, incremental: bool = CHECK_INCREMENTAL, full_sweep: bool = False):
         self.issues = []
+        self.check_seconds = {}
+        self.watermarks = WatermarkStore(incremental, full_sweep=full_sweep)
         self.session = Session()
         logger.info("Initialized DataQualityChecker")
 
@@ -69,177 +73,80 @@ class DataQualityChecker:
         logger.warning(
             f"Data quality issue - Type: {check_type}, Table: {table}, ID: {record_id or 'N/A'}, Description: {description}")
 
-    def check_null_values(self):
-        """Check for null values in critical fields"""
-        logger.info("Starting null values check")
+    def check_table_rules(self, table: str, session=None):
+        """Evaluate the DQ_RULES of a table (nulls, uniqueness, formats) with one aggregate query"""
+        session = session or self.session
+        logger.info(f"Starting rule check of {table}")
         try:
-            # Customer checks
-            customer_nulls = self.session.execute(
-                select(Customer).where(
-                    (Customer.customer_id.is_(None)) |
-                    (Customer.customer_type.is_(None)) |
-                    (Customer.tax_code.is_(None)) |
-                    (Customer.full_name.is_(None)) |
-                    (Customer.phone_number.is_(None)) |
-                    (Customer.status.is_(None))
-                )
-            ).scalars().all()
-            for customer in customer_nulls:
-                self.log_issue("null_check", "customers",
-                               f"Null values in critical fields for customer_id: {customer.customer_id}",
-                               str(customer.customer_id))
-            logger.info(f"Found {len(customer_nulls)} null issues in customers table")
-
-            # BankAccount checks
-            account_nulls = self.session.execute(
-                select(BankAccount).where(
-                    (BankAccount.account_id.is_(None)) |
-                    (BankAccount.customer_id.is_(None)) |
-                    (BankAccount.account_number.is_(None)) |
-                    (BankAccount.account_type.is_(None)) |
-                    (BankAccount.status.is_(None))
-                )
-            ).scalars().all()
-            for account in account_nulls:
-                self.log_issue("null_check", "bank_accounts",
-                               f"Null values in critical fields for account_id: {account.account_id}",
-                               str(account.account_id))
-            logger.info(f"Found {len(account_nulls)} null issues in bank_accounts table")
-
-            # Device checks
-            device_nulls = self.session.execute(
-                select(Device).where(
-                    (Device.device_id.is_(None)) |
-                    (Device.customer_id.is_(None)) |
-                    (Device.device_type.is_(None)) |
-                    (Device.device_identifier.is_(None)) |
-                    (Device.status.is_(None))
-                )
-            ).scalars().all()
-            for device in device_nulls:
-                self.log_issue("null_check", "devices",
-                               f"Null values in critical fields for device_id: {device.device_id}",
-                               str(device.device_id))
-            logger.info(f"Found {len(device_nulls)} null issues in devices table")
-        except Exception as e:
-            logger.error(f"Error in null values check: {str(e)}")
-            raise
-
-    def check_uniqueness(self):
-        """Check uniqueness constraints"""
-        logger.info("Starting uniqueness check")
-        try:
-            # CCCD uniqueness (for individuals)
-            cccd_counts = self.session.execute(
-                select(Customer.cccd_number, func.count())
-                .where(Customer.cccd_number.is_not(None))
-                .group_by(Customer.cccd_number)
-                .having(func.count() > 1)
-            ).all()
-            for cccd, count in cccd_counts:
-                self.log_issue("uniqueness_check", "customers",
-                               f"Duplicate CCCD number: {cccd} (count: {count})", cccd)
-            logger.info(f"Found {len(cccd_counts)} CCCD uniqueness issues")
-
-            # Tax code uniqueness
-            tax_counts = self.session.execute(
-                select(Customer.tax_code, func.count())
-                .group_by(Customer.tax_code)
-                .having(func.count() > 1)
-            ).all()
-            for tax_code, count in tax_counts:
-                self.log_issue("uniqueness_check", "customers",
-                               f"Duplicate tax code: {tax_code} (count: {count})", tax_code)
-            logger.info(f"Found {len(tax_counts)} tax code uniqueness issues")
-
-            # Phone number uniqueness
-            phone_counts = self.session.execute(
-                select(Customer.phone_number, func.count())
-                .group_by(Customer.phone_number)
-                .having(func.count() > 1)
-            ).all()
-            for phone, count in phone_counts:
-                self.log_issue("uniqueness_check", "customers",
-                               f"Duplicate phone number: {phone} (count: {count})", phone)
-            logger.info(f"Found {len(phone_counts)} phone number uniqueness issues")
-
-            # Account number uniqueness
-            account_counts = self.session.execute(
-                select(BankAccount.account_number, func.count())
-                .group_by(BankAccount.account_number)
-                .having(func.count() > 1)
-            ).all()
-            for account_num, count in account_counts:
-                self.log_issue("uniqueness_check", "bank_accounts",
-                               f"Duplicate account number: {account_num} (count: {count})", account_num)
-            logger.info(f"Found {len(account_counts)} account number uniqueness issues")
+            key = list(Base.metadata.tables[table].primary_key.columns)[0].name
+            window = self.watermarks.window(session, 'rules', Base.metadata.tables[table])
+            for result in evaluate_table_rules(session, table, window=window):
+                rule = result.rule
+                column = ', '.join(rule.columns)
+                for sample in result.samples:
+                    if rule.kind == 'not_null':
+                        self.log_issue("null_check", table, f"Null values in {column} for {key}: {sample}", str(sample))
+                    elif rule.kind == 'unique':
+                        self.log_issue("uniqueness_check", table, f"Duplicate {column}: {sample}", str(sample))
+                    else:
+                        self.log_issue("format_check", table, f"Invalid {column} format for {key}: {sample}", str(sample))
+                if result.violations > len(result.samples):
+                    self.log_issue(f"{rule.kind}_check", table,
+                                   f"{result.violations - len(result.samples)} more {rule.name} violations not listed")
+                logger.info(f"Found {result.violations} {rule.name} violations")
+            self.watermarks.advance(session, [window])
         except Exception as e:
-            logger.error(f"Error in uniqueness check: {str(e)}")
+            logger.error(f"Error in rule check of {table}: {str(e)}")
             raise
 
-    def check_cccd_format(self):
-        """Validate CCCD format (12 digits)"""
-        logger.info("Starting CCCD format check")
+    def check_foreign_key(self, rule: ForeignKeyRule, session=None):
+        """Check one model foreign key with chunked NOT EXISTS anti-joins"""
+        session = session or self.session
+        logger.info(f"Starting foreign key check of {rule.name}")
         try:
-            cccd_pattern = re.compile(r'^\d{12}$')
-            customers = self.session.execute(
-                select(Customer).where(Customer.cccd_number.is_not(None))
-            ).scalars().all()
-            invalid_cccds = 0
-            for customer in customers:
-                if not cccd_pattern.match(customer.cccd_number):
-                    self.log_issue("format_check", "customers",
-                                   f"Invalid CCCD format for customer_id: {customer.customer_id} (CCCD: {customer.cccd_number})",
-                                   str(customer.customer_id))
-                    invalid_cccds += 1
-            logger.info(f"Found {invalid_cccds} invalid CCCD formats")
+            # Incremental runs check the new or changed child rows; references broken by deleting a
+            # parent row are found by the periodic full sweep. Tables without a watermark column are always swept.
+            window = None
+            if rule.table.name in WATERMARK_COLUMNS:
+                window = self.watermarks.window(session, f'foreign_key:{rule.name}', rule.table)
+            if window is None or not window.skip:
+                condition = window.condition if window is not None else true()
+                result = find_foreign_key_violations(session, rule, condition)
+                columns = ', '.join(rule.columns)
+                for record_id, *values in result.samples:
+                    self.log_issue("foreign_key_check", rule.table.name,
+                                   f"Invalid {columns}: {', '.join(map(str, values))} for {rule.key.name}: {record_id}",
+                                   str(record_id))
+                if result.violations > len(result.samples):
+                    self.log_issue("foreign_key_check", rule.table.name,
+                                   f"{result.violations - len(result.samples)} more invalid {columns} not listed")
+                logger.info(f"Found {result.violations} invalid foreign keys in {rule.name}")
+            if window is not None:
+                self.watermarks.advance(session, [window])
         except Exception as e:
-            logger.error(f"Error in CCCD format check: {str(e)}")
+            logger.error(f"Error in foreign key check of {rule.name}: {str(e)}")
             raise
 
-    def check_foreign_key_integrity(self):
-        """Check foreign key constraints"""
-        logger.info("Starting foreign key integrity check")
+    def check_customer_type_consistency(self, session=None):
+        """Check that the customer_type copied onto each transaction matches its customer"""
+        session = session or self.session
+        logger.info("Starting customer_type consistency check")
         try:
-            # BankAccount customer_id
-            invalid_accounts = self.session.execute(
-                select(BankAccount).where(
-                    ~BankAccount.customer_id.in_(select(Customer.customer_id))
-                )
-            ).scalars().all()
-            for account in invalid_accounts:
-                self.log_issue("foreign_key_check", "bank_accounts",
-                               f"Invalid customer_id: {account.customer_id} for account_id: {account.account_id}",
-                               str(account.account_id))
-            logger.info(f"Found {len(invalid_accounts)} invalid foreign keys in bank_accounts")
-
-            # Device customer_id
-            invalid_devices = self.session.execute(
-                select(Device).where(
-                    ~Device.customer_id.in_(select(Customer.customer_id))
-                )
-            ).scalars().all()
-            for device in invalid_devices:
-                self.log_issue("foreign_key_check", "devices",
-                               f"Invalid customer_id: {device.customer_id} for device_id: {device.device_id}",
-                               str(device.device_id))
-            logger.info(f"Found {len(invalid_devices)} invalid foreign keys in devices")
-
-            # PaymentTransaction checks
-            invalid_transactions = self.session.execute(
-                select(PaymentTransaction).where(
-                    (~PaymentTransaction.from_account_id.in_(select(BankAccount.account_id))) |
-                    (~PaymentTransaction.customer_id.in_(select(Customer.customer_id))) |
-                    (~PaymentTransaction.device_id.in_(select(Device.device_id)))
-                )
-            ).scalars().all()
-            for tx in invalid_transactions:
+            window = self.watermarks.window(session, 'customer_type_consistency', PaymentTransaction)
+            mismatched_types = session.execute(
+                select(PaymentTransaction.transaction_id, PaymentTransaction.customer_type, Customer.customer_type)
+                .join(Customer, PaymentTransaction.customer_id == Customer.customer_id)
+                .where(window.condition)
+                .where(PaymentTransaction.customer_type != Customer.customer_type)
+            ).all()
+            for transaction_id, transaction_type, customer_type in mismatched_types:
                 self.log_issue("foreign_key_check", "payment_transactions",
-                               f"Invalid foreign key in transaction_id: {tx.transaction_id}",
-                               str(tx.transaction_id))
-            logger.info(f"Found {len(invalid_transactions)} invalid foreign keys in payment_transactions")
+                               f"customer_type {transaction_type} differs from customer's {customer_type} for transaction_id: {transaction_id}",
+                               str(transaction_id))
+            logger.info(f"Found {len(mismatched_types)} customer_type mismatches in payment_transactions")
+            self.watermarks.advance(session, [window])
         except Exception as e:
-            logger.error(f"Error in foreign key check: {str(e)}")
+            logger.error(f"Error in customer_type consistency check: {str(e)}")
             raise
 
     def generate_summary(self) -> Table:
@@ -263,15 +170,25 @@ class DataQualityChecker:
         logger.info(f"Summary table generated with {len(self.issues)} issues")
         return table
 
-    def run_checks(self):
-        """Run all data quality checks"""
+    def run_checks(self, max_workers: int = CHECK_PARALLELISM):
+        """Run all data quality checks, up to max_workers at a time, each on its own session"""
         logger.info("Starting all data quality checks")
         console.print("[bold green]Starting Data Quality Checks...[/bold green]")
         try:
-            self.check_null_values()
-            self.check_uniqueness()
-            self.check_cccd_format()
-            self.check_foreign_key_integrity()
+            checks = {
+                f'rules:{table}': partial(self.check_table_rules, table) for table in rules_by_table()
+            }
+            checks.update(
+                (f'foreign_key:{rule.name}', partial(self.check_foreign_key, rule)) for rule in foreign_key_rules()
+            )
+            checks['customer_type_consistency'] = self.check_customer_type_consistency
+            results = run_checks_concurrently(checks, Session, max_workers)
+            for result in results:
+                self.check_seconds[result.name] = result.seconds
+                logger.info(f"Check {result.name} took {result.seconds:.2f}s")
+            for result in results:
+                if result.error is not None:
+                    raise result.error
             console.print("[bold green]Data Quality Checks Completed[/bold green]")
             console.print(self.generate_summary())
             logger.info("All data quality checks completed successfully")
@@ -0,0 +1,165 @@
+import os
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from sqlalchemy import Table, and_, distinct, func, or_, select, true
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from models import Base
+from format_checks import FormatRule, find_format_violations, format_rules
+
+
+# Violating IDs (or duplicated values) returned per rule
+DQ_SAMPLE_SIZE = int(os.getenv("DQ_SAMPLE_SIZE", "100"))
+
+
+class DQRule(NamedTuple):
+    """
+    A declarative data quality rule on one table:
+    not_null (any of columns is NULL), unique (non-null value of the column shared by several rows),
+    format (non-null value of the column not matching pattern, a PostgreSQL regular expression).
+    """
+    kind: str
+    table: str
+    columns: Tuple[str, ...]
+    pattern: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.kind}:{self.table}.{'+'.join(self.columns)}"
+
+
+class RuleResult(NamedTuple):
+    """
+    Violations of a rule (violating rows; duplicated values for unique rules) and up to DQ_SAMPLE_SIZE
+    samples of them (IDs; the duplicated values for unique rules).
+    """
+    rule: DQRule
+    violations: int
+    samples: List
+
+
+def not_null(table: str, *columns: str) -> DQRule:
+    return DQRule('not_null', table, columns)
+
+
+def unique(table: str, column: str) -> DQRule:
+    return DQRule('unique', table, (column,))
+
+
+def matches(table: str, column: str, pattern: str) -> DQRule:
+    return DQRule('format', table, (column,), pattern)
+
+
+# The rule registry. A rule added here is evaluated in the same scan as the other rules of its table.
+DQ_RULES = [
+    not_null('customers', 'customer_id', 'customer_type', 'tax_code', 'full_name', 'phone_number', 'status'),
+    not_null('bank_accounts', 'account_id', 'customer_id', 'account_number', 'account_type', 'status'),
+    not_null('devices', 'device_id', 'customer_id', 'device_type', 'device_identifier', 'status'),
+    unique('customers', 'cccd_number'),
+    unique('customers', 'tax_code'),
+    unique('customers', 'phone_number'),
+    unique('bank_accounts', 'account_number'),
+] + [matches(rule.table.name, rule.column, rule.pattern) for rule in format_rules()]
+
+
+def rules_by_table(rules: Sequence[DQRule] = None) -> Dict[str, List[DQRule]]:
+    grouped = {}
+    for rule in DQ_RULES if rules is None else rules:
+        grouped.setdefault(rule.table, []).append(rule)
+    return grouped
+
+
+def compile_table_rules(table: Table, rules: Sequence[DQRule], window=None) -> Select:
+    """
+    Compile all rules of a table into one aggregate query over a single scan: one COUNT(*) FILTER (WHERE ...)
+    per rule. Uniqueness is a COUNT(*) OVER (PARTITION BY column) in the scanned subquery, so duplicates need
+    no separate GROUP BY query.
+
+    With a CheckWindow (check_watermarks.py), not_null and format rules only look at the window's rows and
+    unique rules at the values the window's rows share with any row of the table.
+    """
+    key = list(table.primary_key.columns)[0]
+    in_window = window.condition if window is not None else true()
+    unique_rules = [rule for rule in rules if rule.kind == 'unique']
+
+    columns = {key.name: key}
+    for rule in rules:
+        columns.update((name, table.c[name]) for name in rule.columns)
+    scanned = [*columns.values(), in_window.label('in_window')]
+    for i, rule in enumerate(unique_rules):
+        column = table.c[rule.columns[0]]
+        scanned.append(func.count().over(partition_by=column).label(f'duplicates_{i}'))
+        scanned.append(func.bool_or(in_window).over(partition_by=column).label(f'touched_{i}'))
+    scan_condition = true() if window is None else or_(
+        window.condition, *(window.touches(table.c[rule.columns[0]]) for rule in unique_rules)
+    )
+    rows = select(*scanned).where(scan_condition).subquery('rows')
+
+    aggregates = []
+    for rule in rules:
+        if rule.kind == 'not_null':
+            violated = and_(rows.c.in_window, or_(*(rows.c[name].is_(None) for name in rule.columns)))
+            count = func.count()
+        elif rule.kind == 'format':
+            column = rows.c[rule.columns[0]]
+            violated = and_(rows.c.in_window, column.is_not(None), ~column.regexp_match(rule.pattern))
+            count = func.count()
+        elif rule.kind == 'unique':
+            i = unique_rules.index(rule)
+            column = rows.c[rule.columns[0]]
+            violated = and_(column.is_not(None), rows.c[f'duplicates_{i}'] > 1, rows.c[f'touched_{i}'])
+            count = func.count(distinct(column))
+        else:
+            raise ValueError(f"Unknown rule kind '{rule.kind}' in {rule.name}")
+        aggregates.append(count.filter(violated))
+    return select(*aggregates).select_from(rows)
+
+
+def find_rule_samples(session: Session, table: Table, rule: DQRule, window=None,
+                      sample_size: int = DQ_SAMPLE_SIZE) -> List:
+    """
+    The first sample_size samples of a violated rule, in key (or value) order: IDs, or the duplicated
+    values of a unique rule. A separate LIMIT query, so only the samples leave the server.
+    """
+    key = list(table.primary_key.columns)[0]
+    in_window = window.condition if window is not None else true()
+    if rule.kind == 'format':
+        violations = find_format_violations(session, FormatRule(table, rule.columns[0], rule.pattern),
+                                            sample_size, in_window)
+        return [record_id for record_id, _ in violations.rows]
+    if rule.kind == 'not_null':
+        statement = (
+            select(key)
+            .where(in_window, or_(*(table.c[name].is_(None) for name in rule.columns)))
+            .order_by(key)
+        )
+    else:
+        column = table.c[rule.columns[0]]
+        touched = window.touches(column) if window is not None else true()
+        statement = (
+            select(column)
+            .where(column.is_not(None), touched)
+            .group_by(column)
+            .having(func.count() > 1)
+            .order_by(column)
+        )
+    return session.scalars(statement.limit(sample_size)).all()
+
+
+def evaluate_table_rules(session: Session, table_name: str, rules: Sequence[DQRule] = None, window=None,
+                         sample_size: int = DQ_SAMPLE_SIZE) -> List[RuleResult]:
+    """
+    Evaluate the rules of one table (default: its DQ_RULES): one query counts the violations of every
+    rule, then a bounded query per violated rule fetches its samples.
+    """
+    rules = rules_by_table(rules).get(table_name, [])
+    if not rules:
+        return []
+    if window is not None and window.skip:
+        return [RuleResult(rule, 0, []) for rule in rules]
+    table = Base.metadata.tables[table_name]
+    counts = session.execute(compile_table_rules(table, rules, window)).one()
+    return [
+        RuleResult(rule, violations,
+                   find_rule_samples(session, table, rule, window, sample_size) if violations else [])
+        for rule, violations in zip(rules, counts)
+    ]
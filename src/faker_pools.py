@@ -0,0 +1,84 @@
+import gzip
+import os
+import random
+import time
+from typing import Dict, List, Optional
+from faker import Faker
+
+
+# Values per pool; 0 disables pooling and calls Faker for every row
+POOL_SIZE = int(os.getenv("FAKER_POOL_SIZE", "20000"))
+# Pools older than this are rebuilt on first use; 0 rebuilds them on every run
+POOL_MAX_AGE_HOURS = float(os.getenv("FAKER_POOL_MAX_AGE_HOURS", "168"))
+POOL_DIR = os.getenv(
+    "FAKER_POOL_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'faker_pools')
+)
+# Faker values never contain NUL, so it is safe as a separator (addresses contain newlines)
+SEPARATOR = '\0'
+
+
+class FakerPoolCache:
+    """
+    Pools of pre-generated Faker values ('name', 'company', 'address', 'email', 'sentence', ...).
+    Each pool is built once with Faker, stored gzip-compressed on disk and then sampled with
+    random.randrange, so per-row cost is one index draw and runs seeded through `random` stay reproducible.
+    """
+
+    def __init__(self, locale: str = 'vi_VN', pool_size: int = POOL_SIZE,
+                 max_age_hours: float = POOL_MAX_AGE_HOURS, pool_dir: str = POOL_DIR):
+        self.locale = locale
+        self.pool_size = pool_size
+        self.max_age_hours = max_age_hours
+        self.pool_dir = pool_dir
+        self.pools: Dict[str, List[str]] = {}
+        self._fake: Optional[Faker] = None
+
+    @property
+    def fake(self) -> Faker:
+        # Separate Faker instance, so building pools does not consume the generators' seeded Faker
+        if self._fake is None:
+            self._fake = Faker(self.locale)
+        return self._fake
+
+    def _path(self, provider: str) -> str:
+        return os.path.join(self.pool_dir, f"{self.locale}_{provider}_{self.pool_size}.txt.gz")
+
+    def _is_fresh(self, path: str) -> bool:
+        if not os.path.exists(path) or self.max_age_hours <= 0:
+            return False
+        return time.time() - os.path.getmtime(path) < self.max_age_hours * 3600
+
+    def build(self, provider: str) -> List[str]:
+        """Generate a pool with Faker and store it on disk (written to a temp file, then renamed)."""
+        generate = getattr(self.fake, provider)
+        values = [generate() for _ in range(self.pool_size)]
+        os.makedirs(self.pool_dir, exist_ok=True)
+        path = self._path(provider)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            f.write(SEPARATOR.join(values))
+        os.replace(tmp_path, path)
+        return values
+
+    def load(self, provider: str) -> List[str]:
+        path = self._path(provider)
+        if self._is_fresh(path):
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                values = f.read().split(SEPARATOR)
+            if len(values) == self.pool_size:
+                return values
+        return self.build(provider)
+
+    def refresh(self, *providers: str):
+        """Rebuild the given pools (all loaded pools if none are given)."""
+        for provider in providers or list(self.pools):
+            self.pools[provider] = self.build(provider)
+
+    def sample(self, provider: str) -> str:
+        if self.pool_size <= 0:
+            return getattr(self.fake, provider)()
+        pool = self.pools.get(provider)
+        if pool is None:
+            pool = self.pools[provider] = self.load(provider)
+        return pool[random.randrange(len(pool))]
@@ -0,0 +1,107 @@
+import os
+from typing import Iterator, List, NamedTuple, Tuple
+from sqlalchemy import Table, and_, exists, func, select, true
+from sqlalchemy.orm import Session
+from models import Base
+from dq_rules import DQ_SAMPLE_SIZE
+
+
+# Primary key values of the child table covered by one anti-join query
+FK_CHUNK_SIZE = int(os.getenv("FK_CHUNK_SIZE", "1000000"))
+
+
+class ForeignKeyRule(NamedTuple):
+    """
+    A reference declared on the models: every row of table whose columns are all non-null must find a row
+    of referred with the same referred_columns. Also finds references broken while the database did not
+    check them (triggers or constraints disabled during a load).
+    """
+    table: Table
+    columns: Tuple[str, ...]
+    referred: Table
+    referred_columns: Tuple[str, ...]
+
+    @property
+    def name(self) -> str:
+        return f"{self.table.name}.{'+'.join(self.columns)}"
+
+    @property
+    def key(self):
+        """Primary key column the child table is chunked by (the first one of a composite key)."""
+        return list(self.table.primary_key.columns)[0]
+
+
+class ForeignKeyViolations(NamedTuple):
+    """Number of dangling references and up to DQ_SAMPLE_SIZE of them as (id, *column values), in id order."""
+    rule: ForeignKeyRule
+    violations: int
+    samples: List[Tuple]
+
+
+def foreign_key_rules(metadata=Base.metadata) -> List[ForeignKeyRule]:
+    """One rule per ForeignKeyConstraint of the models, in dependency order of the tables."""
+    return [
+        ForeignKeyRule(
+            table,
+            tuple(constraint.column_keys),
+            constraint.referred_table,
+            tuple(element.column.name for element in constraint.elements),
+        )
+        for table in metadata.sorted_tables
+        for constraint in sorted(table.foreign_key_constraints, key=lambda constraint: constraint.column_keys)
+    ]
+
+
+def chunk_ranges(session: Session, rule: ForeignKeyRule, condition=true(),
+                 chunk_size: int = FK_CHUNK_SIZE) -> Iterator[Tuple[int, int]]:
+    """[low, high) primary key ranges of chunk_size covering the child rows matching condition."""
+    low, high = session.execute(select(func.min(rule.key), func.max(rule.key)).where(condition)).one()
+    if low is None:
+        return
+    for start in range(low, high + 1, chunk_size):
+        yield start, start + chunk_size
+
+
+def compile_chunk_check(rule: ForeignKeyRule, low: int, high: int, condition=true(),
+                        sample_size: int = DQ_SAMPLE_SIZE):
+    """
+    NOT EXISTS anti-join of one primary key range of the child table against the referred table.
+    COUNT(*) OVER () counts every violation of the range before LIMIT keeps the first sample_size.
+    """
+    columns = [rule.table.c[name] for name in rule.columns]
+    referred = [rule.referred.c[name] for name in rule.referred_columns]
+    return (
+        select(rule.key, *columns, func.count().over())
+        .where(rule.key >= low, rule.key < high)
+        .where(condition)
+        .where(*(column.is_not(None) for column in columns))
+        .where(~exists().where(and_(*(parent_column == column for parent_column, column in zip(referred, columns)))))
+        .order_by(rule.key)
+        .limit(sample_size)
+    )
+
+
+def find_chunk_violations(session: Session, rule: ForeignKeyRule, low: int, high: int, condition=true(),
+                          sample_size: int = DQ_SAMPLE_SIZE) -> ForeignKeyViolations:
+    """Evaluate one chunk; chunks of a rule are independent and can run on separate sessions."""
+    samples, violations = [], 0
+    for *sample, violations in session.execute(compile_chunk_check(rule, low, high, condition, sample_size)):
+        samples.append(tuple(sample))
+    return ForeignKeyViolations(rule, violations, samples)
+
+
+def find_foreign_key_violations(session: Session, rule: ForeignKeyRule, condition=true(),
+                                chunk_size: int = FK_CHUNK_SIZE,
+                                sample_size: int = DQ_SAMPLE_SIZE) -> ForeignKeyViolations:
+    """
+    Check a rule chunk by chunk over the child rows matching condition. Each chunk is its own short
+    transaction, so a long audit neither holds one snapshot nor one huge hash of the child table.
+    """
+    samples, violations = [], 0
+    for low, high in chunk_ranges(session, rule, condition, chunk_size):
+        # LIMIT 1 once the samples are complete still returns the chunk's COUNT(*) OVER ()
+        chunk = find_chunk_violations(session, rule, low, high, condition, max(sample_size - len(samples), 1))
+        violations += chunk.violations
+        samples.extend(chunk.samples[:sample_size - len(samples)])
+        session.commit()
+    return ForeignKeyViolations(rule, violations, samples)
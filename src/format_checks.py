@@ -0,0 +1,80 @@
+import os
+import re
+from typing import List, NamedTuple, Tuple
+from sqlalchemy import CheckConstraint, Table, func, select, true
+from sqlalchemy.orm import Session
+from models import Base
+
+
+# Violations kept per rule (all of them are counted) and rows fetched per round trip of the server-side cursor
+FORMAT_VIOLATION_LIMIT = int(os.getenv("FORMAT_VIOLATION_LIMIT", "1000"))
+FORMAT_FETCH_SIZE = int(os.getenv("FORMAT_FETCH_SIZE", "500"))
+
+# "<column> ~ '<pattern>'" check constraints of the models
+REGEX_CONSTRAINT = re.compile(r"^(\w+) ~ '(.+)'$")
+
+# Formats the models do not enforce, as produced by the generators
+EXTRA_FORMATS = (
+    ('customers', 'email', r'^[^@[:space:]]+@[^@[:space:]]+\.[^@[:space:]]+$'),
+    ('bank_accounts', 'account_number', r'^TIMO[0-9]{16}$'),
+    ('other_banks_accounts', 'account_number', r'^[A-Z]{3,4}[0-9]{10}$'),
+)
+
+
+class FormatRule(NamedTuple):
+    """A PostgreSQL regular expression that non-null values of table.column must match."""
+    table: Table
+    column: str
+    pattern: str
+
+    @property
+    def name(self) -> str:
+        return f"{self.table.name}.{self.column}"
+
+
+class FormatViolations(NamedTuple):
+    """(id, value) of the first violating rows, in id order, and the total number of violations."""
+    rule: FormatRule
+    rows: List[Tuple]
+    total: int
+
+
+def model_format_rules(metadata=Base.metadata) -> List[FormatRule]:
+    """Format rules of the regex CheckConstraints declared on the models (CCCD, tax code, phone)."""
+    rules = []
+    for table in metadata.sorted_tables:
+        for constraint in table.constraints:
+            match = REGEX_CONSTRAINT.match(str(constraint.sqltext)) if isinstance(constraint, CheckConstraint) else None
+            if match:
+                rules.append(FormatRule(table, *match.groups()))
+    return rules
+
+
+def format_rules(metadata=Base.metadata) -> List[FormatRule]:
+    """All format rules: the model constraints plus EXTRA_FORMATS (email, account numbers)."""
+    return model_format_rules(metadata) + [
+        FormatRule(metadata.tables[table], column, pattern) for table, column, pattern in EXTRA_FORMATS
+    ]
+
+
+def find_format_violations(session: Session, rule: FormatRule, limit: int = FORMAT_VIOLATION_LIMIT,
+                           condition=true()) -> FormatViolations:
+    """
+    Evaluate a format rule in the database, over the rows matching condition. Only violating rows leave
+    the server, read through a server-side cursor; at most limit of them are kept, COUNT(*) OVER () gives the total.
+    """
+    key = list(rule.table.primary_key.columns)[0]
+    column = rule.table.c[rule.column]
+    statement = (
+        select(key, column, func.count().over())
+        .where(condition)
+        .where(column.is_not(None))
+        .where(~column.regexp_match(rule.pattern))
+        .order_by(key)
+        .limit(limit)
+        .execution_options(yield_per=FORMAT_FETCH_SIZE)
+    )
+    rows, total = [], 0
+    for record_id, value, total in session.execute(statement):
+        rows.append((record_id, value))
+    return FormatViolations(rule, rows, total)
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, func, select, text
+from sqlalchemy import create_engine, select
 from sqlalchemy.orm import sessionmaker
 from faker import Faker
 import random
@@ -6,6 +6,10 @@ from rich.progress import track
 from datetime import datetime
 from typing import List, Dict
 from models import Banks, OtherBanksCustomers, OtherBanksAccounts
+from key_registry import UniquenessRegistry
+from faker_pools import FakerPoolCache
+from id_allocator import IdBlockAllocator
+from bulk_writer import get_writer
 from dotenv import load_dotenv
 import os
 
@@ -15,6 +19,7 @@ load_dotenv()
 
 # Initialize Faker for realistic Vietnamese data
 fake = Faker('vi_VN')
+fake_pools = FakerPoolCache('vi_VN')
 random.seed()
 
 # Database connection parameters
@@ -32,14 +37,18 @@ engine = create_engine(connection_string)
 Session = sessionmaker(bind=engine)
 
 # Helper functions
-generated_cccds = set()
-generated_phones = set()
-generated_accounts = set()
+generated_cccds = UniquenessRegistry(OtherBanksCustomers.cccd_number)
+generated_phones = UniquenessRegistry(OtherBanksCustomers.phone_number)
+generated_accounts = UniquenessRegistry(OtherBanksAccounts.account_number)
+
+
+id_allocators = {}
 
 
 def get_next_id(session: Session, sequence_name: str) -> int:
-    sql = f"SELECT nextval('{sequence_name}')"
-    return session.execute(text(sql)).scalar()
+    if sequence_name not in id_allocators:
+        id_allocators[sequence_name] = IdBlockAllocator(sequence_name)
+    return id_allocators[sequence_name].next_id(session)
 
 
 def generate_random_digits(length: int) -> str:
@@ -47,43 +56,16 @@ def generate_random_digits(length: int) -> str:
 
 
 def random_cccd(session: Session) -> str:
-    while True:
-        cccd = generate_random_digits(12)
-        if cccd in generated_cccds:
-            continue
-        exists = session.execute(
-            select(func.count()).where(OtherBanksCustomers.cccd_number == cccd)
-        ).scalar_one_or_none()
-        if exists == 0:
-            generated_cccds.add(cccd)
-            return cccd
+    return generated_cccds.claim(session, lambda: generate_random_digits(12))
 
 
 def random_phone_number(session: Session) -> str:
     prefixes = ['090', '091', '093', '094', '096', '097', '098']
-    while True:
-        phone = f"{random.choice(prefixes)}{generate_random_digits(7)}"
-        if phone in generated_phones:
-            continue
-        exists = session.execute(
-            select(func.count()).where(OtherBanksCustomers.phone_number == phone)
-        ).scalar_one_or_none()
-        if exists == 0:
-            generated_phones.add(phone)
-            return phone
+    return generated_phones.claim(session, lambda: f"{random.choice(prefixes)}{generate_random_digits(7)}")
 
 
 def random_account_number(session: Session, bank_code: str) -> str:
-    while True:
-        account_number = f"{bank_code}{generate_random_digits(10)}"
-        if account_number in generated_accounts:
-            continue
-        exists = session.execute(
-            select(func.count()).where(OtherBanksAccounts.account_number == account_number)
-        ).scalar_one_or_none()
-        if exists == 0:
-            generated_accounts.add(account_number)
-            return account_number
+    return generated_accounts.claim(session, lambda: f"{bank_code}{generate_random_digits(10)}")
 
 
 # Retrieve existing banks
@@ -96,7 +78,7 @@ def get_existing_banks(session: Session) -> List[Dict]:
 
 
 # Populate other_banks_customers
-def populate_other_banks_customers(session: Session, banks: List[Dict]) -> List[Dict]:
+def populate_other_banks_customers(session: Session, banks: List[Dict], writer=None) -> List[Dict]:
     customers = []
     customer_counts = {bank['bank_code']: 60 if bank['is_domestic'] else 30 for bank in banks}
 
@@ -107,7 +89,7 @@ def populate_other_banks_customers(session: Session, banks: List[Dict]) -> List[
         for _ in range(num_customers):
             customer_id = get_next_id(session, 'other_banks_customers_customer_id_seq')
             cccd_number = random_cccd(session)
-            full_name = fake.name()
+            full_name = fake_pools.sample('name')
             phone_number = random_phone_number(session)
 
             customers.append({
@@ -119,12 +101,13 @@ def populate_other_banks_customers(session: Session, banks: List[Dict]) -> List[
                 'created_at': datetime.now()
             })
 
-    session.bulk_insert_mappings(OtherBanksCustomers, customers)
+    (writer or get_writer()).write(session, OtherBanksCustomers, customers)
     return customers
 
 
 # Populate other_banks_accounts
-def populate_other_banks_accounts(session: Session, customers: List[Dict], banks: List[Dict]) -> List[Dict]:
+def populate_other_banks_accounts(session: Session, customers: List[Dict], banks: List[Dict],
+                                  writer=None) -> List[Dict]:
     accounts = []
     bank_code_map = {bank['bank_id']: bank['bank_code'] for bank in banks}
 
@@ -146,20 +129,21 @@ def populate_other_banks_accounts(session: Session, customers: List[Dict], banks
                 'updated_at': datetime.now()
             })
 
-    session.bulk_insert_mappings(OtherBanksAccounts, accounts)
+    (writer or get_writer()).write(session, OtherBanksAccounts, accounts)
     return accounts
 
 
 # Main function to generate data
-def generate_other_banks_customers_accounts():
+def generate_other_banks_customers_accounts(writer_backend: str = None):
     session = Session()
+    writer = get_writer(writer_backend)
     try:
         with session.begin():
             banks = get_existing_banks(session)
             if not banks:
                 raise Exception("No banks found in the banks table. Please populate it first.")
-            customers = populate_other_banks_customers(session, banks)
-            accounts = populate_other_banks_accounts(session, customers, banks)
+            customers = populate_other_banks_customers(session, banks, writer=writer)
+            accounts = populate_other_banks_accounts(session, customers, banks, writer=writer)
             print(f"Generated {len(customers)} customers and {len(accounts)} accounts for {len(banks)} banks.")
     except Exception as e:
         print(f"Error: {e}")
@@ -1,16 +1,24 @@
-from sqlalchemy import create_engine, func, select, update
+from sqlalchemy import create_engine, func, select, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY, BIGINT
 from sqlalchemy.orm import sessionmaker
 from faker import Faker
 import random
 from rich.progress import track
 from datetime import datetime, timedelta
 import uuid
-from typing import List, Dict
+import numpy as np
+from typing import List, Dict, NamedTuple, Optional, Tuple
 from decimal import Decimal
 from models import (
     Customer, BankAccount, Device, AuthenticationMethod, PaymentTransaction,
     AuthenticationLog, OtherBanksAccounts
 )
+from key_registry import UniquenessRegistry
+from faker_pools import FakerPoolCache
+from id_allocator import IdBlockAllocator
+from bulk_writer import get_writer
+from balance_ledger import BalanceDeltaLedger
+from transaction_sampler import TransactionBatchSampler, AccountSamplingIndex, to_cents, cents_to_decimal
 from dotenv import load_dotenv
 import os
 
@@ -20,6 +28,7 @@ load_dotenv()
 
 # Initialize Faker for realistic data
 fake = Faker('vi_VN')
+fake_pools = FakerPoolCache('vi_VN')
 random.seed()
 
 # Database connection parameters
@@ -37,42 +46,62 @@ engine = create_engine(connection_string)
 Session = sessionmaker(bind=engine)
 
 
+# Key shard (index, count) of this process; parallel workers get disjoint key spaces
+KEY_SHARD = (0, 1)
+
+
+def set_key_shard(index: int, count: int):
+    global KEY_SHARD
+    KEY_SHARD = (index, count)
+
+
+def seed_generators(seed: int):
+    """Seed random, Faker and (through random) the NumPy batch sampler for a reproducible run."""
+    random.seed(seed)
+    fake.seed_instance(seed)
+
+
 # Helper functions
+def random_sharded_int(low: int, high: int) -> int:
+    """Uniform integer in [low, high] restricted to this process's key shard (value % count == index)."""
+    index, count = KEY_SHARD
+    first = low + (index - low) % count
+    return first + random.randrange((high - first) // count + 1) * count
+
+
 def generate_random_digits(length: int) -> str:
-    return ''.join(str(random.randint(0, 9)) for _ in range(length))
+    return str(random_sharded_int(0, 10 ** length - 1)).zfill(length)
+
+
+# Uniqueness registries for generated business keys (existing keys are preloaded once per process)
+customer_cccds = UniquenessRegistry(Customer.cccd_number)
+customer_tax_codes = UniquenessRegistry(Customer.tax_code)
+customer_phones = UniquenessRegistry(Customer.phone_number)
+account_numbers = UniquenessRegistry(BankAccount.account_number)
+
+# Sequence allocators: IDs are reserved in blocks instead of one nextval() per row
+customer_ids = IdBlockAllocator('customers_customer_id_seq')
+account_ids = IdBlockAllocator('bank_accounts_account_id_seq')
+device_ids = IdBlockAllocator('devices_device_id_seq')
+transaction_ids = IdBlockAllocator('payment_transactions_transaction_id_seq')
+auth_log_ids = IdBlockAllocator('authentication_logs_log_id_seq')
 
 
 def random_cccd(session: Session) -> str:
-    while True:
-        cccd = generate_random_digits(12)
-        count = session.execute(select(func.count()).where(Customer.cccd_number == cccd)).scalar_one_or_none()
-        if count == 0:
-            return cccd
+    return customer_cccds.claim(session, lambda: generate_random_digits(12))
 
 
 def random_tax_code(session: Session) -> str:
-    while True:
-        tax_code = generate_random_digits(10)
-        count = session.execute(select(func.count()).where(Customer.tax_code == tax_code)).scalar_one_or_none()
-        if count == 0:
-            return tax_code
+    return customer_tax_codes.claim(session, lambda: generate_random_digits(10))
 
 
 def random_phone_number(session: Session) -> str:
     prefixes = ['090', '091', '093', '094', '096', '097', '098']
-    while True:
-        phone = f"{random.choice(prefixes)}{generate_random_digits(7)}"
-        count = session.execute(select(func.count()).where(Customer.phone_number == phone)).scalar_one_or_none()
-        if count == 0:
-            return phone
+    return customer_phones.claim(session, lambda: f"{random.choice(prefixes)}{generate_random_digits(7)}")
 
 
 def random_account_number(session: Session) -> str:
-    while True:
-        account_number = f"TIMO{random.randint(1000000000000000, 9999999999999999)}"
-        count = session.execute(select(func.count()).where(BankAccount.account_number == account_number)).scalar_one_or_none()
-        if count == 0:
-            return account_number
+    return account_numbers.claim(session, lambda: f"TIMO{random_sharded_int(1000000000000000, 9999999999999999)}")
 
 
 def random_device_identifier() -> str:
@@ -87,21 +116,20 @@ def random_date(start_date: datetime, end_date: datetime) -> datetime:
 
 
 # Populate customers
-def populate_customers(session: Session, num_customers: int = 60) -> List[Dict]:
+def populate_customers(session: Session, num_customers: int = 60, writer=None) -> List[Dict]:
     customers = []
-    for _ in track(range(num_customers), description="Generating customers..."):
+    new_customer_ids = customer_ids.take(session, num_customers)
+    for customer_id in track(new_customer_ids, description="Generating customers..."):
         customer_type = random.choices(['individual', 'organization'], weights=[90, 10])[0]
         cccd_number = random_cccd(session) if customer_type == 'individual' else None
         tax_code = random_tax_code(session)
-        full_name = fake.name() if customer_type == 'individual' else fake.company()
+        full_name = fake_pools.sample('name') if customer_type == 'individual' else fake_pools.sample('company')
         date_of_birth = random_date(datetime(1980, 1, 1), datetime(2005, 1, 1)) if customer_type == 'individual' else None
         phone_number = random_phone_number(session)
-        email = fake.email() if random.choices([True, False], weights=[90, 10])[0] else None
-        address = fake.address()
+        email = fake_pools.sample('email') if random.choices([True, False], weights=[90, 10])[0] else None
+        address = fake_pools.sample('address')
         status = random.choices(['active', 'inactive', 'suspended'], weights=[95, 3, 2])[0]
 
-        customer_id = session.execute(select(func.nextval('customers_customer_id_seq'))).scalar_one()
-
         customers.append({
             'customer_id': customer_id,
             'customer_type': customer_type,
@@ -115,17 +143,18 @@ def populate_customers(session: Session, num_customers: int = 60) -> List[Dict]:
             'status': status
         })
 
-    session.bulk_insert_mappings(Customer, customers)
+    (writer or get_writer()).write(session, Customer, customers)
     return customers
 
 
 # Populate bank_accounts
-def populate_bank_accounts(session: Session, customers: List[Dict], num_accounts_per_customer: int = 2) -> List[Dict]:
+def populate_bank_accounts(session: Session, customers: List[Dict], num_accounts_per_customer: int = 2,
+                           writer=None) -> List[Dict]:
     accounts = []
     for customer in track(customers, description="Generating customers' timo accounts..."):
         customer_id = customer['customer_id']
         for _ in range(random.randint(1, num_accounts_per_customer)):
-            account_id = session.execute(select(func.nextval('bank_accounts_account_id_seq'))).scalar_one()
+            account_id = account_ids.next_id(session)
             account_number = random_account_number(session)
             account_type = random.choices(['savings', 'checking', 'ewallet'], weights=[45, 35, 20])[0]
             balance = round(random.uniform(0, 1000000000), 2)
@@ -140,17 +169,18 @@ def populate_bank_accounts(session: Session, customers: List[Dict], num_accounts
                 'status': status
             })
 
-    session.bulk_insert_mappings(BankAccount, accounts)
+    (writer or get_writer()).write(session, BankAccount, accounts)
     return accounts
 
 
 # Populate devices
-def populate_devices(session: Session, customers: List[Dict], num_devices_per_customer: int = 2) -> List[Dict]:
+def populate_devices(session: Session, customers: List[Dict], num_devices_per_customer: int = 2,
+                     writer=None) -> List[Dict]:
     devices = []
     for customer in track(customers, description="Generating customers' devices..."):
         customer_id = customer['customer_id']
         for _ in range(random.randint(1, num_devices_per_customer)):
-            device_id = session.execute(select(func.nextval('devices_device_id_seq'))).scalar_one()
+            device_id = device_ids.next_id(session)
             device_type = random.choice(['mobile', 'computer', 'tablet'])
             device_identifier = random_device_identifier()
             os_info = random.choice(['Android 12', 'iOS 16', 'Windows 11', 'macOS Ventura', 'Windows 10',
@@ -168,7 +198,7 @@ def populate_devices(session: Session, customers: List[Dict], num_devices_per_cu
                 'status': status
             })
 
-    session.bulk_insert_mappings(Device, devices)
+    (writer or get_writer()).write(session, Device, devices)
     return devices
 
 
@@ -206,80 +236,108 @@ AMOUNT_DISTRIBUTION = {
 }
 
 
-def generate_amount_based_on_distribution(current_balance: Decimal) -> Decimal:
-    """Generates a transaction amount based on predefined distribution and current balance."""
-    choice = random.random()
-
-    # Handle edge cases
-    if choice < AMOUNT_DISTRIBUTION['edge_case_weight']:
-        amount = random.choice(AMOUNT_DISTRIBUTION['edge_cases'])
-        if amount <= current_balance:
-            return amount
-        # If edge case amount is too high, try to find a smaller one or fall through to normal distribution
-        for _ in range(3):  # Retry a few times for a suitable edge case
-            smaller_edge_cases = [a for a in AMOUNT_DISTRIBUTION['edge_cases'] if a <= current_balance]
-            if smaller_edge_cases:
-                return random.choice(smaller_edge_cases)
-
-    # Handle normal distribution
-    cumulative_weight = 0
-    for (min_val, max_val), weight in AMOUNT_DISTRIBUTION.items():
-        if isinstance(min_val, Decimal):  # Check if it's a range
-            cumulative_weight += weight
-            if choice < cumulative_weight + AMOUNT_DISTRIBUTION['edge_case_weight']:
-                # Ensure amount does not exceed current balance
-                upper_bound = min(max_val, current_balance)
-                if min_val <= upper_bound:
-                    return Decimal(str(round(random.uniform(float(min_val), float(upper_bound)), 2)))
-                else:
-                    # If the range is above balance, try smaller ranges or a small default
-                    return Decimal(
-                        str(round(random.uniform(10000, float(min(current_balance, Decimal('1000000')))), 2)))
+# Transaction attribute weights used by the batch sampler
+TRANSACTION_TYPE_WEIGHTS = {
+    'transfer_same_bank_same_owner': 0.2,
+    'transfer_same_bank_diff_owner': 0.2,
+    'transfer_interbank_domestic': 0.15,
+    'transfer_interbank_international': 0.1,
+    'payment_goods_services': 0.15,
+    'ewallet_topup': 0.1,
+    'ewallet_withdrawal': 0.05,
+    'inquiry': 0.03,
+    'ewallet_transfer': 0.07
+}
+TRANSACTION_STATUS_WEIGHTS = {'pending': 0.1, 'completed': 0.8, 'failed': 0.05, 'cancelled': 0.05}
+TRANSACTION_BATCH_SIZE = 10000
+
+
+class TransactionSources(NamedTuple):
+    """
+    What the transaction generator draws from: the batch sampler, active accounts indexed by customer with
+    their balances in cents (aligned with the index), active device IDs and other-bank account IDs.
+    balance_cents is updated in place as transactions complete, so it can be reused across chunks.
+    """
+    sampler: TransactionBatchSampler
+    account_index: AccountSamplingIndex
+    balance_cents: np.ndarray
+    device_ids: np.ndarray
+    other_bank_account_ids: np.ndarray
+
+
+def load_transaction_sources(session: Session) -> TransactionSources:
+    """Read active accounts, active devices and other-bank accounts (only the needed columns, as arrays)."""
+    active_accounts = session.execute(
+        select(BankAccount.account_id, BankAccount.customer_id, BankAccount.balance)
+        .where(BankAccount.status == 'active')
+    ).all()
+    active_device_ids = np.array(session.execute(
+        select(Device.device_id).where(Device.status == 'active')
+    ).scalars().all(), dtype=np.int64)
+    other_bank_account_ids = np.array(session.execute(
+        select(OtherBanksAccounts.account_id)
+    ).scalars().all(), dtype=np.int64)
+
+    # Check if required data exists
+    if not active_accounts:
+        raise ValueError("No active bank accounts found in database")
+    if len(active_device_ids) == 0:
+        raise ValueError("No active devices found in database")
+
+    # Index accounts by customer; positions below refer to the index order
+    sampler = TransactionBatchSampler(AMOUNT_DISTRIBUTION, TRANSACTION_TYPE_WEIGHTS, TRANSACTION_STATUS_WEIGHTS,
+                                      seed=random.getrandbits(64))
+    account_index = AccountSamplingIndex(
+        np.array([acc.account_id for acc in active_accounts], dtype=np.int64),
+        np.array([acc.customer_id for acc in active_accounts], dtype=np.int64),
+        rng=sampler.rng
+    )
 
-    # Fallback if no range matches or balance is too low for chosen range
-    return Decimal(str(round(random.uniform(10000, float(min(current_balance, Decimal('1000000')))), 2)))
+    # Initialize balance tracking (internal balances are kept in cents, aligned with the index)
+    balance_cents = np.array([to_cents(active_accounts[i].balance or 0) for i in account_index.order], dtype=np.int64)
+    return TransactionSources(sampler, account_index, balance_cents, active_device_ids, other_bank_account_ids)
 
 
 # Populate payment_transactions with edge cases
 def populate_payment_transactions(
         session: Session,
         num_transactions: int = 250,
-        max_retries: int = 3
+        max_retries: int = 3,
+        writer=None,
+        batch_size: int = TRANSACTION_BATCH_SIZE,
+        source_shard: Optional[Tuple[int, int]] = None,
+        sources: Optional[TransactionSources] = None
 ) -> list[dict]:
-    def model_to_dict(obj):
-        return {c.name: getattr(obj, c.name) for c in obj.__table__.columns}
-
-    # Fetch existing data from database
-    active_accounts = [model_to_dict(acc) for acc in session.scalars(
-        select(BankAccount).where(BankAccount.status == 'active')
-    ).all()]
-
-    active_devices = [model_to_dict(dev) for dev in session.scalars(
-        select(Device).where(Device.status == 'active')
-    ).all()]
-
-    other_banks_accounts = [model_to_dict(acc) for acc in session.scalars(
-        select(OtherBanksAccounts)
-    ).all()]
-
-    # Check if required data exists
-    if not active_accounts:
-        raise ValueError("No active bank accounts found in database")
-    if not active_devices:
-        raise ValueError("No active devices found in database")
-
-    # Organize accounts by customer
-    accounts_by_customer = {}
-    for account in active_accounts:
-        customer_id = account['customer_id']
-        if customer_id not in accounts_by_customer:
-            accounts_by_customer[customer_id] = []
-        accounts_by_customer[customer_id].append(account)
-
-    # Initialize balance tracking
-    other_bank_account_ids = set(acc['account_id'] for acc in other_banks_accounts)
-    account_balances = {acc['account_id']: Decimal(str(acc.get('balance', 0.00))) for acc in active_accounts}
-    other_bank_balances = {acc['account_id']: Decimal(str(acc.get('balance', 0.00))) for acc in other_banks_accounts}
+    """
+    Generate payment transactions from active accounts. With source_shard=(index, count) only
+    accounts of customers with customer_id % count == index are used as sources, so parallel
+    workers never write summaries for the same account. Pass sources from load_transaction_sources
+    to generate several chunks without reading the accounts and devices again.
+    """
+    if sources is None:
+        sources = load_transaction_sources(session)
+    sampler, account_index, balance_cents, active_device_ids, other_bank_account_ids = sources
+    balance_deltas = BalanceDeltaLedger()
+
+    source_positions = None
+    if source_shard is not None:
+        shard_index, shard_count = source_shard
+        source_positions = np.flatnonzero(account_index.customer_ids % shard_count == shard_index)
+        if len(source_positions) == 0:
+            raise ValueError(f"No active bank accounts found in source shard {source_shard}")
+
+    candidates = iter(())
+
+    def next_candidate():
+        nonlocal candidates
+        candidate = next(candidates, None)
+        if candidate is None:
+            source_index = None
+            if source_positions is not None:
+                source_index = source_positions[sampler.rng.integers(0, len(source_positions), batch_size)]
+            candidates = sampler.sample(batch_size, balance_cents, len(active_device_ids), source_index).rows()
+            candidate = next(candidates)
+        return candidate
 
     transactions = []
 
@@ -287,70 +345,45 @@ def populate_payment_transactions(
         retries = 0
         while retries < max_retries:
             try:
-                # Select transaction type
-                transaction_type = random.choices(
-                    [
-                        'transfer_same_bank_same_owner',
-                        'transfer_same_bank_diff_owner',
-                        'transfer_interbank_domestic',
-                        'transfer_interbank_international',
-                        'payment_goods_services',
-                        'ewallet_topup',
-                        'ewallet_withdrawal',
-                        'inquiry',
-                        'ewallet_transfer'
-                    ],
-                    weights=[0.2, 0.2, 0.15, 0.1, 0.15, 0.1, 0.05, 0.03, 0.07],
-                    k=1
-                )[0]
+                type_index, from_pos, amount_cents, status_index, device_pos, is_suspicious = next_candidate()
+                transaction_type = sampler.transaction_types[type_index]
+                status = sampler.statuses[status_index]
 
                 # Select source account
-                from_account = random.choice(active_accounts)
-                from_account_id = from_account['account_id']
-                customer_id = from_account['customer_id']
-                from_balance = account_balances.get(from_account_id, Decimal('0.00'))
+                from_account_id = int(account_index.account_ids[from_pos])
+                customer_id = int(account_index.customer_ids[from_pos])
 
                 # Determine destination account
                 to_account_internal_id = None
                 to_account_external_id = None
+                to_pos = None
                 if transaction_type == 'transfer_same_bank_same_owner':
-                    customer_accounts = accounts_by_customer.get(customer_id, [])
-                    if len(customer_accounts) <= 1:
+                    to_pos = account_index.same_owner_destination(from_pos)
+                    if to_pos is None:
                         retries += 1
                         continue
-                    to_account = random.choice(
-                        [acc for acc in customer_accounts if acc['account_id'] != from_account_id])
-                    to_account_internal_id = to_account['account_id']
+                    to_account_internal_id = int(account_index.account_ids[to_pos])
                 elif transaction_type == 'transfer_same_bank_diff_owner':
-                    other_customer_accounts = [acc for acc in active_accounts if acc['customer_id'] != customer_id]
-                    if not other_customer_accounts:
+                    to_pos = account_index.other_owner_destination(from_pos)
+                    if to_pos is None:
                         retries += 1
                         continue
-                    to_account = random.choice(other_customer_accounts)
-                    to_account_internal_id = to_account['account_id']
+                    to_account_internal_id = int(account_index.account_ids[to_pos])
                 elif transaction_type in ['transfer_interbank_domestic', 'transfer_interbank_international',
                                           'ewallet_transfer']:
-                    if not other_bank_account_ids:
-                        retries += 1
-                        continue
-                    to_account = random.choice(other_banks_accounts)
-                    to_account_external_id = to_account['account_id']
-                elif transaction_type == 'inquiry':
-                    amount = Decimal('0.00')
-
-                if transaction_type != 'inquiry':
-                    # Generate amount based on distribution and current balance
-                    amount = generate_amount_based_on_distribution(from_balance)
-                    if amount <= 0:
+                    if len(other_bank_account_ids) == 0:
                         retries += 1
                         continue
+                    to_account_external_id = int(other_bank_account_ids[random.randrange(len(other_bank_account_ids))])
 
-                # Set transaction status
-                status = random.choices(['pending', 'completed', 'failed', 'cancelled'],
-                                        weights=[0.1, 0.8, 0.05, 0.05], k=1)[0]
+                # Amount was drawn from the distribution against the balance at batch time
+                amount = cents_to_decimal(amount_cents)
+                if transaction_type != 'inquiry' and amount <= 0:
+                    retries += 1
+                    continue
 
                 # If transaction is completed, ensure balance is sufficient
-                if status == 'completed' and from_balance < amount:
+                if status == 'completed' and balance_cents[from_pos] < amount_cents:
                     retries += 1
                     continue
 
@@ -360,13 +393,8 @@ def populate_payment_transactions(
 
                 # Generate transaction details
                 description = f"{transaction_type} on {transaction_date.strftime('%Y-%m-%d %H:%M:%S')}"
-                device_id = random.choice(active_devices)['device_id']
-                if transaction_type != 'inquiry':
-                    is_suspicious = random.random() < (0.2 if amount > 1000000000 else 0.1)
-                else:
-                    is_suspicious = False
-                transaction_id = session.execute(
-                    select(func.nextval('payment_transactions_transaction_id_seq'))).scalar_one()
+                device_id = int(active_device_ids[device_pos])
+                transaction_id = transaction_ids.next_id(session)
 
                 # Create transaction dictionary
                 transaction = {
@@ -388,31 +416,16 @@ def populate_payment_transactions(
 
                 transactions.append(transaction)
 
-                # Update balances for completed transactions
+                # Track balances for completed transactions; deltas are applied in one UPDATE per table
                 if status == 'completed':
-                    account_balances[from_account_id] -= amount
-                    session.execute(
-                        update(BankAccount)
-                        .where(BankAccount.account_id == from_account_id)
-                        .values(balance=account_balances[from_account_id], updated_at=datetime.now())
-                    )
+                    balance_cents[from_pos] -= amount_cents
+                    balance_deltas.add(BankAccount, from_account_id, -amount_cents)
 
                     if to_account_internal_id:
-                        account_balances[to_account_internal_id] = account_balances.get(to_account_internal_id,
-                                                                                        Decimal('0.00')) + amount
-                        session.execute(
-                            update(BankAccount)
-                            .where(BankAccount.account_id == to_account_internal_id)
-                            .values(balance=account_balances[to_account_internal_id], updated_at=datetime.now())
-                        )
+                        balance_cents[to_pos] += amount_cents
+                        balance_deltas.add(BankAccount, to_account_internal_id, amount_cents)
                     elif to_account_external_id:
-                        other_bank_balances[to_account_external_id] = other_bank_balances.get(to_account_external_id,
-                                                                                              Decimal('0.00')) + amount
-                        session.execute(
-                            update(OtherBanksAccounts)
-                            .where(OtherBanksAccounts.account_id == to_account_external_id)
-                            .values(balance=other_bank_balances[to_account_external_id], updated_at=datetime.now())
-                        )
+                        balance_deltas.add(OtherBanksAccounts, to_account_external_id, amount_cents)
 
                 break
 
@@ -423,13 +436,13 @@ def populate_payment_transactions(
                     break
                 continue
 
-    if transactions:
-        session.bulk_insert_mappings(PaymentTransaction, transactions)
+    balance_deltas.flush(session)
+    (writer or get_writer()).write(session, PaymentTransaction, transactions)
     return transactions
 
 
 # Populate authentication_logs
-def populate_authentication_logs(session: Session, transactions: List[Dict], accounts: List[Dict]) -> List[Dict]:
+def populate_authentication_logs(session: Session, transactions: List[Dict], writer=None) -> List[Dict]:
     logs = []
 
     auth_methods = {
@@ -440,22 +453,21 @@ def populate_authentication_logs(session: Session, transactions: List[Dict], acc
     }
     d_secondary_methods = [5, 7, 9]  # Soft OTP Advanced, Token OTP Advanced, FIDO
 
-    account_to_customer_type = {}
-    for account in accounts:
-        # Access attributes using dot notation for SQLAlchemy ORM objects
-        customer_id = account.customer_id
-        customer_type = session.execute(
-            select(Customer.customer_type).where(Customer.customer_id == customer_id)
-        ).scalar_one_or_none()
-        account_to_customer_type[account.account_id] = customer_type or 'individual'
+    # Read trigger-assigned security levels and customer types for the whole batch in one query
+    batch_ids = bindparam('transaction_ids', [t['transaction_id'] for t in transactions], type_=ARRAY(BIGINT))
+    transaction_info = {
+        transaction_id: (security_level, customer_type)
+        for transaction_id, security_level, customer_type in session.execute(
+            select(PaymentTransaction.transaction_id, PaymentTransaction.security_level, Customer.customer_type)
+            .join(Customer, PaymentTransaction.customer_id == Customer.customer_id)
+            .where(PaymentTransaction.transaction_id == any_(batch_ids))
+        ).all()
+    } if transactions else {}
 
     for transaction in track(transactions, description="Generating transactions' logs..."):
         transaction_id = transaction['transaction_id']
-        from_account_id = transaction['from_account_id']
-        security_level = session.execute(
-            select(PaymentTransaction.security_level).where(PaymentTransaction.transaction_id == transaction_id)
-        ).scalar_one_or_none() or 'A'
-        customer_type = account_to_customer_type.get(from_account_id, 'individual')
+        security_level, customer_type = transaction_info.get(transaction_id, ('A', 'individual'))
+        security_level = security_level or 'A'
 
         allowed_methods = []
         if security_level == 'A':
@@ -476,7 +488,7 @@ def populate_authentication_logs(session: Session, transactions: List[Dict], acc
         num_attempts = random.randint(1, 2) if security_level in ['C', 'D'] else 1
 
         for i in range(num_attempts):
-            log_id = session.execute(select(func.nextval('authentication_logs_log_id_seq'))).scalar_one()
+            log_id = auth_log_ids.next_id(session)
             if security_level == 'D' and num_attempts > 1:
                 if i == 0:
                     auth_method_id = random.choice(allowed_methods)
@@ -487,7 +499,7 @@ def populate_authentication_logs(session: Session, transactions: List[Dict], acc
                 auth_method_id = random.choice(allowed_methods)
 
             auth_result = random.choices(['success', 'failed', 'expired', 'cancelled'], weights=[95, 3, 1, 1])[0]
-            failure_reason = '' if auth_result == 'success' else fake.sentence()
+            failure_reason = '' if auth_result == 'success' else fake_pools.sample('sentence')
 
             logs.append({
                 'log_id': log_id,
@@ -498,21 +510,28 @@ def populate_authentication_logs(session: Session, transactions: List[Dict], acc
                 'auth_timestamp': datetime.now()
             })
 
-    session.bulk_insert_mappings(AuthenticationLog, logs)
+    (writer or get_writer()).write(session, AuthenticationLog, logs)
     return logs
 
 
 # Main execution
-def main():
+def main(writer_backend: str = None, num_workers: int = None):
+    num_workers = num_workers or int(os.getenv("GENERATOR_WORKERS", "1"))
+    if num_workers > 1:
+        from parallel_generation import generate_parallel
+        generate_parallel(num_workers, num_customers=50, num_transactions=250, writer_backend=writer_backend)
+        return
+
     session = Session()
+    writer = get_writer(writer_backend)
     try:
         with session.begin():
             verify_authentication_methods(session)
-            customers = populate_customers(session, 50)
-            accounts = populate_bank_accounts(session, customers, 2)
-            devices = populate_devices(session, customers, 2)
-            transactions = populate_payment_transactions(session, 250)
-            populate_authentication_logs(session, transactions, accounts)
+            customers = populate_customers(session, 50, writer=writer)
+            populate_bank_accounts(session, customers, 2, writer=writer)
+            devices = populate_devices(session, customers, 2, writer=writer)
+            transactions = populate_payment_transactions(session, 250, writer=writer)
+            populate_authentication_logs(session, transactions, writer=writer)
             print("Data population completed successfully.")
     except Exception as e:
         print(f"Error: {e}")
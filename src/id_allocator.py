@@ -0,0 +1,42 @@
+from collections import deque
+from typing import Iterable, List
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+DEFAULT_BLOCK_SIZE = 1000
+
+
+class IdBlockAllocator:
+    """
+    Reserves sequence values in blocks with a single statement and hands them out locally.
+    Values come from nextval(), so they stay unique across concurrent generator runs;
+    values left unused in a block only leave gaps in the sequence.
+    """
+
+    def __init__(self, sequence_name: str, block_size: int = DEFAULT_BLOCK_SIZE):
+        self.sequence_name = sequence_name
+        self.block_size = block_size
+        self._ids = deque()
+
+    def reserve(self, session: Session, count: int) -> List[int]:
+        if count <= 0:
+            return []
+        return session.execute(
+            text("SELECT nextval(CAST(:sequence_name AS regclass)) FROM generate_series(1, :count)"),
+            {'sequence_name': self.sequence_name, 'count': count}
+        ).scalars().all()
+
+    def preload(self, ids: Iterable[int]):
+        self._ids.extend(ids)
+
+    def next_id(self, session: Session) -> int:
+        if not self._ids:
+            self._ids.extend(self.reserve(session, self.block_size))
+        return self._ids.popleft()
+
+    def take(self, session: Session, count: int) -> List[int]:
+        shortfall = count - len(self._ids)
+        if shortfall > 0:
+            self._ids.extend(self.reserve(session, max(shortfall, self.block_size)))
+        return [self._ids.popleft() for _ in range(count)]
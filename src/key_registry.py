@@ -0,0 +1,90 @@
+import hashlib
+import math
+from typing import Callable
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+
+# Tables with more existing keys than this are tracked with a Bloom filter instead of a set
+BLOOM_THRESHOLD = 5_000_000
+BLOOM_ERROR_RATE = 0.001
+LOAD_BATCH_SIZE = 50_000
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys (double hashing on a single blake2b digest)."""
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE):
+        capacity = max(capacity, 1)
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, value: str):
+        for pos in self._positions(value):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
+
+
+class UniquenessRegistry:
+    """
+    Hands out values for a unique column without querying the database per candidate.
+    Existing keys are preloaded once (exact set, or a Bloom filter with an exact DB
+    fallback on hits for very large tables); values issued in this process are kept exactly.
+    """
+
+    def __init__(self, column, bloom_threshold: int = BLOOM_THRESHOLD):
+        self.column = column
+        self.bloom_threshold = bloom_threshold
+        self.existing = set()
+        self.issued = set()
+        self.loaded = False
+
+    def load(self, session: Session):
+        total = session.execute(select(func.count(self.column))).scalar_one()
+        values = session.execute(
+            select(self.column)
+            .where(self.column.is_not(None))
+            .execution_options(yield_per=LOAD_BATCH_SIZE)
+        ).scalars()
+
+        if total > self.bloom_threshold:
+            self.existing = BloomFilter(total * 2)
+            for value in values:
+                self.existing.add(value)
+        else:
+            self.existing = set(values)
+        self.loaded = True
+
+    def reset(self):
+        self.existing = set()
+        self.issued = set()
+        self.loaded = False
+
+    def is_taken(self, session: Session, value: str) -> bool:
+        if value in self.issued:
+            return True
+        if value not in self.existing:
+            return False
+        if isinstance(self.existing, BloomFilter):
+            # Possible false positive: confirm against the table
+            count = session.execute(select(func.count()).where(self.column == value)).scalar_one()
+            return count > 0
+        return True
+
+    def claim(self, session: Session, factory: Callable[[], str]) -> str:
+        if not self.loaded:
+            self.load(session)
+        while True:
+            value = factory()
+            if not self.is_taken(session, value):
+                self.issued.add(value)
+                return value
@@ -1,7 +1,7 @@
 from sqlalchemy import ForeignKey, CheckConstraint, func
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.sql.sqltypes import String, Numeric, Boolean, DateTime, Date, SmallInteger
-from sqlalchemy.dialects.postgresql import INTEGER, BIGINT
+from sqlalchemy.dialects.postgresql import INTEGER, BIGINT, JSONB
 from datetime import datetime
 
 
@@ -135,6 +135,8 @@ class PaymentTransaction(Base):
     to_account_internal_id: Mapped[int] = mapped_column(BIGINT, ForeignKey('bank_accounts.account_id'), nullable=True)
     to_account_external_id: Mapped[int] = mapped_column(BIGINT, ForeignKey('other_banks_accounts.account_id'), nullable=True)
     customer_id: Mapped[int] = mapped_column(BIGINT, ForeignKey('customers.customer_id'), nullable=False)
+    # Denormalized from customers; set by the classify_transaction trigger
+    customer_type: Mapped[str] = mapped_column(String(20), nullable=False)
     transaction_type: Mapped[str] = mapped_column(String(50), nullable=False)
     amount: Mapped[float] = mapped_column(Numeric(15, 2), nullable=False)
     security_level: Mapped[str] = mapped_column(String(1), nullable=False)
@@ -152,15 +154,28 @@ class PaymentTransaction(Base):
             "'ewallet_topup', 'ewallet_withdrawal', 'inquiry', 'ewallet_transfer')",
             name='chk_transaction_type'
         ),
+        CheckConstraint("customer_type IN ('individual', 'organization')", name='chk_transaction_customer_type'),
         CheckConstraint("security_level IN ('A', 'B', 'C', 'D')", name='chk_security_level'),
         CheckConstraint("status IN ('pending', 'completed', 'failed', 'cancelled')", name='chk_status'),
+        # Database primary key is (transaction_id, transaction_date); transaction_id stays the ORM identity
+        # and is kept unique by payment_transaction_keys
+        {'postgresql_partition_by': 'RANGE (transaction_date)'},
     )
 
 
+class PaymentTransactionKey(Base):
+    # Maintained by statement-level triggers on payment_transactions
+    __tablename__ = 'payment_transaction_keys'
+    transaction_id: Mapped[int] = mapped_column(BIGINT, primary_key=True, autoincrement=False)
+
+
 class AuthenticationLog(Base):
     __tablename__ = 'authentication_logs'
     log_id: Mapped[int] = mapped_column(BIGINT, primary_key=True, autoincrement=True)
-    transaction_id: Mapped[int] = mapped_column(BIGINT, ForeignKey('payment_transactions.transaction_id'), nullable=False)
+    transaction_id: Mapped[int] = mapped_column(
+        BIGINT, ForeignKey('payment_transaction_keys.transaction_id', deferrable=True, initially='DEFERRED'),
+        nullable=False
+    )
     auth_method_id: Mapped[int] = mapped_column(SmallInteger, ForeignKey('authentication_methods.auth_id'), nullable=False)
     auth_result: Mapped[str] = mapped_column(String(20), nullable=False)
     auth_timestamp: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.current_timestamp())
@@ -168,6 +183,7 @@ class AuthenticationLog(Base):
 
     __table_args__ = (
         CheckConstraint("auth_result IN ('success', 'failed', 'expired', 'cancelled')", name='chk_auth_result'),
+        {'postgresql_partition_by': 'RANGE (auth_timestamp)'},
     )
 
 
@@ -191,10 +207,41 @@ class DailyTransactionSummary(Base):
     )
 
 
+class DailyTransactionSummaryDelta(Base):
+    __tablename__ = 'daily_transaction_summary_deltas'
+    delta_id: Mapped[int] = mapped_column(BIGINT, primary_key=True, autoincrement=True)
+    account_id: Mapped[int] = mapped_column(BIGINT, nullable=False)
+    customer_id: Mapped[int] = mapped_column(BIGINT, nullable=False)
+    transaction_date: Mapped[Date] = mapped_column(Date, nullable=False)
+    total_amount: Mapped[float] = mapped_column(Numeric(15, 2), nullable=False, server_default='0.00')
+    category_a_amount: Mapped[float] = mapped_column(Numeric(15, 2), nullable=False, server_default='0.00')
+    category_b_amount: Mapped[float] = mapped_column(Numeric(15, 2), nullable=False, server_default='0.00')
+    category_c_amount: Mapped[float] = mapped_column(Numeric(15, 2), nullable=False, server_default='0.00')
+    category_d_amount: Mapped[float] = mapped_column(Numeric(15, 2), nullable=False, server_default='0.00')
+    strong_auth_used: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default='false')
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.current_timestamp())
+
+
+class CustomerDailyState(Base):
+    __tablename__ = 'customer_daily_state'
+    customer_id: Mapped[int] = mapped_column(BIGINT, ForeignKey('customers.customer_id'), primary_key=True)
+    day: Mapped[Date] = mapped_column(Date, primary_key=True)
+    daily_total: Mapped[float] = mapped_column(Numeric(15, 2), nullable=False, server_default='0.00')
+    ab_total: Mapped[float] = mapped_column(Numeric(15, 2), nullable=False, server_default='0.00')
+    has_strong_auth: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default='false')
+    high_value_count: Mapped[int] = mapped_column(INTEGER, nullable=False, server_default='0')
+    intl_transfer_count: Mapped[int] = mapped_column(INTEGER, nullable=False, server_default='0')
+    payment_count: Mapped[int] = mapped_column(INTEGER, nullable=False, server_default='0')
+    auth_failure_count: Mapped[int] = mapped_column(INTEGER, nullable=False, server_default='0')
+
+
 class RiskAlert(Base):
     __tablename__ = 'risk_alerts'
     alert_id: Mapped[int] = mapped_column(BIGINT, primary_key=True, autoincrement=True)
-    transaction_id: Mapped[int] = mapped_column(BIGINT, ForeignKey('payment_transactions.transaction_id'), nullable=False)
+    transaction_id: Mapped[int] = mapped_column(
+        BIGINT, ForeignKey('payment_transaction_keys.transaction_id', deferrable=True, initially='DEFERRED'),
+        nullable=False
+    )
     alert_type: Mapped[str] = mapped_column(String(50), nullable=False)
     alert_message: Mapped[str] = mapped_column(String(500), nullable=False)
     status: Mapped[str] = mapped_column(String(20), nullable=False, server_default='open')
@@ -209,3 +256,43 @@ class RiskAlert(Base):
         ),
         CheckConstraint("status IN ('open', 'investigating', 'resolved', 'false_positive')", name='chk_status'),
     )
+
+
+class RiskAlertEvent(Base):
+    __tablename__ = 'risk_alert_events'
+    event_id: Mapped[int] = mapped_column(BIGINT, primary_key=True, autoincrement=True)
+    transaction_id: Mapped[int] = mapped_column(BIGINT, nullable=False)
+    is_trusted: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    has_strong_auth: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    auth_failure_count: Mapped[int] = mapped_column(INTEGER, nullable=False)
+    daily_total: Mapped[float] = mapped_column(Numeric(15, 2), nullable=False)
+    day_strong_auth: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    day_failure_count: Mapped[int] = mapped_column(INTEGER, nullable=False)
+    high_value_count: Mapped[int] = mapped_column(INTEGER, nullable=False)
+    intl_transfer_count: Mapped[int] = mapped_column(INTEGER, nullable=False)
+    payment_count: Mapped[int] = mapped_column(INTEGER, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.current_timestamp())
+
+
+class GenerationCheckpoint(Base):
+    __tablename__ = 'generation_checkpoints'
+    run_id: Mapped[str] = mapped_column(String(100), primary_key=True)
+    stage: Mapped[str] = mapped_column(String(50), primary_key=True)
+    rows_done: Mapped[int] = mapped_column(BIGINT, nullable=False, server_default='0')
+    rows_written: Mapped[int] = mapped_column(BIGINT, nullable=False, server_default='0')
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.current_timestamp())
+
+    __table_args__ = (
+        CheckConstraint("stage IN ('customers', 'transactions')", name='chk_checkpoint_stage'),
+    )
+
+
+class CheckWatermark(Base):
+    __tablename__ = 'check_watermarks'
+    check_name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    table_name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    high_water: Mapped[str] = mapped_column(String(64), nullable=True)
+    pending_ids: Mapped[list] = mapped_column(JSONB, nullable=False, server_default='[]')
+    modification_count: Mapped[int] = mapped_column(BIGINT, nullable=False, server_default='0')
+    full_sweep_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.current_timestamp())
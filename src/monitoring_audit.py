@@ -10,6 +10,8 @@ from datetime import datetime, timedelta
 from rich.console import Console
 from rich.table import Table
 from typing import Optional
+from check_scheduler import CHECK_PARALLELISM, run_checks_concurrently
+from check_watermarks import CHECK_INCREMENTAL, WatermarkStore
 from dotenv import load_dotenv
 import os
 
@@ -47,14 +49,16 @@ db_params = {
     'port': '5432'
 }
 connection_string = f"postgresql://{db_params['user']}:{db_params['password']}@{db_params['host']}:{db_params['port']}/{db_params['dbname']}"
-engine = create_engine(connection_string)
+engine = create_engine(connection_string, pool_size=max(5, CHECK_PARALLELISM))
 Session = sessionmaker(bind=engine)
 console = Console()
 
 
 class RiskMonitor:
-    def __init__(self):
+    def __init__(self, incremental: bool = CHECK_INCREMENTAL, full_sweep: bool = False):
         self.issues = []
+        self.check_seconds = {}
+        self.watermarks = WatermarkStore(incremental, full_sweep=full_sweep)
         self.session = Session()
         logger.info("Initialized RiskMonitor")
 
@@ -68,23 +72,26 @@ class RiskMonitor:
         self.issues.append(issue)
         logger.warning(f"Risk issue - Type: {check_type}, Transaction ID: {transaction_id or 'N/A'}, Description: {description}")
 
-    def check_strong_auth_for_high_value(self):
+    def check_strong_auth_for_high_value(self, session=None):
         """Check transactions > 10M VND have strong authentication"""
+        session = session or self.session
         logger.info("Starting strong authentication check for high-value transactions")
         try:
-            transactions = self.session.execute(
+            window = self.watermarks.window(session, 'strong_auth_for_high_value', PaymentTransaction)
+            transactions = session.execute(
                 select(PaymentTransaction)
+                .where(window.condition)
                 .where(PaymentTransaction.amount > 10000000)
             ).scalars().all()
 
-            strong_auth_methods = self.session.execute(
+            strong_auth_methods = session.execute(
                 select(AuthenticationMethod.auth_id)
                 .where(AuthenticationMethod.security_level.in_(['C', 'D']))
             ).scalars().all()
 
             issues_found = 0
             for tx in transactions:
-                has_strong_auth = self.session.execute(
+                has_strong_auth = session.execute(
                     select(func.count())
                     .select_from(AuthenticationLog)
                     .where(
@@ -102,28 +109,32 @@ class RiskMonitor:
                     )
                     issues_found += 1
             logger.info(f"Found {issues_found} high-value transactions without strong authentication")
+            self.watermarks.advance(session, [window])
         except Exception as e:
             logger.error(f"Error in strong auth check: {str(e)}")
             raise
 
-    def check_untrusted_device(self):
+    def check_untrusted_device(self, session=None):
         """Check transactions from untrusted devices"""
+        session = session or self.session
         logger.info("Starting untrusted device check")
         try:
-            transactions = self.session.execute(
+            window = self.watermarks.window(session, 'untrusted_device', PaymentTransaction)
+            transactions = session.execute(
                 select(PaymentTransaction, Device)
                 .join(Device, PaymentTransaction.device_id == Device.device_id)
+                .where(window.condition)
                 .where(Device.is_trusted == False)
             ).all()
 
-            strong_auth_methods = self.session.execute(
+            strong_auth_methods = session.execute(
                 select(AuthenticationMethod.auth_id)
                 .where(AuthenticationMethod.security_level.in_(['C', 'D']))
             ).scalars().all()
 
             issues_found = 0
             for tx, device in transactions:
-                has_strong_auth = self.session.execute(
+                has_strong_auth = session.execute(
                     select(func.count())
                     .select_from(AuthenticationLog)
                     .where(
@@ -141,16 +152,18 @@ class RiskMonitor:
                     )
                     issues_found += 1
             logger.info(f"Found {issues_found} untrusted device transactions without strong authentication")
+            self.watermarks.advance(session, [window])
         except Exception as e:
             logger.error(f"Error in untrusted device check: {str(e)}")
             raise
 
-    def check_daily_transaction_limit(self):
+    def check_daily_transaction_limit(self, session=None):
         """Check daily transaction total > 20M VND has strong authentication"""
+        session = session or self.session
         logger.info("Starting daily transaction limit check")
         try:
             one_day_ago = datetime.now() - timedelta(days=1)
-            customer_totals = self.session.execute(
+            customer_totals = session.execute(
                 select(
                     PaymentTransaction.customer_id,
                     func.sum(PaymentTransaction.amount).label('total_amount')
@@ -160,14 +173,14 @@ class RiskMonitor:
                 .having(func.sum(PaymentTransaction.amount) > 20000000)
             ).all()
 
-            strong_auth_methods = self.session.execute(
+            strong_auth_methods = session.execute(
                 select(AuthenticationMethod.auth_id)
                 .where(AuthenticationMethod.security_level.in_(['C', 'D']))
             ).scalars().all()
 
             issues_found = 0
             for customer_id, total_amount in customer_totals:
-                has_strong_auth = self.session.execute(
+                has_strong_auth = session.execute(
                     select(func.count())
                     .select_from(PaymentTransaction)
                     .join(AuthenticationLog, PaymentTransaction.transaction_id == AuthenticationLog.transaction_id)
@@ -210,14 +223,22 @@ class RiskMonitor:
         logger.info(f"Summary table generated with {len(self.issues)} issues")
         return table
 
-    def run_checks(self):
-        """Run all risk monitoring checks"""
+    def run_checks(self, max_workers: int = CHECK_PARALLELISM):
+        """Run all risk monitoring checks, up to max_workers at a time, each on its own session"""
         logger.info("Starting all risk monitoring checks")
         console.print("[bold green]Starting Risk Monitoring Checks...[/bold green]")
         try:
-            self.check_strong_auth_for_high_value()
-            self.check_untrusted_device()
-            self.check_daily_transaction_limit()
+            results = run_checks_concurrently({
+                'strong_auth_for_high_value': self.check_strong_auth_for_high_value,
+                'untrusted_device': self.check_untrusted_device,
+                'daily_transaction_limit': self.check_daily_transaction_limit,
+            }, Session, max_workers)
+            for result in results:
+                self.check_seconds[result.name] = result.seconds
+                logger.info(f"Check {result.name} took {result.seconds:.2f}s")
+            for result in results:
+                if result.error is not None:
+                    raise result.error
             console.print("[bold green]Risk Monitoring Checks Completed[/bold green]")
             console.print(self.generate_summary())
             logger.info("All risk monitoring checks completed successfully")
@@ -0,0 +1,174 @@
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+
+def _split(total: int, num_workers: int) -> List[int]:
+    base, extra = divmod(total, num_workers)
+    return [base + (1 if i < extra else 0) for i in range(num_workers)]
+
+
+def _allocators(timo) -> Dict:
+    return {
+        'customers': timo.customer_ids,
+        'accounts': timo.account_ids,
+        'devices': timo.device_ids,
+        'transactions': timo.transaction_ids,
+        'auth_logs': timo.auth_log_ids,
+    }
+
+
+def _reserve_id_blocks(num_workers: int, counts: Dict[str, List[int]]) -> List[Dict[str, List[int]]]:
+    """Reserve disjoint ID lists per worker from each sequence in one statement per sequence."""
+    import generate_data_timo as timo
+
+    allocators = _allocators(timo)
+    blocks = [{} for _ in range(num_workers)]
+    session = timo.Session()
+    try:
+        with session.begin():
+            for name, per_worker in counts.items():
+                ids = allocators[name].reserve(session, sum(per_worker))
+                start = 0
+                for worker, count in enumerate(per_worker):
+                    blocks[worker][name] = ids[start:start + count]
+                    start += count
+    finally:
+        session.close()
+    return blocks
+
+
+def _run_worker(spec: Dict) -> Dict[str, int]:
+    """Run one generation phase in a worker process; each phase commits in its own transaction."""
+    import generate_data_timo as timo
+
+    index, count = spec['shard']
+    timo.set_key_shard(index, count)
+    timo.seed_generators(spec['seed'])
+    writer = timo.get_writer(spec['writer_backend'])
+    allocators = _allocators(timo)
+    for name, ids in spec['ids'].items():
+        allocators[name].preload(ids)
+
+    session = timo.Session()
+    try:
+        with session.begin():
+            if spec['phase'] == 'customers':
+                customers = timo.populate_customers(session, spec['num_customers'], writer=writer)
+                accounts = timo.populate_bank_accounts(session, customers, spec['accounts_per_customer'],
+                                                       writer=writer)
+                devices = timo.populate_devices(session, customers, spec['devices_per_customer'], writer=writer)
+                return {'customers': len(customers), 'accounts': len(accounts), 'devices': len(devices)}
+
+            if spec['num_transactions'] == 0:
+                return {'transactions': 0, 'auth_logs': 0}
+            transactions = timo.populate_payment_transactions(session, spec['num_transactions'], writer=writer,
+                                                              source_shard=(index, count))
+            logs = timo.populate_authentication_logs(session, transactions, writer=writer)
+            return {'transactions': len(transactions), 'auth_logs': len(logs)}
+    finally:
+        session.close()
+
+
+def _run_phase(phase: str, num_workers: int, ids: Dict[str, List[int]], params: Dict,
+               writer_backend: Optional[str], base_seed: Optional[int]) -> Dict:
+    base_seed = random.randrange(2 ** 32) if base_seed is None else base_seed
+    blocks = _reserve_id_blocks(num_workers, ids)
+    specs = [{
+        'phase': phase,
+        'shard': (worker, num_workers),
+        'seed': base_seed + worker,
+        'writer_backend': writer_backend,
+        'ids': blocks[worker],
+        **{name: values[worker] for name, values in params.items()},
+    } for worker in range(num_workers)]
+
+    totals = {}
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=context) as executor:
+        for result in executor.map(_run_worker, specs):
+            for name, value in result.items():
+                totals[name] = totals.get(name, 0) + value
+    return {'seed': base_seed, 'totals': totals}
+
+
+def generate_customers_parallel(
+        num_workers: int,
+        num_customers: int = 50,
+        accounts_per_customer: int = 2,
+        devices_per_customer: int = 2,
+        writer_backend: Optional[str] = None,
+        base_seed: Optional[int] = None
+) -> Dict:
+    """Generate customers, accounts and devices with num_workers processes, each committing its own share."""
+    if num_workers < 1:
+        raise ValueError("num_workers must be at least 1")
+    customer_counts = _split(num_customers, num_workers)
+    # Upper bounds: unused IDs only leave gaps in the sequences
+    ids = {
+        'customers': customer_counts,
+        'accounts': [n * accounts_per_customer for n in customer_counts],
+        'devices': [n * devices_per_customer for n in customer_counts],
+    }
+    params = {
+        'num_customers': customer_counts,
+        'accounts_per_customer': [accounts_per_customer] * num_workers,
+        'devices_per_customer': [devices_per_customer] * num_workers,
+    }
+    return _run_phase('customers', num_workers, ids, params, writer_backend, base_seed)
+
+
+def generate_transactions_parallel(
+        num_workers: int,
+        num_transactions: int = 250,
+        writer_backend: Optional[str] = None,
+        base_seed: Optional[int] = None
+) -> Dict:
+    """
+    Generate payment transactions and authentication logs with num_workers processes.
+    Worker i only uses source accounts of customers with customer_id % num_workers == i, so
+    workers never update the same daily summary rows.
+    """
+    if num_workers < 1:
+        raise ValueError("num_workers must be at least 1")
+    transaction_counts = _split(num_transactions, num_workers)
+    ids = {
+        'transactions': transaction_counts,
+        'auth_logs': [n * 2 for n in transaction_counts],
+    }
+    return _run_phase('transactions', num_workers, ids, {'num_transactions': transaction_counts},
+                      writer_backend, base_seed)
+
+
+def generate_parallel(
+        num_workers: int,
+        num_customers: int = 50,
+        num_transactions: int = 250,
+        accounts_per_customer: int = 2,
+        devices_per_customer: int = 2,
+        writer_backend: Optional[str] = None,
+        base_seed: Optional[int] = None
+) -> Dict:
+    """
+    Generate Timo data with num_workers processes.
+    Workers get disjoint pre-reserved ID ranges, disjoint business-key shards (value % num_workers)
+    and per-worker seeds. Customers, accounts and devices are created and committed first so that
+    every transaction worker sees the full set of destination accounts.
+    """
+    import generate_data_timo as timo
+
+    base_seed = random.randrange(2 ** 32) if base_seed is None else base_seed
+    session = timo.Session()
+    try:
+        timo.verify_authentication_methods(session)
+    finally:
+        session.close()
+
+    customers = generate_customers_parallel(num_workers, num_customers, accounts_per_customer,
+                                            devices_per_customer, writer_backend, base_seed)
+    transactions = generate_transactions_parallel(num_workers, num_transactions, writer_backend,
+                                                  base_seed + num_workers)
+    totals = {**customers['totals'], **transactions['totals']}
+    print(f"Parallel generation with {num_workers} workers (seed {base_seed}): {totals}")
+    return {'seed': base_seed, 'totals': totals}
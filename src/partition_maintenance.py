@@ -0,0 +1,153 @@
+import logging
+from logging.handlers import TimedRotatingFileHandler
+import re
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session, sessionmaker
+from dotenv import load_dotenv
+import os
+
+
+# Load environment variables
+load_dotenv()
+
+
+# Logging setup
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOG_DIR = os.path.join(BASE_DIR, 'logs')
+os.makedirs(LOG_DIR, exist_ok=True)
+
+log_file = os.path.join(LOG_DIR, 'partition_maintenance.log')
+
+logger = logging.getLogger('PartitionMaintenance')
+logger.setLevel(logging.INFO)
+handler = TimedRotatingFileHandler(
+    log_file,
+    when='midnight',
+    interval=1,
+    backupCount=7,
+    delay=True
+)
+formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+handler.setFormatter(formatter)
+logger.addHandler(handler)
+
+# Database connection setup
+db_params = {
+    'dbname': os.getenv("DB_NAME", "postgres"),
+    'user': os.getenv("DB_USER", "postgres"),
+    'password': os.getenv("DB_PASSWORD", "yourpassword"),
+    'host': os.getenv("DB_HOST", "localhost"),
+    'port': '5432'
+}
+connection_string = f"postgresql://{db_params['user']}:{db_params['password']}@{db_params['host']}:{db_params['port']}/{db_params['dbname']}"
+engine = create_engine(connection_string)
+SessionLocal = sessionmaker(bind=engine)
+
+# Monthly range-partitioned tables (see create_monthly_partitions in sql/schema.sql)
+PARTITIONED_TABLES = ['payment_transactions', 'authentication_logs']
+# Partitions kept ready beyond the current month
+MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+# Months of data to keep; unset keeps everything
+RETENTION_MONTHS = int(os.environ["PARTITION_RETENTION_MONTHS"]) if os.getenv("PARTITION_RETENTION_MONTHS") else None
+
+PARTITION_NAME = re.compile(r'_p(\d{4})(\d{2})$')
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class PartitionMaintenance:
+    """
+    Keeps the monthly partitions of payment_transactions and authentication_logs ahead of incoming data
+    and, when a retention period is set, drops whole months that fell out of it.
+    """
+
+    def __init__(self, months_ahead: int = MONTHS_AHEAD, retention_months: Optional[int] = RETENTION_MONTHS):
+        if retention_months is not None and retention_months < 1:
+            raise ValueError("retention_months must be at least 1")
+        self.months_ahead = months_ahead
+        self.retention_months = retention_months
+
+    def list_partitions(self, session: Session, parent: str) -> List[Tuple[str, date]]:
+        """Monthly partitions of parent as (name, first day of month), oldest first; the default partition is skipped."""
+        names = session.execute(text("""
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = CAST(:parent AS regclass)
+        """), {'parent': parent}).scalars().all()
+        partitions = []
+        for name in names:
+            match = PARTITION_NAME.search(name)
+            if match:
+                partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+        return sorted(partitions, key=lambda partition: partition[1])
+
+    def create_future_partitions(self, session: Session, today: Optional[date] = None) -> Dict[str, int]:
+        current_month = (today or date.today()).replace(day=1)
+        created = {}
+        for parent in PARTITIONED_TABLES:
+            created[parent] = session.execute(
+                text("SELECT create_monthly_partitions(:parent, :start, :months)"),
+                {'parent': parent, 'start': current_month, 'months': self.months_ahead + 1}
+            ).scalar_one()
+            if created[parent]:
+                logger.info(f"Created {created[parent]} partitions for {parent}")
+        return created
+
+    def drop_expired_partitions(self, session: Session, today: Optional[date] = None) -> Dict[str, List[str]]:
+        """
+        Drop partitions whose month ended before the retention window, with the keys, alerts and later
+        authentication logs of their transactions.
+        """
+        dropped = {parent: [] for parent in PARTITIONED_TABLES}
+        if self.retention_months is None:
+            return dropped
+
+        cutoff = add_months((today or date.today()).replace(day=1), -self.retention_months)
+        for parent in PARTITIONED_TABLES:
+            for name, month in self.list_partitions(session, parent):
+                if month >= cutoff:
+                    break
+                if parent == 'payment_transactions':
+                    # Dropping a partition fires no triggers; the deferred foreign keys to
+                    # payment_transaction_keys are checked at commit, after the expired log partitions are gone
+                    for table in ('risk_alerts', 'risk_alert_events', 'payment_transaction_keys'):
+                        session.execute(text(
+                            f'DELETE FROM {table} WHERE transaction_id IN (SELECT transaction_id FROM "{name}")'
+                        ))
+                    session.execute(text(f"""
+                        DELETE FROM authentication_logs
+                        WHERE auth_timestamp >= :cutoff
+                        AND transaction_id IN (SELECT transaction_id FROM "{name}")
+                    """), {'cutoff': cutoff})
+                session.execute(text(f'DROP TABLE "{name}"'))
+                dropped[parent].append(name)
+                logger.info(f"Dropped partition {name} (before {cutoff})")
+        return dropped
+
+    def run(self, today: Optional[date] = None) -> Dict:
+        session = SessionLocal()
+        try:
+            with session.begin():
+                created = self.create_future_partitions(session, today)
+                dropped = self.drop_expired_partitions(session, today)
+            return {'created': created, 'dropped': dropped}
+        except Exception as e:
+            logger.error(f"Partition maintenance failed: {str(e)}")
+            raise
+        finally:
+            session.close()
+
+
+def main():
+    result = PartitionMaintenance().run()
+    print(f"Partition maintenance completed: {result}")
+
+
+if __name__ == "__main__":
+    main()
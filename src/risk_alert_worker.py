@@ -0,0 +1,235 @@
+import logging
+from logging.handlers import TimedRotatingFileHandler
+import random
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session, sessionmaker
+from dotenv import load_dotenv
+import os
+
+
+# Load environment variables
+load_dotenv()
+
+
+# Logging setup
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOG_DIR = os.path.join(BASE_DIR, 'logs')
+os.makedirs(LOG_DIR, exist_ok=True)
+
+log_file = os.path.join(LOG_DIR, 'risk_alert_worker.log')
+
+logger = logging.getLogger('RiskAlertWorker')
+logger.setLevel(logging.INFO)
+handler = TimedRotatingFileHandler(
+    log_file,
+    when='midnight',
+    interval=1,
+    backupCount=7,
+    delay=True
+)
+formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+handler.setFormatter(formatter)
+logger.addHandler(handler)
+
+# Database connection setup
+db_params = {
+    'dbname': os.getenv("DB_NAME", "postgres"),
+    'user': os.getenv("DB_USER", "postgres"),
+    'password': os.getenv("DB_PASSWORD", "yourpassword"),
+    'host': os.getenv("DB_HOST", "localhost"),
+    'port': '5432'
+}
+connection_string = f"postgresql://{db_params['user']}:{db_params['password']}@{db_params['host']}:{db_params['port']}/{db_params['dbname']}"
+engine = create_engine(connection_string)
+SessionLocal = sessionmaker(bind=engine)
+
+# Events claimed and evaluated per transaction
+QUEUE_BATCH_SIZE = int(os.getenv("RISK_ALERT_BATCH_SIZE", "1000"))
+
+
+class AlertRule(NamedTuple):
+    alert_type: str
+    applies: Callable[[Dict], bool]
+    message: Callable[[Dict], str]
+
+
+# Same rules, order and messages as update_daily_summary. Device trust, authentication results and day
+# counts and totals are the values the trigger queued with the event (customer_daily_state at insert time).
+ALERT_RULES: List[AlertRule] = [
+    AlertRule(
+        'auth_failure',
+        lambda t: t['auth_failure_count'] > 0,
+        lambda t: f"Authentication failure detected for transaction {t['transaction_id']} ({t['auth_failure_count']} failures)"
+    ),
+    AlertRule(
+        'auth_failure_rate',
+        lambda t: t['day_failure_count'] > 3,
+        lambda t: f"Customer {t['customer_id']} has {t['day_failure_count']} authentication failures on {t['day']}"
+    ),
+    AlertRule(
+        'strong_auth_required',
+        lambda t: t['amount'] > 10000000 and not t['has_strong_auth'],
+        lambda t: f"Transaction {t['transaction_id']} with amount {t['amount']} VND used weak authentication (Level {t['security_level']})"
+    ),
+    AlertRule(
+        'untrusted_device',
+        lambda t: not t['is_trusted'] and not t['has_strong_auth'],
+        lambda t: f"Transaction {t['transaction_id']} on untrusted device {t['device_id']} lacks strong authentication (C/D)"
+    ),
+    AlertRule(
+        'weak_authentication',
+        lambda t: t['security_level'] < t['required_level'],
+        lambda t: f"Weak authentication (Level {t['security_level']}) used for transaction {t['transaction_id']} requiring Level {t['required_level']}"
+    ),
+    AlertRule(
+        'high_value_transaction',
+        lambda t: t['is_high_value'],
+        lambda t: f"High-value transaction detected: {t['amount']} VND for {t['transaction_group']}"
+    ),
+    AlertRule(
+        'unusual_pattern',
+        lambda t: t['high_value_count'] > 3,
+        lambda t: f"Unusual pattern: {t['high_value_count']} high-value transactions on {t['day']}"
+    ),
+    AlertRule(
+        'unusual_cross_border_frequency',
+        lambda t: t['customer_type'] == 'organization' and t['intl_transfer_count'] > 3,
+        lambda t: f"Unusual frequency: {t['intl_transfer_count']} international transfers on {t['day']}"
+    ),
+    AlertRule(
+        'high_payment_volume',
+        lambda t: t['customer_type'] == 'organization' and t['payment_count'] > 10,
+        lambda t: f"High volume: {t['payment_count']} payment transactions on {t['day']}"
+    ),
+    AlertRule(
+        'daily_limit_strong_auth',
+        lambda t: t['daily_total'] > 20000000 and not t['day_strong_auth'],
+        lambda t: f"Customer {t['customer_id']} on {t['day']} has total amount {t['daily_total']} VND without strong authentication"
+    ),
+]
+
+CLAIM_EVENTS_SQL = text("""
+    SELECT event_id, transaction_id
+    FROM risk_alert_events
+    ORDER BY event_id
+    LIMIT :limit
+    FOR UPDATE SKIP LOCKED
+""")
+
+# Everything the rules need for the claimed events, in one round trip
+TRANSACTION_CONTEXT_SQL = text("""
+    SELECT
+        pt.transaction_id, pt.customer_id, pt.device_id, pt.amount, pt.security_level,
+        pt.transaction_date::DATE AS day, pt.customer_type,
+        transaction_group_of(pt.customer_type, pt.transaction_type) AS transaction_group,
+        required_security_level(pt.customer_type, transaction_group_of(pt.customer_type, pt.transaction_type), pt.amount) AS required_level,
+        is_high_value_transaction(pt.customer_type, transaction_group_of(pt.customer_type, pt.transaction_type), pt.amount) AS is_high_value,
+        e.is_trusted, e.has_strong_auth, e.auth_failure_count, e.daily_total, e.day_strong_auth,
+        e.day_failure_count, e.high_value_count, e.intl_transfer_count, e.payment_count
+    FROM risk_alert_events e
+    JOIN payment_transactions pt ON pt.transaction_id = e.transaction_id
+    WHERE e.event_id = ANY(:event_ids)
+    ORDER BY pt.transaction_id, e.event_id
+""")
+
+INSERT_ALERTS_SQL = text("""
+    INSERT INTO risk_alerts (transaction_id, alert_type, alert_message, status, created_at, resolved_at)
+    VALUES (:transaction_id, :alert_type, :alert_message, :status, :created_at, :resolved_at)
+""")
+
+DELETE_EVENTS_SQL = text("DELETE FROM risk_alert_events WHERE event_id = ANY(:event_ids)")
+
+
+def random_alert_status() -> str:
+    # Same distribution as the CASE WHEN random() ... expression in the trigger
+    if random.random() < 0.40:
+        return 'open'
+    if random.random() < 0.70:
+        return 'investigating'
+    if random.random() < 0.90:
+        return 'resolved'
+    return 'false_positive'
+
+
+def evaluate_rules(transaction: Dict, rules: List[AlertRule] = ALERT_RULES) -> List[Dict]:
+    now = datetime.now()
+    return [
+        {
+            'transaction_id': transaction['transaction_id'],
+            'alert_type': rule.alert_type,
+            'alert_message': rule.message(transaction),
+            'status': random_alert_status(),
+            'created_at': now,
+            'resolved_at': None if random.random() < 0.90 else now
+        }
+        for rule in rules
+        if rule.applies(transaction)
+    ]
+
+
+class RiskAlertWorker:
+    """
+    Drains risk_alert_events in batches: claims events with FOR UPDATE SKIP LOCKED (so several workers
+    can run side by side), evaluates ALERT_RULES for the claimed transactions, bulk-inserts the alerts
+    and deletes the events in the same transaction.
+    """
+
+    def __init__(self, batch_size: int = QUEUE_BATCH_SIZE, rules: Optional[List[AlertRule]] = None):
+        self.batch_size = batch_size
+        self.rules = rules or ALERT_RULES
+        logger.info(f"Initialized RiskAlertWorker (batch size {batch_size}, {len(self.rules)} rules)")
+
+    def process_batch(self, session: Session) -> Dict[str, int]:
+        events = session.execute(CLAIM_EVENTS_SQL, {'limit': self.batch_size}).all()
+        if not events:
+            return {'events': 0, 'alerts': 0}
+
+        event_ids = [event.event_id for event in events]
+        transactions = session.execute(TRANSACTION_CONTEXT_SQL, {'event_ids': event_ids}).mappings().all()
+        alerts = [alert for transaction in transactions for alert in evaluate_rules(transaction, self.rules)]
+        if alerts:
+            session.execute(INSERT_ALERTS_SQL, alerts)
+        session.execute(DELETE_EVENTS_SQL, {'event_ids': event_ids})
+
+        missing = len(events) - len(transactions)
+        if missing:
+            logger.warning(f"{missing} queued transactions no longer exist; their events were dropped")
+        return {'events': len(events), 'alerts': len(alerts)}
+
+    def drain(self, max_batches: Optional[int] = None) -> Dict[str, int]:
+        """Process batches until the queue is empty (or max_batches is reached); each batch commits on its own."""
+        totals = {'events': 0, 'alerts': 0, 'batches': 0}
+        while max_batches is None or totals['batches'] < max_batches:
+            session = SessionLocal()
+            try:
+                with session.begin():
+                    result = self.process_batch(session)
+            except Exception as e:
+                logger.error(f"Risk alert batch failed: {str(e)}")
+                raise
+            finally:
+                session.close()
+            if result['events'] == 0:
+                break
+            totals['events'] += result['events']
+            totals['alerts'] += result['alerts']
+            totals['batches'] += 1
+            logger.info(f"Processed {result['events']} events, inserted {result['alerts']} alerts")
+        return totals
+
+    def run_forever(self, poll_interval: float = 5.0):
+        logger.info("Starting risk alert worker loop")
+        while True:
+            if self.drain()['events'] == 0:
+                time.sleep(poll_interval)
+
+
+def main():
+    RiskAlertWorker().run_forever()
+
+
+if __name__ == "__main__":
+    main()
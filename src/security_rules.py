@@ -0,0 +1,208 @@
+from datetime import date
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+from models import CustomerDailyState
+from transaction_sampler import to_cents
+
+
+# Security levels as int8 codes (index into SECURITY_LEVELS)
+SECURITY_LEVELS = np.array(['A', 'B', 'C', 'D'])
+LEVEL_A, LEVEL_B, LEVEL_C, LEVEL_D = range(4)
+
+CUSTOMER_TYPES = ('individual', 'organization')
+TRANSACTION_TYPES = (
+    'inquiry', 'transfer_same_bank_same_owner', 'payment_goods_services', 'transfer_same_bank_diff_owner',
+    'transfer_interbank_domestic', 'ewallet_transfer', 'ewallet_topup', 'ewallet_withdrawal',
+    'transfer_interbank_international'
+)
+INQUIRY, SAME_OWNER, PAYMENT, _, _, _, _, _, INTERNATIONAL = range(len(TRANSACTION_TYPES))
+# Group I.3 for individuals (with payments, group II.3 for organizations)
+DOMESTIC_TRANSFERS = np.array([TRANSACTION_TYPES.index(t) for t in (
+    'transfer_same_bank_diff_owner', 'transfer_interbank_domestic',
+    'ewallet_transfer', 'ewallet_topup', 'ewallet_withdrawal'
+)])
+
+# Thresholds of classify_security_level (sql/schema.sql), in cents
+VND = 100
+I2_LIMITS = (5000000 * VND, 100000000 * VND, 1500000000 * VND)
+I3_SMALL_AMOUNT = 10000000 * VND
+I3_TKSTH_LIMIT = 20000000 * VND
+I3_MAX_AMOUNT = 500000000 * VND
+I3_DAILY_LIMIT = 1500000000 * VND
+I4_AMOUNT_LIMIT, I4_DAILY_LIMIT = 200000000 * VND, 1000000000 * VND
+II3_AMOUNT_LIMIT, II3_DAILY_LIMIT = 1000000000 * VND, 10000000000 * VND
+II4_AMOUNT_LIMIT, II4_DAILY_LIMIT = 500000000 * VND, 5000000000 * VND
+
+
+# customer_daily_state row of a (customer_id, day): (daily_total_cents, ab_total_cents, has_strong_auth)
+DailyState = Tuple[int, int, bool]
+
+
+class ClassifiedBatch(NamedTuple):
+    """Security levels of a batch (in input order) and the customer-day states after it."""
+    security_level: np.ndarray
+    daily_state: Dict[Tuple[int, date], DailyState]
+
+
+def encode(values, vocabulary: Sequence[str]) -> np.ndarray:
+    """Map strings to their index in vocabulary (-1 when unknown); integer input is taken as codes already."""
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.integer):
+        return values.astype(np.int8)
+    uniques, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    lookup = {value: code for code, value in enumerate(vocabulary)}
+    return np.array([lookup.get(value, -1) for value in uniques.tolist()], dtype=np.int8)[inverse.reshape(-1)]
+
+
+def classify_security_levels(customer_type: np.ndarray, transaction_type: np.ndarray, amount_cents: np.ndarray,
+                             daily_total_cents: np.ndarray, tksth_cents: np.ndarray,
+                             current_level: np.ndarray) -> np.ndarray:
+    """
+    Element-wise classify_security_level() on encoded arrays. Rows outside the known customer and
+    transaction types keep current_level, as in the trigger.
+    """
+    level = np.array(current_level, dtype=np.int8, copy=True)
+    total = amount_cents + daily_total_cents
+    individual = customer_type == 0
+    organization = customer_type == 1
+    domestic = np.isin(transaction_type, DOMESTIC_TRANSFERS)
+
+    # Group I.1: Inquiry and same-bank same-owner transfers
+    rows = individual & ((transaction_type == INQUIRY) | (transaction_type == SAME_OWNER))
+    level[rows] = LEVEL_A
+
+    # Group I.2: Payment for goods and services
+    rows = individual & (transaction_type == PAYMENT)
+    level[rows] = np.select(
+        [total[rows] <= I2_LIMITS[0], total[rows] <= I2_LIMITS[1], total[rows] <= I2_LIMITS[2]],
+        [LEVEL_A, LEVEL_B, LEVEL_C], LEVEL_D
+    )
+
+    # Group I.3: Other domestic transfers and e-wallet operations
+    rows = individual & domestic
+    amount, day_total, tksth = amount_cents[rows], total[rows], tksth_cents[rows]
+    small = amount <= I3_SMALL_AMOUNT
+    level[rows] = np.select(
+        [small & (amount + tksth <= I3_TKSTH_LIMIT), (amount <= I3_MAX_AMOUNT) & (day_total <= I3_DAILY_LIMIT)],
+        [LEVEL_B, LEVEL_C], LEVEL_D
+    )
+
+    # Group I.4: International transfers
+    rows = individual & (transaction_type == INTERNATIONAL)
+    level[rows] = np.where((amount_cents[rows] <= I4_AMOUNT_LIMIT) & (total[rows] <= I4_DAILY_LIMIT),
+                           LEVEL_B, LEVEL_C)
+
+    # Groups II.1 and II.2: Inquiry and same-bank same-owner transfers
+    rows = organization & ((transaction_type == INQUIRY) | (transaction_type == SAME_OWNER))
+    level[rows] = LEVEL_A
+
+    # Group II.3: Other domestic transfers, payments, and e-wallet operations
+    rows = organization & (domestic | (transaction_type == PAYMENT))
+    level[rows] = np.where((amount_cents[rows] <= II3_AMOUNT_LIMIT) & (total[rows] <= II3_DAILY_LIMIT),
+                           LEVEL_B, LEVEL_C)
+
+    # Group II.4: International transfers
+    rows = organization & (transaction_type == INTERNATIONAL)
+    level[rows] = np.where((amount_cents[rows] <= II4_AMOUNT_LIMIT) & (total[rows] <= II4_DAILY_LIMIT),
+                           LEVEL_B, LEVEL_C)
+
+    return level
+
+
+def classify_batch(customer_ids, transaction_dates, customer_types, transaction_types, amount_cents,
+                   current_levels=None,
+                   daily_state: Optional[Dict[Tuple[int, date], DailyState]] = None) -> ClassifiedBatch:
+    """
+    Classify a batch of transactions as if they were inserted one by one, in the given order, through
+    classify_transaction(). Inputs are array-likes (lists, NumPy arrays or pandas columns); daily_state
+    holds the customer_daily_state rows before the batch (missing customer-days start empty).
+
+    Daily totals are running sums per customer-day. Tksth depends on the levels of earlier rows, but only
+    individual I.3 transfers up to 10M VND read it: those are classified rank by rank over all customer-days
+    at once, like the recursive CTE of process_staged_transactions(); every other row in one pass.
+    """
+    customer_ids = np.asarray(customer_ids, dtype=np.int64)
+    days = np.asarray(transaction_dates, dtype='datetime64[us]').astype('datetime64[D]')
+    amounts = np.asarray(amount_cents, dtype=np.int64)
+    customer_type = encode(customer_types, CUSTOMER_TYPES)
+    transaction_type = encode(transaction_types, TRANSACTION_TYPES)
+    size = len(customer_ids)
+    if current_levels is None:
+        current = np.full(size, LEVEL_A, dtype=np.int8)
+    else:
+        current = encode(current_levels, SECURITY_LEVELS.tolist())
+        if (current < 0).any():
+            raise ValueError("current_levels must be one of A, B, C, D")
+
+    # Rows grouped by customer-day, input order kept within each group
+    order = np.lexsort((days, customer_ids))
+    customer_ids, days, amounts = customer_ids[order], days[order], amounts[order]
+    customer_type, transaction_type, current = customer_type[order], transaction_type[order], current[order]
+    new_group = np.ones(size, dtype=bool)
+    new_group[1:] = (customer_ids[1:] != customer_ids[:-1]) | (days[1:] != days[:-1])
+    starts = np.flatnonzero(new_group)
+    group = np.cumsum(new_group) - 1
+
+    base_total = np.zeros(len(starts), dtype=np.int64)
+    base_ab = np.zeros(len(starts), dtype=np.int64)
+    strong_auth = np.zeros(len(starts), dtype=bool)
+    keys = list(zip(customer_ids[starts].tolist(), days[starts].tolist()))
+    if daily_state:
+        for g, state in enumerate(map(daily_state.get, keys)):
+            if state is not None:
+                base_total[g], base_ab[g], strong_auth[g] = state
+
+    # Daily total (G + T) before each row
+    running = np.cumsum(amounts)
+    group_offset = running[starts] - amounts[starts]
+    daily_total = base_total[group] + running - group_offset[group] - amounts
+
+    # Rows whose level does not depend on Tksth
+    reads_tksth = (customer_type == 0) & np.isin(transaction_type, DOMESTIC_TRANSFERS) & (amounts <= I3_SMALL_AMOUNT)
+    level = classify_security_levels(customer_type, transaction_type, amounts, daily_total,
+                                     np.zeros(size, dtype=np.int64), current)
+
+    # Tksth before each row from the fixed rows, plus the dependent rows classified so far per group
+    fixed_ab = np.where(~reads_tksth & (level <= LEVEL_B), amounts, 0)
+    running = np.cumsum(fixed_ab)
+    fixed_ab_before = running - (running[starts] - fixed_ab[starts])[group] - fixed_ab
+    dependent_ab = np.zeros(len(starts), dtype=np.int64)
+
+    dependent = np.flatnonzero(reads_tksth)
+    rank = np.arange(len(dependent)) - np.searchsorted(dependent, starts[group[dependent]])
+    by_rank = dependent[np.argsort(rank, kind='stable')]
+    for rows in np.split(by_rank, np.cumsum(np.bincount(rank))[:-1]) if len(dependent) else []:
+        g = group[rows]
+        tksth = np.where(strong_auth[g], 0, base_ab[g] + fixed_ab_before[rows] + dependent_ab[g])
+        level[rows] = classify_security_levels(customer_type[rows], transaction_type[rows], amounts[rows],
+                                               daily_total[rows], tksth, current[rows])
+        dependent_ab[g] += np.where(level[rows] <= LEVEL_B, amounts[rows], 0)
+
+    # customer_daily_state after the batch
+    ab_amounts = np.where(level <= LEVEL_B, amounts, 0)
+    final_total = base_total + np.add.reduceat(amounts, starts) if size else base_total
+    final_ab = base_ab + np.add.reduceat(ab_amounts, starts) if size else base_ab
+    state_after = dict(daily_state or {})
+    state_after.update(zip(keys, zip(final_total.tolist(), final_ab.tolist(), strong_auth.tolist())))
+
+    security_level = np.empty(size, dtype=SECURITY_LEVELS.dtype)
+    security_level[order] = SECURITY_LEVELS[level]
+    return ClassifiedBatch(security_level, state_after)
+
+
+def load_daily_state(session: Session, keys) -> Dict[Tuple[int, date], DailyState]:
+    """Read the customer_daily_state rows of the given (customer_id, day) keys."""
+    keys = list(set(keys))
+    if not keys:
+        return {}
+    rows = session.execute(
+        select(CustomerDailyState.customer_id, CustomerDailyState.day, CustomerDailyState.daily_total,
+               CustomerDailyState.ab_total, CustomerDailyState.has_strong_auth)
+        .where(tuple_(CustomerDailyState.customer_id, CustomerDailyState.day).in_(keys))
+    ).all()
+    return {
+        (customer_id, day): (to_cents(daily_total), to_cents(ab_total), has_strong_auth)
+        for customer_id, day, daily_total, ab_total, has_strong_auth in rows
+    }
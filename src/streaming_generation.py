@@ -0,0 +1,148 @@
+import os
+import uuid
+from typing import Dict, Iterator, Optional
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from models import GenerationCheckpoint
+import generate_data_timo as timo
+
+
+# Rows generated and committed per chunk; memory use and lock duration are bounded by one chunk
+DEFAULT_CHUNK_SIZE = int(os.getenv("GENERATOR_CHUNK_SIZE", "50000"))
+
+
+def iter_chunk_sizes(total: int, chunk_size: int, start: int = 0) -> Iterator[int]:
+    """Yield the sizes of the chunks still to generate after `start` of `total` rows."""
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    done = start
+    while done < total:
+        size = min(chunk_size, total - done)
+        yield size
+        done += size
+
+
+def load_checkpoint(session: Session, run_id: str, stage: str) -> int:
+    rows_done = session.execute(
+        select(GenerationCheckpoint.rows_done)
+        .where(GenerationCheckpoint.run_id == run_id, GenerationCheckpoint.stage == stage)
+    ).scalar_one_or_none()
+    return rows_done or 0
+
+
+def save_checkpoint(session: Session, run_id: str, stage: str, rows_done: int, rows_written: int):
+    """Record chunk progress; called inside the chunk's transaction so it commits atomically with the rows."""
+    statement = insert(GenerationCheckpoint).values(
+        run_id=run_id, stage=stage, rows_done=rows_done, rows_written=rows_written
+    )
+    session.execute(statement.on_conflict_do_update(
+        index_elements=[GenerationCheckpoint.run_id, GenerationCheckpoint.stage],
+        set_={
+            'rows_done': statement.excluded.rows_done,
+            'rows_written': GenerationCheckpoint.rows_written + statement.excluded.rows_written,
+            'updated_at': func.current_timestamp()
+        }
+    ))
+
+
+def _stream_stage(run_id: str, stage: str, total: int, chunk_size: int, generate_chunk) -> Dict[str, int]:
+    session = timo.Session()
+    try:
+        with session.begin():
+            start = load_checkpoint(session, run_id, stage)
+        if start:
+            print(f"Resuming {stage} for run {run_id} from row {start}/{total}")
+
+        done, written = start, 0
+        for size in iter_chunk_sizes(total, chunk_size, start):
+            with session.begin():
+                rows = generate_chunk(session, size)
+                done += size
+                save_checkpoint(session, run_id, stage, done, rows)
+            written += rows
+            session.expunge_all()
+            print(f"{stage}: committed {done}/{total} (run {run_id})")
+        return {'rows_done': done, 'rows_written': written}
+    finally:
+        session.close()
+
+
+def stream_customers(
+        run_id: str,
+        num_customers: int,
+        accounts_per_customer: int = 2,
+        devices_per_customer: int = 2,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        writer_backend: Optional[str] = None
+) -> Dict[str, int]:
+    """Generate customers with their accounts and devices, committing one chunk of customers at a time."""
+    writer = timo.get_writer(writer_backend)
+
+    def generate_chunk(session: Session, size: int) -> int:
+        customers = timo.populate_customers(session, size, writer=writer)
+        timo.populate_bank_accounts(session, customers, accounts_per_customer, writer=writer)
+        timo.populate_devices(session, customers, devices_per_customer, writer=writer)
+        return len(customers)
+
+    return _stream_stage(run_id, 'customers', num_customers, chunk_size, generate_chunk)
+
+
+def stream_transactions(
+        run_id: str,
+        num_transactions: int,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        writer_backend: Optional[str] = None
+) -> Dict[str, int]:
+    """
+    Generate payment transactions and their authentication logs, committing one chunk at a time.
+    Accounts, devices and other-bank accounts are read once per stage; balances are carried over
+    from chunk to chunk in memory.
+    """
+    writer = timo.get_writer(writer_backend)
+    sources = None
+
+    def generate_chunk(session: Session, size: int) -> int:
+        nonlocal sources
+        if sources is None:
+            sources = timo.load_transaction_sources(session)
+        transactions = timo.populate_payment_transactions(session, size, writer=writer, sources=sources)
+        timo.populate_authentication_logs(session, transactions, writer=writer)
+        return len(transactions)
+
+    return _stream_stage(run_id, 'transactions', num_transactions, chunk_size, generate_chunk)
+
+
+def stream_generation(
+        run_id: Optional[str] = None,
+        num_customers: int = 50,
+        num_transactions: int = 250,
+        accounts_per_customer: int = 2,
+        devices_per_customer: int = 2,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        writer_backend: Optional[str] = None
+) -> Dict:
+    """
+    Constant-memory generation run. Each chunk is written and committed together with its checkpoint
+    in generation_checkpoints, so re-running with the same run_id resumes after the last committed chunk.
+    """
+    run_id = run_id or uuid.uuid4().hex
+    session = timo.Session()
+    try:
+        timo.verify_authentication_methods(session)
+    finally:
+        session.close()
+
+    customers = stream_customers(run_id, num_customers, accounts_per_customer, devices_per_customer,
+                                 chunk_size, writer_backend)
+    transactions = stream_transactions(run_id, num_transactions, chunk_size, writer_backend)
+    return {'run_id': run_id, 'customers': customers, 'transactions': transactions}
+
+
+if __name__ == "__main__":
+    result = stream_generation(
+        run_id=os.getenv("GENERATOR_RUN_ID"),
+        num_customers=int(os.getenv("GENERATOR_CUSTOMERS", "50")),
+        num_transactions=int(os.getenv("GENERATOR_TRANSACTIONS", "250"))
+    )
+    print(f"Streaming generation completed: {result}")
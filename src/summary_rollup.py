@@ -0,0 +1,78 @@
+import logging
+from logging.handlers import TimedRotatingFileHandler
+from typing import Dict, Optional
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from dotenv import load_dotenv
+import os
+
+
+# Load environment variables
+load_dotenv()
+
+
+# Logging setup
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOG_DIR = os.path.join(BASE_DIR, 'logs')
+os.makedirs(LOG_DIR, exist_ok=True)
+
+log_file = os.path.join(LOG_DIR, 'summary_rollup.log')
+
+logger = logging.getLogger('SummaryRollup')
+logger.setLevel(logging.INFO)
+handler = TimedRotatingFileHandler(
+    log_file,
+    when='midnight',
+    interval=1,
+    backupCount=7,
+    delay=True
+)
+formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+handler.setFormatter(formatter)
+logger.addHandler(handler)
+
+# Database connection setup
+db_params = {
+    'dbname': os.getenv("DB_NAME", "postgres"),
+    'user': os.getenv("DB_USER", "postgres"),
+    'password': os.getenv("DB_PASSWORD", "yourpassword"),
+    'host': os.getenv("DB_HOST", "localhost"),
+    'port': '5432'
+}
+connection_string = f"postgresql://{db_params['user']}:{db_params['password']}@{db_params['host']}:{db_params['port']}/{db_params['dbname']}"
+engine = create_engine(connection_string)
+SessionLocal = sessionmaker(bind=engine)
+
+# Deltas compacted per transaction
+ROLLUP_BATCH_SIZE = int(os.getenv("SUMMARY_ROLLUP_BATCH_SIZE", "100000"))
+
+
+def rollup_summary_deltas(batch_size: int = ROLLUP_BATCH_SIZE, max_batches: Optional[int] = None) -> Dict[str, int]:
+    """
+    Compact pending daily_transaction_summary_deltas into daily_transaction_summaries with
+    rollup_daily_summary_deltas(), one committed batch at a time, until no deltas are left.
+    """
+    totals = {'deltas': 0, 'batches': 0}
+    while max_batches is None or totals['batches'] < max_batches:
+        session = SessionLocal()
+        try:
+            with session.begin():
+                rolled_up = session.execute(
+                    text("SELECT rollup_daily_summary_deltas(:limit)"), {'limit': batch_size}
+                ).scalar_one()
+        except Exception as e:
+            logger.error(f"Summary rollup failed: {str(e)}")
+            raise
+        finally:
+            session.close()
+        if rolled_up == 0:
+            break
+        totals['deltas'] += rolled_up
+        totals['batches'] += 1
+        logger.info(f"Rolled up {rolled_up} summary deltas")
+    return totals
+
+
+if __name__ == "__main__":
+    result = rollup_summary_deltas()
+    print(f"Summary rollup completed: {result}")
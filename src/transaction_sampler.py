@@ -0,0 +1,169 @@
+from decimal import Decimal
+from typing import Dict, NamedTuple, Optional
+import numpy as np
+
+
+class TransactionBatch(NamedTuple):
+    """Column arrays for one batch of candidate transactions (amounts are in cents)."""
+    transaction_type: np.ndarray
+    source_index: np.ndarray
+    amount_cents: np.ndarray
+    status: np.ndarray
+    device_index: np.ndarray
+    is_suspicious: np.ndarray
+
+    def rows(self):
+        return zip(self.transaction_type.tolist(), self.source_index.tolist(), self.amount_cents.tolist(),
+                   self.status.tolist(), self.device_index.tolist(), self.is_suspicious.tolist())
+
+
+def to_cents(value) -> int:
+    return int(Decimal(str(value)) * 100)
+
+
+def cents_to_decimal(cents: int) -> Decimal:
+    return Decimal(int(cents)).scaleb(-2)
+
+
+class TransactionBatchSampler:
+    """
+    NumPy batch sampler for transaction attributes.
+    Amounts follow AMOUNT_DISTRIBUTION (generate_data_timo.py): an affordable edge case with edge_case_weight,
+    otherwise a range picked by weight and capped at the balance, falling back to 10,000-1,000,000 VND when the
+    range lies above it. A whole batch is drawn at once in integer cents.
+    """
+
+    FALLBACK_MIN_CENTS = 1000000       # 10,000 VND
+    FALLBACK_MAX_CENTS = 100000000     # 1,000,000 VND
+    SUSPICIOUS_THRESHOLD_CENTS = 100000000000  # 1B VND
+
+    def __init__(self, amount_distribution: Dict, transaction_types: Dict[str, float],
+                 transaction_statuses: Dict[str, float], seed: Optional[int] = None):
+        self.rng = np.random.default_rng(seed)
+
+        self.transaction_types = list(transaction_types)
+        self.type_weights = np.array(list(transaction_types.values()), dtype=float)
+        self.type_weights /= self.type_weights.sum()
+        self.inquiry_type = self.transaction_types.index('inquiry') if 'inquiry' in self.transaction_types else -1
+
+        self.statuses = list(transaction_statuses)
+        self.status_weights = np.array(list(transaction_statuses.values()), dtype=float)
+        self.status_weights /= self.status_weights.sum()
+
+        # Precompute everything the scalar version rebuilt on every call
+        self.edge_case_weight = amount_distribution['edge_case_weight']
+        self.edge_cases = np.array([to_cents(a) for a in amount_distribution['edge_cases']], dtype=np.int64)
+        self.sorted_edge_cases = np.sort(self.edge_cases)
+        ranges = [(key, weight) for key, weight in amount_distribution.items() if isinstance(key, tuple)]
+        self.range_min = np.array([to_cents(key[0]) for key, _ in ranges], dtype=np.int64)
+        self.range_max = np.array([to_cents(key[1]) for key, _ in ranges], dtype=np.int64)
+        self.range_thresholds = np.cumsum([weight for _, weight in ranges]) + self.edge_case_weight
+
+    def _uniform_cents(self, low: np.ndarray, high: np.ndarray) -> np.ndarray:
+        # Matches random.uniform(a, b) semantics when b < a by sampling the swapped interval
+        lo = np.minimum(low, high)
+        hi = np.maximum(low, high)
+        return lo + np.floor(self.rng.random(lo.shape) * (hi - lo + 1)).astype(np.int64)
+
+    def sample_amounts(self, balance_cents: np.ndarray) -> np.ndarray:
+        size = balance_cents.shape[0]
+        choice = self.rng.random(size)
+        amounts = np.zeros(size, dtype=np.int64)
+        resolved = np.zeros(size, dtype=bool)
+
+        # Edge cases: keep the drawn edge value if affordable, otherwise draw among affordable ones
+        edge = choice < self.edge_case_weight
+        if edge.any():
+            drawn = self.edge_cases[self.rng.integers(0, len(self.edge_cases), size)]
+            affordable = self.rng.random(size)
+            num_affordable = np.searchsorted(self.sorted_edge_cases, balance_cents, side='right')
+            smaller = self.sorted_edge_cases[np.minimum((affordable * num_affordable).astype(np.int64),
+                                                        len(self.sorted_edge_cases) - 1)]
+            use_drawn = edge & (drawn <= balance_cents)
+            use_smaller = edge & ~use_drawn & (num_affordable > 0)
+            amounts[use_drawn] = drawn[use_drawn]
+            amounts[use_smaller] = smaller[use_smaller]
+            resolved |= use_drawn | use_smaller
+
+        # Normal ranges: first range whose cumulative threshold exceeds the draw, capped by balance
+        range_index = np.searchsorted(self.range_thresholds, choice, side='right')
+        in_range = ~resolved & (range_index < len(self.range_thresholds))
+        safe_index = np.minimum(range_index, len(self.range_thresholds) - 1)
+        low = self.range_min[safe_index]
+        upper = np.minimum(self.range_max[safe_index], balance_cents)
+        fallback_upper = np.minimum(balance_cents, self.FALLBACK_MAX_CENTS)
+        fits = low <= upper
+
+        ranged = in_range & fits
+        amounts[ranged] = self._uniform_cents(low[ranged], upper[ranged])
+        fallback = ~resolved & ~ranged
+        amounts[fallback] = self._uniform_cents(np.full(fallback.sum(), self.FALLBACK_MIN_CENTS, dtype=np.int64),
+                                                fallback_upper[fallback])
+        return amounts
+
+    def sample(self, size: int, balance_cents: np.ndarray, num_devices: int,
+               source_index: Optional[np.ndarray] = None) -> TransactionBatch:
+        """
+        Draw a batch of candidate transactions. Source accounts are drawn uniformly from
+        balance_cents unless source_index is given; amounts are capped by the source balance.
+        """
+        if source_index is None:
+            source_index = self.rng.integers(0, balance_cents.shape[0], size)
+        transaction_type = self.rng.choice(len(self.transaction_types), size=size, p=self.type_weights)
+        amount_cents = self.sample_amounts(balance_cents[source_index])
+        status = self.rng.choice(len(self.statuses), size=size, p=self.status_weights)
+        device_index = self.rng.integers(0, num_devices, size)
+
+        is_inquiry = transaction_type == self.inquiry_type
+        amount_cents[is_inquiry] = 0
+        suspicious_rate = np.where(amount_cents > self.SUSPICIOUS_THRESHOLD_CENTS, 0.2, 0.1)
+        is_suspicious = (self.rng.random(size) < suspicious_rate) & ~is_inquiry
+
+        return TransactionBatch(transaction_type, source_index, amount_cents, status, device_index, is_suspicious)
+
+
+class AccountSamplingIndex:
+    """
+    Compact array-backed index of accounts grouped by customer (CSR-style offsets).
+    Source, same-owner and other-owner destination picks are O(1) per draw; other-owner
+    picks use rejection sampling over all accounts.
+    """
+
+    MAX_REJECTIONS = 64
+
+    def __init__(self, account_ids: np.ndarray, customer_ids: np.ndarray, rng: Optional[np.random.Generator] = None):
+        self.rng = rng or np.random.default_rng()
+        order = np.argsort(customer_ids, kind='stable')
+        self.order = order
+        self.account_ids = np.asarray(account_ids, dtype=np.int64)[order]
+        self.customer_ids = np.asarray(customer_ids, dtype=np.int64)[order]
+
+        _, starts, counts = np.unique(self.customer_ids, return_index=True, return_counts=True)
+        self.offsets = np.append(starts, len(self.account_ids)).astype(np.int64)
+        self.group_of = np.repeat(np.arange(len(counts), dtype=np.int32), counts)
+        self.single_owner = len(counts) <= 1
+
+    def __len__(self) -> int:
+        return len(self.account_ids)
+
+    def same_owner_destination(self, pos: int) -> Optional[int]:
+        group = self.group_of[pos]
+        start, end = self.offsets[group], self.offsets[group + 1]
+        if end - start <= 1:
+            return None
+        # Draw among the other accounts of the group by skipping over the source position
+        pick = start + int(self.rng.integers(0, end - start - 1))
+        return pick + 1 if pick >= pos else pick
+
+    def other_owner_destination(self, pos: int) -> Optional[int]:
+        if self.single_owner:
+            return None
+        group = self.group_of[pos]
+        for _ in range(self.MAX_REJECTIONS):
+            pick = int(self.rng.integers(0, len(self.account_ids)))
+            if self.group_of[pick] != group:
+                return pick
+        # Dominant customer: fall back to an exact draw outside the source group
+        start, end = self.offsets[group], self.offsets[group + 1]
+        pick = int(self.rng.integers(0, len(self.account_ids) - (end - start)))
+        return pick + (end - start) if pick >= start else pick
@@ -0,0 +1,29 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Cannot encode {type(value).__name__} as JSON")
+
+
+def submit_transactions(session: Session, transactions: List[Dict], auth_logs: Optional[List[Dict]] = None) -> int:
+    """
+    Insert payment transactions together with their authentication logs in one statement through
+    submit_transactions(). The logs are written first, so the row triggers see each transaction's own
+    authentication results. Returns the number of transactions inserted.
+    """
+    return session.execute(
+        text("SELECT submit_transactions(CAST(:transactions AS JSONB), CAST(:auth_logs AS JSONB))"),
+        {
+            'transactions': json.dumps(transactions, default=_json_value),
+            'auth_logs': json.dumps(auth_logs or [], default=_json_value)
+        }
+    ).scalar_one()
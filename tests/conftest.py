@@ -0,0 +1,126 @@
+import json
+import os
+import sys
+import uuid
+from datetime import date, datetime, timedelta
+import numpy as np
+import pytest
+from sqlalchemy import bindparam, create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_FILE = os.path.join(ROOT_DIR, 'sql', 'schema.sql')
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+
+from security_rules import TRANSACTION_TYPES
+
+# PostgreSQL server for the database tests (same DB_* variables as the scripts); each test gets a
+# fresh database created from sql/schema.sql and dropped afterwards. Tests are skipped without a server.
+TEST_DATABASE_URL = os.getenv(
+    "TEST_DATABASE_URL",
+    f"postgresql+psycopg2://{os.getenv('DB_USER', 'postgres')}:{os.getenv('DB_PASSWORD', 'yourpassword')}"
+    f"@{os.getenv('DB_HOST', 'localhost')}:5432/postgres"
+)
+# Days of the transactions inserted by insert_transactions
+DAYS = (date.today() - timedelta(days=1), date.today())
+
+
+@pytest.fixture
+def engine():
+    admin = create_engine(TEST_DATABASE_URL, isolation_level='AUTOCOMMIT')
+    try:
+        connection = admin.connect()
+    except OperationalError as e:
+        admin.dispose()
+        pytest.skip(f"No PostgreSQL server for the database tests: {e.orig}")
+
+    name = f"timo_test_{uuid.uuid4().hex[:12]}"
+    connection.execute(text(f'CREATE DATABASE "{name}"'))
+    engine = create_engine(make_url(TEST_DATABASE_URL).set(database=name))
+    try:
+        raw = engine.raw_connection()
+        try:
+            with open(SCHEMA_FILE) as schema:
+                raw.cursor().execute(schema.read())
+            raw.commit()
+        finally:
+            raw.close()
+        yield engine
+    finally:
+        engine.dispose()
+        connection.execute(text(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)'))
+        connection.close()
+        admin.dispose()
+
+
+def seed_customers(connection, count: int):
+    """
+    count customers (every tenth an organization), each with accounts 10 * id + 1 and 10 * id + 2
+    and device id (trusted for even ids).
+    """
+    connection.execute(text("""
+        INSERT INTO customers (customer_id, customer_type, cccd_number, tax_code, full_name, phone_number, address)
+        SELECT g, CASE WHEN g % 10 = 0 THEN 'organization' ELSE 'individual' END,
+               lpad(g::TEXT, 12, '0'), lpad(g::TEXT, 10, '0'), 'Customer ' || g, lpad(g::TEXT, 10, '0'), 'Address'
+        FROM generate_series(1, :count) g
+    """), {'count': count})
+    connection.execute(text("""
+        INSERT INTO bank_accounts (account_id, customer_id, account_number, account_type, balance)
+        SELECT 10 * g + k, g, 'TIMO' || lpad((10 * g + k)::TEXT, 16, '0'), 'savings', 1000000000000
+        FROM generate_series(1, :count) g, generate_series(1, 2) k
+    """), {'count': count})
+    connection.execute(text("""
+        INSERT INTO devices (device_id, customer_id, device_type, device_identifier, os_info, is_trusted)
+        SELECT g, g, 'mobile', 'device-' || g, 'Android', g % 2 = 0
+        FROM generate_series(1, :count) g
+    """), {'count': count})
+    for table, column in (('customers', 'customer_id'), ('bank_accounts', 'account_id'), ('devices', 'device_id')):
+        connection.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), MAX({column})) FROM {table}"))
+
+
+def insert_transactions(connection, rng: np.random.Generator, first_id: int, size: int, customers: int):
+    """
+    Insert size random transactions of the first customers (see seed_customers) over DAYS, one by one in
+    transaction_id order through the triggers.
+    """
+    customer_ids = rng.integers(1, customers + 1, size)
+    # Amounts from 1,000 to 2B VND, log-uniform, so every threshold of classify_security_level is crossed
+    amounts = np.round(10 ** rng.uniform(3, 9.3, size), -3)
+    seconds = rng.integers(0, 2 * 86400, size)
+    connection.execute(text("""
+        INSERT INTO payment_transactions (
+            transaction_id, from_account_id, customer_id, transaction_type, amount, security_level, description,
+            transaction_date, status, device_id
+        )
+        SELECT :first_id + t.ord - 1, 10 * t.customer_id + 1, t.customer_id, t.transaction_type, t.amount, 'A', 'parity',
+               CAST(:start AS TIMESTAMP) + make_interval(secs => t.seconds), 'completed', t.customer_id
+        FROM unnest(CAST(:customer_ids AS BIGINT[]), CAST(:transaction_types AS TEXT[]),
+                    CAST(:amounts AS NUMERIC[]), CAST(:seconds AS INTEGER[]))
+             WITH ORDINALITY AS t(customer_id, transaction_type, amount, seconds, ord)
+        ORDER BY t.ord
+    """), {
+        'first_id': first_id,
+        'start': datetime.combine(DAYS[0], datetime.min.time()),
+        'customer_ids': customer_ids.tolist(),
+        'transaction_types': rng.choice(TRANSACTION_TYPES, size).tolist(),
+        'amounts': amounts.tolist(),
+        'seconds': seconds.tolist(),
+    })
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+def explain_nodes(connection, statement: str, params, expanding=()):
+    """Every node of the plan of statement (EXPLAIN FORMAT JSON), depth first."""
+    explain = text(f"EXPLAIN (FORMAT JSON) {statement}").bindparams(
+        *(bindparam(name, expanding=True) for name in expanding)
+    )
+    plan = connection.execute(explain, params).scalar_one()
+    plan = plan if isinstance(plan, list) else json.loads(plan)
+    return list(plan_nodes(plan[0]['Plan']))
@@ -0,0 +1,74 @@
+import itertools
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+import check_watermarks
+from check_watermarks import WatermarkStore
+from conftest import seed_customers
+from models import Customer, Device
+
+
+@pytest.fixture(autouse=True)
+def modified_tables(monkeypatch):
+    """Never skip a table: pg_stat_user_tables counters are flushed too lazily for a test."""
+    counter = itertools.count()
+    monkeypatch.setattr(check_watermarks, 'table_modification_count', lambda session, table_name: next(counter))
+
+
+def run_check(engine, store: WatermarkStore, model):
+    """One incremental run of a check listing the primary keys of its window; returns them and the window."""
+    key = list(model.__table__.primary_key.columns)[0]
+    with Session(engine) as session:
+        window = store.window(session, 'test', model)
+        keys = session.scalars(select(key).where(window.condition).order_by(key)).all()
+        store.advance(session, [window])
+    return keys, window
+
+
+def insert_devices(engine, device_ids):
+    with engine.begin() as connection:
+        connection.execute(text("""
+            INSERT INTO devices (device_id, customer_id, device_type, device_identifier, os_info)
+            SELECT d, 1, 'mobile', 'device-' || d, 'Android' FROM unnest(CAST(:device_ids AS BIGINT[])) d
+        """), {'device_ids': device_ids})
+
+
+def test_updates_committed_out_of_order_are_checked(engine):
+    with engine.begin() as connection:
+        seed_customers(connection, 10)
+    store = WatermarkStore(incremental=True, full_sweep_hours=0)
+    assert run_check(engine, store, Customer)[0] == list(range(1, 11))
+    assert run_check(engine, store, Customer)[0] == []
+
+    # Customer 1 is updated first but commits last, after a later update of customer 2 was checked
+    with engine.connect() as slow:
+        slow.execute(text("UPDATE customers SET phone_number = '0900000001' WHERE customer_id = 1"))
+        with engine.begin() as connection:
+            connection.execute(text("UPDATE customers SET phone_number = '0900000002' WHERE customer_id = 2"))
+        assert run_check(engine, store, Customer)[0] == []
+        slow.commit()
+
+    assert run_check(engine, store, Customer)[0] == [1, 2]
+    assert run_check(engine, store, Customer)[0] == []
+
+
+def test_keys_committed_below_the_mark_are_checked(engine):
+    with engine.begin() as connection:
+        seed_customers(connection, 3)
+    store = WatermarkStore(incremental=True, full_sweep_hours=0)
+    assert run_check(engine, store, Device)[0] == [1, 2, 3]
+
+    # Devices 4-9 and 11 are still being written under another session's ID block
+    insert_devices(engine, [10, 12])
+    keys, window = run_check(engine, store, Device)
+    assert keys == [10, 12]
+    assert window.missing == ((4, 9), (11, 11))
+
+    insert_devices(engine, [5, 11])
+    keys, window = run_check(engine, store, Device)
+    assert keys == [5, 11]
+    assert window.missing == ((4, 4), (6, 9))
+
+    keys, window = run_check(engine, store, Device)
+    assert keys == []
+    assert window.missing == ((4, 4), (6, 9))
@@ -0,0 +1,22 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from conftest import seed_customers
+from dq_rules import evaluate_table_rules
+
+
+def test_rules_count_every_violation_and_sample_the_first(engine):
+    with engine.begin() as connection:
+        seed_customers(connection, 300)
+        connection.execute(text("ALTER TABLE customers DROP CONSTRAINT customers_phone_number_key"))
+        connection.execute(text("UPDATE customers SET email = 'not-an-email' WHERE customer_id % 2 = 0"))
+        connection.execute(text("UPDATE customers SET phone_number = '0900000000' WHERE customer_id % 50 = 0"))
+
+    with Session(engine) as session:
+        results = {result.rule.name: result for result in evaluate_table_rules(session, 'customers', sample_size=5)}
+
+    assert (results['format:customers.email'].violations, results['format:customers.email'].samples) == (
+        150, [2, 4, 6, 8, 10]
+    )
+    assert (results['unique:customers.phone_number'].violations,
+            results['unique:customers.phone_number'].samples) == (1, ['0900000000'])
+    assert all(result.samples == [] for result in results.values() if result.violations == 0)
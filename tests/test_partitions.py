@@ -0,0 +1,121 @@
+from datetime import date, datetime
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from conftest import seed_customers
+from partition_maintenance import PartitionMaintenance, add_months
+
+
+def test_create_partition_moves_rows_out_of_default(engine):
+    # A month past the initial partitions, written while maintenance was behind
+    month = date(date.today().year + 2, 3, 1)
+    with engine.begin() as connection:
+        seed_customers(connection, 2)
+        connection.execute(text("""
+            INSERT INTO payment_transactions (
+                from_account_id, customer_id, transaction_type, amount, security_level, description,
+                transaction_date, status, device_id
+            ) VALUES
+                (11, 1, 'payment_goods_services', 150000000, 'A', 'payment', CAST(:month AS TIMESTAMP) + INTERVAL '4 days', 'completed', 1),
+                (21, 2, 'ewallet_topup', 500000, 'A', 'top-up', CAST(:month AS TIMESTAMP) + INTERVAL '10 days', 'completed', 2)
+        """), {'month': month})
+        connection.execute(text("""
+            INSERT INTO authentication_logs (transaction_id, auth_method_id, auth_result, auth_timestamp, failure_reason)
+            SELECT transaction_id, 1, 'success', transaction_date, '' FROM payment_transactions
+        """))
+        before = connection.execute(text("SELECT * FROM customer_daily_state ORDER BY 1, 2")).all()
+        alerts = connection.execute(text("SELECT COUNT(*) FROM risk_alerts")).scalar_one()
+
+    with engine.begin() as connection:
+        for parent in ('payment_transactions', 'authentication_logs'):
+            created = connection.execute(text("SELECT create_monthly_partitions(:parent, :month, 1)"),
+                                         {'parent': parent, 'month': month}).scalar_one()
+            assert created == 1
+
+    partition = f"payment_transactions_p{month:%Y%m}"
+    with engine.connect() as connection:
+        placement = connection.execute(text("""
+            SELECT tableoid::regclass::TEXT, COUNT(*) FROM payment_transactions GROUP BY 1
+        """)).all()
+        assert placement == [(partition, 2)]
+        assert connection.execute(text("""
+            SELECT DISTINCT tableoid::regclass::TEXT FROM authentication_logs
+        """)).scalars().all() == [f"authentication_logs_p{month:%Y%m}"]
+        # Both default partitions are attached again, and the move fired no row triggers
+        assert connection.execute(text("""
+            SELECT COUNT(*) FROM pg_partitioned_table WHERE partdefid <> 0
+            AND partrelid IN (CAST('payment_transactions' AS regclass), CAST('authentication_logs' AS regclass))
+        """)).scalar_one() == 2
+        assert connection.execute(text("SELECT * FROM customer_daily_state ORDER BY 1, 2")).all() == before
+        assert connection.execute(text("SELECT COUNT(*) FROM risk_alerts")).scalar_one() == alerts
+
+
+def insert_payment(connection, transaction_id: int, transaction_date: datetime):
+    connection.execute(text("""
+        INSERT INTO payment_transactions (
+            transaction_id, from_account_id, customer_id, transaction_type, amount, security_level, description,
+            transaction_date, status, device_id
+        ) VALUES (:transaction_id, 11, 1, 'ewallet_topup', 500000, 'A', 'top-up', :transaction_date, 'completed', 1)
+    """), {'transaction_id': transaction_id, 'transaction_date': transaction_date})
+
+
+def insert_auth_log(connection, transaction_id: int, auth_timestamp: datetime):
+    connection.execute(text("""
+        INSERT INTO authentication_logs (transaction_id, auth_method_id, auth_result, auth_timestamp, failure_reason)
+        VALUES (:transaction_id, 1, 'success', :auth_timestamp, '')
+    """), {'transaction_id': transaction_id, 'auth_timestamp': auth_timestamp})
+
+
+def test_transaction_ids_are_unique_across_partitions(engine):
+    this_month = datetime.combine(date.today().replace(day=1), datetime.min.time())
+    next_month = datetime.combine(add_months(date.today().replace(day=1), 1), datetime.min.time())
+    with engine.begin() as connection:
+        seed_customers(connection, 1)
+        insert_payment(connection, 1, this_month)
+        insert_auth_log(connection, 1, this_month)
+
+    # Same ID in another partition
+    with pytest.raises(IntegrityError):
+        with engine.begin() as connection:
+            insert_payment(connection, 1, next_month)
+    # A log of an unknown transaction, checked at commit
+    with pytest.raises(IntegrityError):
+        with engine.begin() as connection:
+            insert_auth_log(connection, 2, this_month)
+    # Deleting a transaction that still has logs
+    with pytest.raises(IntegrityError):
+        with engine.begin() as connection:
+            connection.execute(text("DELETE FROM payment_transactions WHERE transaction_id = 1"))
+
+    # Moving the transaction to another month or renumbering it keeps its key
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE payment_transactions SET transaction_date = :day WHERE transaction_id = 1"),
+                           {'day': next_month})
+        connection.execute(text("UPDATE payment_transactions SET transaction_id = 3 WHERE transaction_id = 1"))
+        for table in ('authentication_logs', 'risk_alerts'):
+            connection.execute(text(f"UPDATE {table} SET transaction_id = 3"))
+        assert connection.execute(text("SELECT transaction_id FROM payment_transaction_keys")).scalars().all() == [3]
+
+
+def test_drop_expired_partitions_removes_the_references(engine):
+    last_month = add_months(date.today().replace(day=1), -1)
+    expired = datetime.combine(last_month, datetime.min.time())
+    with engine.begin() as connection:
+        seed_customers(connection, 1)
+        insert_payment(connection, 1, expired)
+        insert_auth_log(connection, 1, expired)
+        # Authenticated after midnight, in the next, retained month
+        insert_auth_log(connection, 1, datetime.combine(date.today().replace(day=1), datetime.min.time()))
+        connection.execute(text("""
+            INSERT INTO risk_alerts (transaction_id, alert_type, alert_message) VALUES (1, 'auth_failure', '')
+        """))
+
+    next_month = add_months(date.today().replace(day=1), 1)
+    with Session(engine) as session, session.begin():
+        dropped = PartitionMaintenance(retention_months=1).drop_expired_partitions(session, next_month)
+    assert f"payment_transactions_p{last_month:%Y%m}" in dropped['payment_transactions']
+
+    with engine.connect() as connection:
+        for table in ('payment_transaction_keys', 'authentication_logs', 'risk_alerts'):
+            assert connection.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar_one() == 0
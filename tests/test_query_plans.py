@@ -0,0 +1,81 @@
+import os
+import sys
+from datetime import date
+from sqlalchemy import text
+from conftest import ROOT_DIR, explain_nodes, seed_customers
+
+sys.path.insert(0, os.path.join(ROOT_DIR, 'visualization'))
+from queries import SQLQueries  # noqa: E402
+
+
+TODAY = date.today()
+PARTITION = f"payment_transactions_p{TODAY:%Y%m}"
+
+# Lookups of the row triggers (sql/schema.sql), the trigger functions calling them, and the table they read
+TRIGGER_LOOKUPS = {
+    'transaction_auth_summary(:transaction_id)': (
+        ('classify_transaction', 'update_daily_summary', 'adjust_customer_daily_state'), 'authentication_logs'
+    ),
+    'transaction_customer_day(:transaction_id)': (('mark_customer_daily_strong_auth',), 'payment_transactions'),
+    'customer_day_state(:customer_id, CAST(:day AS DATE))': (('update_daily_summary',), 'customer_daily_state'),
+}
+INDEX_SCANS = ('Index Scan', 'Index Only Scan', 'Bitmap Heap Scan')
+
+
+def plan_scans(connection, statement: str, params, expanding=()):
+    """(node type, relation) of every node of the plan of statement."""
+    return {(node['Node Type'], node.get('Relation Name', ''))
+            for node in explain_nodes(connection, statement, params, expanding)}
+
+
+def table_scans(scans, table: str):
+    """The scans of table or of its partitions."""
+    return {(node_type, relation) for node_type, relation in scans if relation.startswith(table)}
+
+
+def assert_single_partition_index_scan(scans):
+    scans = table_scans(scans, 'payment_transactions')
+    assert {relation for _, relation in scans} == {PARTITION}
+    assert all(node_type in INDEX_SCANS for node_type, _ in scans)
+
+
+def test_lookups_use_an_index(engine):
+    with engine.begin() as connection:
+        seed_customers(connection, 200)
+        # Two months of payments, so the current month is one partition of several with data
+        connection.execute(text("""
+            INSERT INTO payment_transactions (
+                from_account_id, customer_id, transaction_type, amount, security_level, description,
+                transaction_date, status, device_id
+            )
+            SELECT 10 * c + 1, c, 'payment_goods_services', 10000 * (1 + g % 5000), 'A', 'payment',
+                   CAST(:today AS TIMESTAMP) - make_interval(mins => g % (60 * 24 * 60)), 'completed', c
+            FROM generate_series(1, 5000) g, LATERAL (SELECT 1 + g % 200 AS c) customer
+        """), {'today': TODAY})
+        connection.execute(text("ANALYZE"))
+
+    with engine.begin() as connection:
+        # The test tables are small: with sequential scans off, the plan shows whether an index can serve the lookup
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        day = TODAY.replace(day=1)
+        for lookup, (callers, table) in TRIGGER_LOOKUPS.items():
+            for caller in callers:
+                source = connection.execute(text("SELECT prosrc FROM pg_proc WHERE proname = :name"),
+                                            {'name': caller}).scalar_one()
+                assert lookup.split('(')[0] + '(' in source, f"{caller} no longer calls {lookup}"
+
+            # Inlined into the calling statement: the plan reads the table itself, through an index
+            scans = plan_scans(connection, f"SELECT * FROM {lookup}",
+                               {'transaction_id': 4321, 'customer_id': 7, 'day': day})
+            assert 'Function Scan' not in {node_type for node_type, _ in scans}
+            assert table_scans(scans, table)
+            assert all(node_type in INDEX_SCANS for node_type, _ in table_scans(scans, table))
+
+        scans = plan_scans(connection, SQLQueries.TOTAL_TRANSACTIONS, {
+            'start_date': day, 'end_date': day,
+            'customer_segments': ['individual', 'organization'],
+            'transaction_types': ['payment_goods_services'],
+            'transaction_statuses': ['completed'],
+            'security_levels': ['A', 'B', 'C', 'D'],
+        }, expanding=('customer_segments', 'transaction_types', 'transaction_statuses', 'security_levels'))
+        assert_single_partition_index_scan(scans)
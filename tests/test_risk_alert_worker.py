@@ -0,0 +1,52 @@
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from conftest import insert_transactions, seed_customers
+from risk_alert_worker import ALERT_RULES, RiskAlertWorker
+
+
+CUSTOMERS = 20
+TRANSACTIONS = 6000
+ALERTS = "SELECT transaction_id, alert_type, alert_message FROM risk_alerts ORDER BY alert_id"
+
+
+def load_batch(connection, alert_mode: str):
+    """
+    The same transactions in either alert mode. A third of them have authentication attempts written before
+    them (as by submit_transactions) and another third after them: failures, and a few C-level successes.
+    """
+    connection.execute(text("SELECT set_config('timo.alert_mode', :alert_mode, true)"), {'alert_mode': alert_mode})
+    logs = text("""
+        INSERT INTO authentication_logs (transaction_id, auth_method_id, auth_result, failure_reason)
+        SELECT g, CASE WHEN g % 300 = 0 THEN 8 ELSE 1 END, CASE WHEN g % 300 = 0 THEN 'success' ELSE 'failed' END, ''
+        FROM generate_series(1, :size) g
+        WHERE g % 3 = :remainder
+    """)
+    connection.execute(logs, {'size': TRANSACTIONS, 'remainder': 0})
+    insert_transactions(connection, np.random.default_rng(13), 1, TRANSACTIONS, CUSTOMERS)
+    connection.execute(logs, {'size': TRANSACTIONS, 'remainder': 1})
+
+
+def test_async_alerts_match_trigger(engine):
+    with engine.begin() as connection:
+        seed_customers(connection, CUSTOMERS)
+
+    with engine.connect() as connection:
+        with connection.begin() as transaction:
+            load_batch(connection, 'sync')
+            sync_alerts = connection.execute(text(ALERTS)).all()
+            transaction.rollback()
+
+    with engine.begin() as connection:
+        load_batch(connection, 'async')
+        assert connection.execute(text(ALERTS)).all() == []
+
+    worker = RiskAlertWorker(batch_size=500)
+    with Session(engine) as session:
+        while worker.process_batch(session)['events']:
+            session.commit()
+        session.commit()
+        async_alerts = session.execute(text(ALERTS)).all()
+
+    assert {alert_type for _, alert_type, _ in sync_alerts} == {rule.alert_type for rule in ALERT_RULES}
+    assert async_alerts == sync_alerts
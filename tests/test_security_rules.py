@@ -0,0 +1,53 @@
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from conftest import insert_transactions, seed_customers
+from security_rules import classify_batch, load_daily_state
+from transaction_sampler import to_cents
+
+
+CUSTOMERS = 200
+
+
+def test_classify_batch_matches_trigger(engine):
+    rng = np.random.default_rng(17)
+    with engine.begin() as connection:
+        seed_customers(connection, CUSTOMERS)
+        # Earlier transactions of both days, a fifth of them with strong authentication
+        insert_transactions(connection, rng, 1, 1000, CUSTOMERS)
+        connection.execute(text("""
+            INSERT INTO authentication_logs (transaction_id, auth_method_id, auth_result, auth_timestamp, failure_reason)
+            SELECT transaction_id, 8, 'success', transaction_date, ''
+            FROM payment_transactions
+            WHERE transaction_id % 5 = 0
+        """))
+
+    with Session(engine) as session:
+        state_before = load_daily_state(session, session.execute(
+            text("SELECT customer_id, day FROM customer_daily_state")
+        ).all())
+    assert any(has_strong_auth for _, _, has_strong_auth in state_before.values())
+
+    with engine.begin() as connection:
+        insert_transactions(connection, rng, 1001, 6000, CUSTOMERS)
+
+    with Session(engine) as session:
+        rows = session.execute(text("""
+            SELECT pt.customer_id, pt.transaction_date, c.customer_type, pt.transaction_type, pt.amount, pt.security_level
+            FROM payment_transactions pt
+            JOIN customers c ON c.customer_id = pt.customer_id
+            WHERE pt.transaction_id > 1000
+            ORDER BY pt.transaction_id
+        """)).all()
+        state_after = load_daily_state(session, session.execute(
+            text("SELECT customer_id, day FROM customer_daily_state")
+        ).all())
+
+    customer_ids, transaction_dates, customer_types, transaction_types, amounts, levels = zip(*rows)
+    result = classify_batch(customer_ids, transaction_dates, customer_types, transaction_types,
+                            [to_cents(amount) for amount in amounts], daily_state=state_before)
+
+    assert len(rows) == 6000
+    assert set(levels) == {'A', 'B', 'C', 'D'}
+    assert result.security_level.tolist() == list(levels)
+    assert result.daily_state == state_after
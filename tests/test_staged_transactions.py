@@ -0,0 +1,55 @@
+from datetime import date, datetime
+from sqlalchemy import text
+from conftest import explain_nodes, seed_customers
+
+
+CUSTOMERS = 200
+TODAY = date.today()
+
+
+def stage_batch(connection, batch_id: int, size: int, transaction_date: datetime, spread_seconds: int = 0):
+    """
+    Stage size payments. They share one transaction_date, as the staging table's default produces,
+    unless spread_seconds spreads them over that many seconds after it.
+    """
+    connection.execute(text("""
+        INSERT INTO payment_transactions_staging (
+            batch_id, from_account_id, customer_id, transaction_type, amount, description,
+            transaction_date, status, device_id
+        )
+        SELECT :batch_id, 10 * c + 1, c, 'payment_goods_services', 10000 * (1 + g % 50000), 'payment',
+               CAST(:transaction_date AS TIMESTAMP) + make_interval(secs => g % :spread),
+               'completed', c
+        FROM generate_series(1, :size) g, LATERAL (SELECT 1 + g % :customers AS c) customer
+    """), {'batch_id': batch_id, 'size': size, 'transaction_date': transaction_date, 'customers': CUSTOMERS,
+          'spread': max(spread_seconds, 1)})
+
+
+def process_batch(connection, batch_id: int) -> int:
+    return connection.execute(text("SELECT process_staged_transactions(:batch_id)"),
+                              {'batch_id': batch_id}).scalar_one()
+
+
+def test_shared_timestamp_batch_is_found_by_transaction_id(engine):
+    with engine.begin() as connection:
+        seed_customers(connection, CUSTOMERS)
+        # Earlier traffic with analyzed statistics: transaction_date looks selective to the planner
+        stage_batch(connection, 1, 5000, datetime(TODAY.year, TODAY.month, TODAY.day, 8), spread_seconds=3600)
+        assert process_batch(connection, 1) == 5000
+        connection.execute(text("ANALYZE payment_transactions"))
+
+    with engine.begin() as connection:
+        stage_batch(connection, 2, 8000, datetime(TODAY.year, TODAY.month, TODAY.day, 10))
+        source = connection.execute(text("""
+            SELECT prosrc FROM pg_proc WHERE proname = 'process_staged_transactions'
+        """)).scalar_one()
+        assert 'JOIN payment_transactions ' not in source and 'staged_batch_transactions(' in source
+        # Probing the transaction_date index once per row of a batch sharing one timestamp is quadratic
+        nodes = explain_nodes(connection, "SELECT * FROM staged_batch_transactions(:batch_id)", {'batch_id': 2})
+        indexes = {node['Index Name'] for node in nodes if 'Index Name' in node}
+        assert all(name.startswith('payment_transactions_staging') or name.endswith('_pkey') for name in indexes)
+        assert process_batch(connection, 2) == 8000
+
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT COUNT(*) FROM payment_transactions")).scalar_one() == 13000
+        assert connection.execute(text("SELECT COUNT(*) FROM payment_transactions_staging")).scalar_one() == 0
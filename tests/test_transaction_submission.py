@@ -0,0 +1,46 @@
+from datetime import date, datetime
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from conftest import seed_customers
+from transaction_submission import submit_transactions
+
+
+NOW = datetime.combine(date.today(), datetime.min.time()).replace(hour=12)
+
+
+def submit_transfer(engine, customer_id: int, auth_logs):
+    """Submit one 50M VND transfer (Level C required) from an untrusted device; returns its alerts and day state."""
+    transaction_id = 100 + customer_id
+    with Session(engine) as session:
+        submitted = submit_transactions(session, [{
+            'transaction_id': transaction_id, 'from_account_id': 10 * customer_id + 1, 'customer_id': customer_id,
+            'transaction_type': 'transfer_same_bank_diff_owner', 'amount': 50000000, 'description': 'transfer',
+            'transaction_date': NOW, 'status': 'completed', 'device_id': customer_id,
+        }], [{**log, 'transaction_id': transaction_id, 'auth_timestamp': NOW} for log in auth_logs])
+        session.commit()
+    assert submitted == 1
+    with engine.connect() as connection:
+        alerts = connection.execute(text("SELECT alert_type FROM risk_alerts WHERE transaction_id = :id"),
+                                    {'id': transaction_id}).scalars().all()
+        state = connection.execute(text("""
+            SELECT has_strong_auth, auth_failure_count FROM customer_daily_state WHERE customer_id = :customer_id
+        """), {'customer_id': customer_id}).one()
+    return set(alerts), tuple(state)
+
+
+def test_triggers_see_the_transactions_own_auth_logs(engine):
+    with engine.begin() as connection:
+        seed_customers(connection, 3)
+
+    # Customers 1 and 3 have untrusted devices: one authenticates with biometrics after a failed SMS OTP
+    strong, strong_state = submit_transfer(engine, 1, [
+        {'auth_method_id': 1, 'auth_result': 'failed', 'failure_reason': 'wrong OTP'},
+        {'auth_method_id': 8, 'auth_result': 'success'},
+    ])
+    weak, weak_state = submit_transfer(engine, 3, [{'auth_method_id': 1, 'auth_result': 'success'}])
+
+    assert strong_state == (True, 1)
+    assert weak_state == (False, 0)
+    assert {'untrusted_device', 'strong_auth_required'} <= weak
+    assert not strong & {'untrusted_device', 'strong_auth_required', 'weak_authentication'}
+    assert 'auth_failure' in strong
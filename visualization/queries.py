@@ -2,6 +2,9 @@ class SQLQueries:
     """
     A class to store all SQL queries used in the dashboard.
     NOTE: Queries have been updated to fix errors related to ambiguous columns and missing table joins.
+    Date filters are half-open timestamp ranges (not ::DATE casts), so they can use the transaction_date /
+    auth_timestamp indexes and prune the monthly partitions. Customer segments filter on the denormalized
+    payment_transactions.customer_type; customers is only joined for names.
     """
     # --- KPI Queries ---
     TOTAL_CUSTOMERS = "SELECT COUNT(*) FROM customers WHERE status = 'active';"
@@ -10,9 +13,8 @@ class SQLQueries:
     TOTAL_TRANSACTIONS = """
         SELECT COUNT(*)
         FROM payment_transactions pt
-        JOIN customers c ON pt.customer_id = c.customer_id
-        WHERE pt.transaction_date::DATE BETWEEN :start_date AND :end_date
-        AND c.customer_type IN :customer_segments
+        WHERE pt.transaction_date >= :start_date AND pt.transaction_date < CAST(:end_date AS DATE) + 1
+        AND pt.customer_type IN :customer_segments
         AND pt.transaction_type IN :transaction_types
         AND pt.status IN :transaction_statuses
         AND pt.security_level IN :security_levels; -- Add security_level filter
@@ -20,9 +22,8 @@ class SQLQueries:
     TOTAL_TRANSACTION_AMOUNT = """
         SELECT COALESCE(SUM(pt.amount), 0)
         FROM payment_transactions pt
-        JOIN customers c ON pt.customer_id = c.customer_id
-        WHERE pt.transaction_date::DATE BETWEEN :start_date AND :end_date
-        AND c.customer_type IN :customer_segments
+        WHERE pt.transaction_date >= :start_date AND pt.transaction_date < CAST(:end_date AS DATE) + 1
+        AND pt.customer_type IN :customer_segments
         AND pt.transaction_type IN :transaction_types
         AND pt.status IN :transaction_statuses
         AND pt.security_level IN :security_levels; -- Add security_level filter
@@ -30,9 +31,8 @@ class SQLQueries:
     ACTIVE_CUSTOMERS_PERIOD = """
         SELECT COUNT(DISTINCT pt.customer_id)
         FROM payment_transactions AS pt
-        JOIN customers AS c ON pt.customer_id = c.customer_id
-        WHERE pt.transaction_date::DATE BETWEEN :start_date AND :end_date
-          AND c.customer_type IN :customer_segments
+        WHERE pt.transaction_date >= :start_date AND pt.transaction_date < CAST(:end_date AS DATE) + 1
+          AND pt.customer_type IN :customer_segments
           AND pt.transaction_type IN :transaction_types
           AND pt.status IN :transaction_statuses
           AND pt.security_level IN :security_levels; -- Add security_level filter
@@ -40,10 +40,9 @@ class SQLQueries:
     SUSPICIOUS_TRANSACTION_AMOUNT = """
         SELECT COALESCE(SUM(pt.amount), 0)
         FROM payment_transactions AS pt
-        JOIN customers AS c ON pt.customer_id = c.customer_id
         WHERE pt.is_suspicious = TRUE
-          AND pt.transaction_date::DATE BETWEEN :start_date AND :end_date
-          AND c.customer_type IN :customer_segments
+          AND pt.transaction_date >= :start_date AND pt.transaction_date < CAST(:end_date AS DATE) + 1
+          AND pt.customer_type IN :customer_segments
           AND pt.transaction_type IN :transaction_types
           AND pt.security_level IN :security_levels; -- Add security_level filter
     """
@@ -54,9 +53,8 @@ class SQLQueries:
             0)
         FROM authentication_logs al
         JOIN payment_transactions pt ON al.transaction_id = pt.transaction_id
-        JOIN customers c ON pt.customer_id = c.customer_id
-        WHERE pt.transaction_date::DATE BETWEEN :start_date AND :end_date
-        AND c.customer_type IN :customer_segments
+        WHERE pt.transaction_date >= :start_date AND pt.transaction_date < CAST(:end_date AS DATE) + 1
+        AND pt.customer_type IN :customer_segments
         AND pt.transaction_type IN :transaction_types
         AND pt.security_level IN :security_levels; -- Add security_level filter
     """
@@ -68,9 +66,8 @@ class SQLQueries:
             COUNT(*) AS daily_transaction_count,
             SUM(amount) AS daily_transaction_amount
         FROM payment_transactions pt
-        JOIN customers c ON pt.customer_id = c.customer_id
-        WHERE pt.transaction_date::DATE BETWEEN :start_date AND :end_date
-        AND c.customer_type IN :customer_segments
+        WHERE pt.transaction_date >= :start_date AND pt.transaction_date < CAST(:end_date AS DATE) + 1
+        AND pt.customer_type IN :customer_segments
         AND pt.transaction_type IN :transaction_types
         AND pt.status IN :transaction_statuses
         AND pt.security_level IN :security_levels -- Add security_level filter
@@ -80,9 +77,8 @@ class SQLQueries:
     TRANSACTION_VOLUME_BY_TYPE = """
         SELECT transaction_type, COUNT(*) as count
         FROM payment_transactions pt
-        JOIN customers c ON pt.customer_id = c.customer_id
-        WHERE pt.transaction_date::DATE BETWEEN :start_date AND :end_date
-        AND c.customer_type IN :customer_segments
+        WHERE pt.transaction_date >= :start_date AND pt.transaction_date < CAST(:end_date AS DATE) + 1
+        AND pt.customer_type IN :customer_segments
         AND pt.transaction_type IN :transaction_types
         AND pt.security_level IN :security_levels -- Add security_level filter
         GROUP BY transaction_type;
@@ -90,22 +86,20 @@ class SQLQueries:
     TRANSACTION_STATUS_DISTRIBUTION = """
         SELECT pt.status, COUNT(*) as count
         FROM payment_transactions pt
-        JOIN customers c ON pt.customer_id = c.customer_id
-        WHERE pt.transaction_date::DATE BETWEEN :start_date AND :end_date
-        AND c.customer_type IN :customer_segments
+        WHERE pt.transaction_date >= :start_date AND pt.transaction_date < CAST(:end_date AS DATE) + 1
+        AND pt.customer_type IN :customer_segments
         AND pt.transaction_type IN :transaction_types
         AND pt.status IN :transaction_statuses
         AND pt.security_level IN :security_levels -- Add security_level filter
         GROUP BY pt.status;
     """
     CUSTOMER_TYPE_DISTRIBUTION = """
-        SELECT c.customer_type, COUNT(DISTINCT c.customer_id) as count
-        FROM customers c
-        JOIN payment_transactions pt ON c.customer_id = pt.customer_id
-        WHERE pt.transaction_date::DATE BETWEEN :start_date AND :end_date
-        AND c.customer_type IN :customer_segments
+        SELECT pt.customer_type, COUNT(DISTINCT pt.customer_id) as count
+        FROM payment_transactions pt
+        WHERE pt.transaction_date >= :start_date AND pt.transaction_date < CAST(:end_date AS DATE) + 1
+        AND pt.customer_type IN :customer_segments
         AND pt.security_level IN :security_levels -- Add security_level filter
-        GROUP BY c.customer_type;
+        GROUP BY pt.customer_type;
     """
     DEVICE_TYPE_DISTRIBUTION = """
         SELECT d.device_type, COUNT(DISTINCT d.device_id) as count
@@ -135,10 +129,9 @@ class SQLQueries:
             authentication_methods am
         LEFT JOIN authentication_logs al ON am.auth_id = al.auth_method_id
         JOIN payment_transactions pt ON al.transaction_id = pt.transaction_id
-        JOIN customers c ON pt.customer_id = c.customer_id
-        WHERE pt.transaction_date::DATE BETWEEN :start_date AND :end_date
+        WHERE pt.transaction_date >= :start_date AND pt.transaction_date < CAST(:end_date AS DATE) + 1
           AND pt.transaction_type IN :transaction_types
-          AND c.customer_type IN :customer_segments
+          AND pt.customer_type IN :customer_segments
           AND pt.security_level IN :security_levels -- Add security_level filter
         GROUP BY
             am.method_name, am.security_level
@@ -149,11 +142,10 @@ class SQLQueries:
         SELECT auth_result, COUNT(*) AS count
         FROM authentication_logs al
         JOIN payment_transactions pt ON al.transaction_id = pt.transaction_id
-        JOIN customers c ON pt.customer_id = c.customer_id
-        WHERE pt.transaction_date::DATE BETWEEN :start_date AND :end_date
+        WHERE pt.transaction_date >= :start_date AND pt.transaction_date < CAST(:end_date AS DATE) + 1
         AND pt.transaction_type IN :transaction_types
         AND al.auth_result IN :auth_results
-        AND c.customer_type IN :customer_segments
+        AND pt.customer_type IN :customer_segments
         AND pt.security_level IN :security_levels -- Add security_level filter
         GROUP BY auth_result;
     """
@@ -161,11 +153,10 @@ class SQLQueries:
         SELECT alert_type, COUNT(*) as count
         FROM risk_alerts ra
         JOIN payment_transactions pt ON ra.transaction_id = pt.transaction_id
-        JOIN customers c ON pt.customer_id = c.customer_id
-        WHERE pt.transaction_date::DATE BETWEEN :start_date AND :end_date
+        WHERE pt.transaction_date >= :start_date AND pt.transaction_date < CAST(:end_date AS DATE) + 1
         AND pt.transaction_type IN :transaction_types
         AND ra.status IN :alert_statuses
-        AND c.customer_type IN :customer_segments
+        AND pt.customer_type IN :customer_segments
         AND pt.security_level IN :security_levels -- Add security_level filter
         GROUP BY alert_type;
     """
@@ -177,9 +168,9 @@ class SQLQueries:
         JOIN customers c ON pt.customer_id = c.customer_id
         LEFT JOIN risk_alerts ra ON pt.transaction_id = ra.transaction_id
         WHERE pt.is_suspicious = TRUE
-        AND pt.transaction_date::DATE BETWEEN :start_date AND :end_date
+        AND pt.transaction_date >= :start_date AND pt.transaction_date < CAST(:end_date AS DATE) + 1
         AND pt.transaction_type IN :transaction_types
-        AND c.customer_type IN :customer_segments
+        AND pt.customer_type IN :customer_segments
         AND pt.security_level IN :security_levels -- Add security_level filter
         ORDER BY pt.transaction_date DESC
         LIMIT 20;
@@ -190,9 +181,8 @@ class SQLQueries:
             EXTRACT(HOUR FROM transaction_date) AS hour_of_day,
             COUNT(transaction_id) AS transaction_count
         FROM payment_transactions pt
-        JOIN customers c ON pt.customer_id = c.customer_id
-        WHERE pt.transaction_date::DATE BETWEEN :start_date AND :end_date
-          AND c.customer_type IN :customer_segments
+        WHERE pt.transaction_date >= :start_date AND pt.transaction_date < CAST(:end_date AS DATE) + 1
+          AND pt.customer_type IN :customer_segments
           AND pt.transaction_type IN :transaction_types
           AND pt.status IN :transaction_statuses
           AND pt.security_level IN :security_levels -- Add security_level filter
@@ -202,9 +192,8 @@ class SQLQueries:
     TRANSACTION_FUNNEL = """
         WITH filtered_transactions AS (
             SELECT pt.transaction_id FROM payment_transactions pt
-            JOIN customers c ON pt.customer_id = c.customer_id
-            WHERE pt.transaction_date::DATE BETWEEN :start_date AND :end_date
-              AND c.customer_type IN :customer_segments
+            WHERE pt.transaction_date >= :start_date AND pt.transaction_date < CAST(:end_date AS DATE) + 1
+              AND pt.customer_type IN :customer_segments
               AND pt.transaction_type IN :transaction_types
               AND pt.status IN :transaction_statuses
               AND pt.security_level IN :security_levels -- Add security_level filter
@@ -222,16 +211,16 @@ class SQLQueries:
     HIGH_VALUE_TRANSACTION_REPORT = """
         SELECT
             pt.transaction_id, pt.transaction_type, pt.amount, pt.security_level,
-            pt.transaction_date, pt.status AS transaction_status, c.full_name, c.customer_type
+            pt.transaction_date, pt.status AS transaction_status, c.full_name, pt.customer_type
         FROM payment_transactions pt
         JOIN customers c ON pt.customer_id = c.customer_id
-        WHERE pt.transaction_date::DATE BETWEEN :start_date AND :end_date
-        AND c.customer_type IN :customer_segments
+        WHERE pt.transaction_date >= :start_date AND pt.transaction_date < CAST(:end_date AS DATE) + 1
+        AND pt.customer_type IN :customer_segments
         AND pt.transaction_type IN :transaction_types
         AND pt.security_level IN :security_levels -- Add security_level filter
         AND (
-            (c.customer_type = 'individual' AND pt.amount > 100000000) OR
-            (c.customer_type = 'organization' AND pt.amount > 1000000000)
+            (pt.customer_type = 'individual' AND pt.amount > 100000000) OR
+            (pt.customer_type = 'organization' AND pt.amount > 1000000000)
         )
         ORDER BY pt.amount DESC;
     """
@@ -245,49 +234,51 @@ class SQLQueries:
         JOIN customers c ON pt.customer_id = c.customer_id
         JOIN devices d ON pt.device_id = d.device_id
         WHERE al.auth_result = 'failed'
-        AND al.auth_timestamp::DATE BETWEEN :start_date AND :end_date
-        AND c.customer_type IN :customer_segments
+        AND al.auth_timestamp >= :start_date AND al.auth_timestamp < CAST(:end_date AS DATE) + 1
+        AND pt.customer_type IN :customer_segments
         AND pt.security_level IN :security_levels -- Add security_level filter
         ORDER BY al.auth_timestamp DESC;
     """
 
     # New queries for Customer Behavior tab
     AVG_TRANSACTION_VALUE_BY_CUSTOMER_TYPE = """
-        SELECT c.customer_type, AVG(pt.amount) AS avg_amount
+        SELECT pt.customer_type, AVG(pt.amount) AS avg_amount
         FROM payment_transactions pt
-        JOIN customers c ON pt.customer_id = c.customer_id
-        WHERE pt.transaction_date::DATE BETWEEN :start_date AND :end_date
-        AND c.customer_type IN :customer_segments
+        WHERE pt.transaction_date >= :start_date AND pt.transaction_date < CAST(:end_date AS DATE) + 1
+        AND pt.customer_type IN :customer_segments
         AND pt.transaction_type IN :transaction_types
         AND pt.status IN :transaction_statuses
         AND pt.security_level IN :security_levels
-        GROUP BY c.customer_type;
+        GROUP BY pt.customer_type;
     """  #
 
     TRANSACTION_COUNT_BY_CUSTOMER_TYPE = """
-        SELECT c.customer_type, COUNT(pt.transaction_id) AS transaction_count
+        SELECT pt.customer_type, COUNT(pt.transaction_id) AS transaction_count
         FROM payment_transactions pt
-        JOIN customers c ON pt.customer_id = c.customer_id
-        WHERE pt.transaction_date::DATE BETWEEN :start_date AND :end_date
-        AND c.customer_type IN :customer_segments
+        WHERE pt.transaction_date >= :start_date AND pt.transaction_date < CAST(:end_date AS DATE) + 1
+        AND pt.customer_type IN :customer_segments
         AND pt.transaction_type IN :transaction_types
         AND pt.status IN :transaction_statuses
         AND pt.security_level IN :security_levels
-        GROUP BY c.customer_type;
+        GROUP BY pt.customer_type;
     """  #
 
     TOP_ACTIVE_CUSTOMERS = """
-        SELECT c.full_name, c.customer_type, COUNT(pt.transaction_id) AS transaction_count, SUM(pt.amount) AS total_transaction_amount
-        FROM payment_transactions pt
-        JOIN customers c ON pt.customer_id = c.customer_id
-        WHERE pt.transaction_date::DATE BETWEEN :start_date AND :end_date
-        AND c.customer_type IN :customer_segments
-        AND pt.transaction_type IN :transaction_types
-        AND pt.status IN :transaction_statuses
-        AND pt.security_level IN :security_levels
-        GROUP BY c.customer_id, c.full_name, c.customer_type
-        ORDER BY transaction_count DESC
-        LIMIT 10;
+        SELECT c.full_name, top.customer_type, top.transaction_count, top.total_transaction_amount
+        FROM (
+            SELECT pt.customer_id, pt.customer_type, COUNT(pt.transaction_id) AS transaction_count, SUM(pt.amount) AS total_transaction_amount
+            FROM payment_transactions pt
+            WHERE pt.transaction_date >= :start_date AND pt.transaction_date < CAST(:end_date AS DATE) + 1
+            AND pt.customer_type IN :customer_segments
+            AND pt.transaction_type IN :transaction_types
+            AND pt.status IN :transaction_statuses
+            AND pt.security_level IN :security_levels
+            GROUP BY pt.customer_id, pt.customer_type
+            ORDER BY transaction_count DESC
+            LIMIT 10
+        ) top
+        JOIN customers c ON top.customer_id = c.customer_id
+        ORDER BY top.transaction_count DESC;
     """  #
 
     TRANSACTION_FREQUENCY_BY_HOUR = """
@@ -296,7 +287,7 @@ class SQLQueries:
             EXTRACT(HOUR FROM transaction_date) AS hour_of_day,
             COUNT(*) AS transaction_count
         FROM payment_transactions
-        WHERE transaction_date::DATE BETWEEN :start_date AND :end_date
+        WHERE transaction_date >= :start_date AND transaction_date < CAST(:end_date AS DATE) + 1
         AND security_level IN :security_levels
         GROUP BY 1, 2
         ORDER BY 1, 2;
@@ -308,9 +299,8 @@ class SQLQueries:
             pt.security_level,
             COUNT(pt.transaction_id) AS transaction_count
         FROM payment_transactions pt
-        JOIN customers c ON pt.customer_id = c.customer_id
-        WHERE pt.transaction_date::DATE BETWEEN :start_date AND :end_date
-        AND c.customer_type IN :customer_segments
+        WHERE pt.transaction_date >= :start_date AND pt.transaction_date < CAST(:end_date AS DATE) + 1
+        AND pt.customer_type IN :customer_segments
         AND pt.transaction_type IN :transaction_types
         AND pt.status IN :transaction_statuses
         GROUP BY pt.security_level